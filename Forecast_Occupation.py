@@ -1,23 +1,503 @@
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from sklearn.preprocessing import PolynomialFeatures
-from sklearn.linear_model import LinearRegression
-import statsmodels.api as sm
+from collections import OrderedDict
 from datetime import datetime
+import hashlib
 import os
+import pickle
+
+# pandas, numpy, scipy and matplotlib are imported inside the functions that
+# use them, so the command line starts (and --help answers) without loading
+# them; benchmarks/bench_forecast_startup.py keeps an eye on this.
+
+# Columns forecast_occupations needs; columnar files only read these
+FORECAST_COLUMNS = ['Year', 'Region', 'Group', 'Subgroup', 'Total']
+
+# File types load_data can read
+DATA_EXTENSIONS = ('.parquet', '.feather', '.arrow', '.csv', '.xlsx', '.xls')
+
+# Database files query_data can read (immigration.database)
+DB_EXTENSIONS = ('.sqlite', '.db', '.duckdb')
+
+# Bump when the cached forecast record changes so old entries are ignored
+FORECAST_CACHE_VERSION = 1
+
+# Per-series arrays forecast_batch produces and ForecastCache stores
+SERIES_FIELDS = ['Year', 'Actual', 'Forecast', 'Lower_CI', 'Upper_CI', 'Is_Forecast', 'R2']
+
+# Candidate polynomial degrees and the shortest training window of a backtest
+BACKTEST_DEGREES = (1, 2, 3)
+MIN_TRAIN_YEARS = 5
+
+def load_data(path, columns=FORECAST_COLUMNS, filters=None):
+    """
+    Load the merged dataset from .parquet, .feather/.arrow, .csv or .xlsx/.xls,
+    or from a directory partitioned by Year and Group, with the canonical
+    dtypes of Mergefn/immigration/schema.py. Parquet and Feather files are
+    read column-wise, so only `columns` are loaded.
+    
+    filters maps columns to the values to keep, e.g. {'Group': 'Occupation',
+    'Year': range(2010, 2023)}; a partitioned directory only reads the
+    partitions that can match (see immigration.storage.read_dataset).
+    """
+    from Mergefn.immigration.storage import read_dataset
+    if not (path.endswith(DATA_EXTENSIONS) or os.path.isdir(path)):
+        raise ValueError("Data file must be .parquet, .feather/.arrow, .csv, .xlsx/.xls or a partitioned directory")
+    return read_dataset(path, columns=columns, filters=filters)
+
+def query_data(path, countries=None, occupation_categories=None, columns=FORECAST_COLUMNS):
+    """
+    Fetch only the Occupation rows of the given countries and categories
+    from a database written by the merge (.sqlite/.db, or .duckdb), through
+    its (Region, Group, Subgroup, Year) index.
+    """
+    from Mergefn.immigration.database import query_dataset
+    if not path.endswith(DB_EXTENSIONS):
+        raise ValueError("Database file must be .sqlite/.db or .duckdb")
+    return query_dataset(path, regions=countries, groups='Occupation', subgroups=occupation_categories,
+                         columns=columns)
+
+def prepare_occupation_data(data, countries=None, occupation_categories=None):
+    """
+    Occupation rows of the merged dataset with an integer Year and a
+    stripped Occupation_Category, filtered to the given countries/categories.
+    """
+    import pandas as pd
+    occupation_data = data[data['Group'] == 'Occupation']
+
+    # Filter for specified countries
+    if countries is not None:
+        occupation_data = occupation_data[occupation_data['Region'].isin(countries)]
+
+    # Year may be a string, an integer or a datetime
+    years = occupation_data['Year']
+    if pd.api.types.is_datetime64_any_dtype(years):
+        years = years.dt.year
+
+    occupation_data = occupation_data.assign(
+        Year=pd.to_numeric(years).astype(int),
+        Region=occupation_data['Region'].astype(str),
+        # float32 counts are summed in float64
+        Total=occupation_data['Total'].astype(float),
+        Occupation_Category=occupation_data['Subgroup'].astype(str).str.strip(),
+    )
+
+    # Filter for specified occupation categories
+    if occupation_categories is not None:
+        occupation_data = occupation_data[occupation_data['Occupation_Category'].isin(occupation_categories)]
+
+    return occupation_data
+
+def pivot_series(occupation_data, keys=('Region', 'Occupation_Category')):
+    """
+    Sum Total into a Year x series matrix, one column per combination of
+    `keys`. Years a series has no rows for are NaN.
+    """
+    keys = list(keys)
+    sums = occupation_data.groupby(['Year'] + keys, observed=True)['Total'].sum()
+    matrix = sums.unstack(keys)
+    return matrix.sort_index()
+
+def series_keys(by_country=True):
+    """Columns that identify a series."""
+    return ['Region', 'Occupation_Category'] if by_country else ['Occupation_Category']
+
+def series_matrix(data, occupation_categories=None, countries=None, by_country=True):
+    """
+    Year x series matrix of Total for forecast_batch and backtest_batch,
+    from the merged dataset or a CountCube of it.
+    """
+    import pandas as pd
+    keys = series_keys(by_country)
+    if isinstance(data, pd.DataFrame):
+        occupation_data = prepare_occupation_data(data, countries, occupation_categories)
+        matrix = pivot_series(occupation_data, keys)
+    else:
+        # A CountCube of the merged dataset answers the pivot directly
+        matrix = data.pivot('Occupation', regions=countries, subgroups=occupation_categories,
+                            by_region=by_country)
+        matrix.columns = matrix.columns.set_names(keys)
+    if matrix.empty:
+        raise ValueError("No data found for the specified filters")
+    return matrix
+
+def polynomial_design(years, center, scale, degree):
+    """Vandermonde matrix of centered and scaled years, as fit_polynomial_batch builds it."""
+    import numpy as np
+    return np.vander((np.asarray(years, dtype=float) - center) / scale, degree + 1, increasing=True)
+
+def fit_polynomial_batch(years, values, forecast_years=5, degree=2, alpha=0.05):
+    """
+    Fit a degree-`degree` polynomial trend to every column of `values` at once.
+
+    years : 1-D array of the observed years, shared by all series
+    values : (len(years), n_series) array without missing values
+
+    Year is centered and scaled before building the design matrix, which
+    spans the same polynomials as raw years but is well conditioned. One
+    pseudo-inverse of the shared design matrix gives the coefficients of
+    every series and the leverage used for the (1 - alpha) confidence
+    interval of the fitted mean, as statsmodels' get_prediction does.
+
+    Returns (grid_years, forecast, lower, upper, r_squared), where the
+    forecast arrays are (len(grid_years), n_series).
+    """
+    import numpy as np
+    from scipy import stats
+    years = np.asarray(years, dtype=float)
+    values = np.asarray(values, dtype=float)
+    n_obs, n_params = len(years), degree + 1
+
+    grid_years = np.arange(int(years[0]), int(years[-1]) + forecast_years + 1)
+    center, scale = years.mean(), max(years.std(), 1.0)
+    design = polynomial_design(years, center, scale, degree)
+    design_future = polynomial_design(grid_years, center, scale, degree)
+
+    # One solve for all series
+    pinv = np.linalg.pinv(design)
+    coefs = pinv @ values
+    forecast = design_future @ coefs
+
+    residuals = values - design @ coefs
+    ssr = (residuals ** 2).sum(axis=0)
+    centered = values - values.mean(axis=0)
+    sst = (centered ** 2).sum(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r_squared = 1 - ssr / sst
+
+    # Leverage of each grid year is the same for every series
+    df_resid = n_obs - np.linalg.matrix_rank(design)
+    leverage = np.einsum('ij,jk,ik->i', design_future, pinv @ pinv.T, design_future)
+    if df_resid > 0:
+        sigma2 = ssr / df_resid
+        half_width = stats.t.ppf(1 - alpha / 2, df_resid) * np.sqrt(np.outer(leverage, sigma2))
+    else:
+        half_width = np.full_like(forecast, np.nan)
+
+    return grid_years, forecast, forecast - half_width, forecast + half_width, r_squared
+
+class ForecastCache:
+    """
+    Cache of per-series forecasts, in memory and optionally on disk.
+
+    Entries are keyed by series_cache_key: a hash of the series' observed
+    years and values together with the model parameters, so changing the
+    country or category filters reuses every series that is unaffected.
+    Both tiers are least-recently-used and bounded in bytes: the memory tier
+    by max_memory_bytes, the on-disk tier (one pickle per series in
+    cache_dir) by max_disk_bytes.
+    """
+
+    def __init__(self, cache_dir=None, max_memory_bytes=64 * 2**20, max_disk_bytes=256 * 2**20):
+        self.cache_dir = cache_dir
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._disk = OrderedDict()
+        self._disk_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        # Oldest files first, so eviction starts with the least recently used
+        if cache_dir is not None and os.path.isdir(cache_dir):
+            files = [entry for entry in os.scandir(cache_dir) if entry.name.endswith('.pkl')]
+            for entry in sorted(files, key=lambda entry: entry.stat().st_mtime):
+                self._disk[entry.name[:-4]] = entry.stat().st_size
+                self._disk_bytes += entry.stat().st_size
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.pkl")
+
+    def get(self, key):
+        """Return the cached record for key, or None."""
+        record = self._memory.get(key)
+        if record is not None:
+            self._memory.move_to_end(key)
+            self.hits += 1
+            return record
+
+        if key in self._disk:
+            try:
+                with open(self._path(key), 'rb') as fh:
+                    record = pickle.load(fh)
+                os.utime(self._path(key))
+            except (OSError, pickle.UnpicklingError, EOFError):
+                self._drop_file(key)
+            else:
+                self._disk.move_to_end(key)
+                self._remember(key, record)
+                self.hits += 1
+                return record
+
+        self.misses += 1
+        return None
+
+    def put(self, key, record):
+        """Store a freshly computed record under key."""
+        self._remember(key, record)
+        if self.cache_dir is None:
+            return
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = self._path(key) + '.tmp'
+        with open(tmp_path, 'wb') as fh:
+            pickle.dump(record, fh, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self._path(key))
+
+        self._disk_bytes -= self._disk.pop(key, 0)
+        self._disk[key] = os.path.getsize(self._path(key))
+        self._disk_bytes += self._disk[key]
+        while self._disk_bytes > self.max_disk_bytes and len(self._disk) > 1:
+            self._drop_file(next(iter(self._disk)))
+            self.evictions += 1
+
+    def _remember(self, key, record):
+        """Put record in the memory tier, evicting the least recently used."""
+        self._memory_bytes -= _record_bytes(self._memory.pop(key, {}))
+        self._memory[key] = record
+        self._memory_bytes += _record_bytes(record)
+        while self._memory_bytes > self.max_memory_bytes and len(self._memory) > 1:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= _record_bytes(evicted)
+            self.evictions += 1
+
+    def _drop_file(self, key):
+        self._disk_bytes -= self._disk.pop(key, 0)
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def clear(self):
+        """Empty both tiers and reset the counters."""
+        for key in list(self._disk):
+            self._drop_file(key)
+        self._memory.clear()
+        self._memory_bytes = 0
+        self.hits = self.misses = self.evictions = 0
+
+def _record_bytes(record):
+    return sum(array.nbytes for array in record.values())
+
+def series_cache_key(series, years, values, forecast_years, degree, alpha):
+    """
+    Hash of one series' identity, observed years and values, and the model
+    parameters; the key ForecastCache stores the series' forecast under.
+    """
+    import numpy as np
+    digest = hashlib.sha256()
+    digest.update(repr((FORECAST_CACHE_VERSION, series, forecast_years, degree, alpha)).encode('utf-8'))
+    digest.update(np.ascontiguousarray(years, dtype=np.int64).tobytes())
+    digest.update(np.ascontiguousarray(values, dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+def forecast_batch(data, occupation_categories=None, countries=None, forecast_years=5,
+                   degree=2, by_country=True, alpha=0.05, cache=None):
+    """
+    Forecast every occupation series in one batched least-squares solve.
+
+    A series is one (country, occupation category) pair when by_country is
+    True, otherwise one occupation category summed over the selected
+    countries. Series observed in the same years share a design matrix and
+    are fitted together.
+
+    Returns a tidy DataFrame with the series keys and Year, Date, Actual,
+    Forecast, Lower_CI, Upper_CI, Is_Forecast and R2 columns; Forecast and
+    the interval bounds are clipped at zero.
+
+    With a ForecastCache, series whose observed values and parameters were
+    seen before are taken from the cache and only the rest are fitted.
+    """
+    import pandas as pd
+    import numpy as np
+    keys = series_keys(by_country)
+    matrix = series_matrix(data, occupation_categories, countries, by_country)
+
+    observed = matrix.notna().to_numpy()
+    all_years = matrix.index.to_numpy()
+    all_values = matrix.to_numpy(dtype=float)
+    series_index = matrix.columns.to_frame(index=False)
+
+    # Reuse cached series; group the rest by the years they were observed in
+    records = [None] * len(matrix.columns)
+    cache_keys = {}
+    patterns = {}
+    for col, mask in enumerate(observed.T):
+        if not mask.any():
+            continue
+        if cache is not None:
+            cache_keys[col] = series_cache_key(
+                matrix.columns[col], all_years[mask], all_values[mask, col],
+                forecast_years, degree, alpha)
+            records[col] = cache.get(cache_keys[col])
+            if records[col] is not None:
+                continue
+        patterns.setdefault(mask.tobytes(), []).append(col)
+
+    for cols in patterns.values():
+        mask = observed[:, cols[0]]
+        years = all_years[mask]
+        values = all_values[np.ix_(mask, cols)]
+        grid_years, forecast, lower, upper, r_squared = fit_polynomial_batch(
+            years, values, forecast_years=forecast_years, degree=degree, alpha=alpha)
+
+        actual = matrix.reindex(grid_years).to_numpy(dtype=float)
+        is_forecast = grid_years > years[-1]
+        for j, col in enumerate(cols):
+            records[col] = {
+                'Year': grid_years,
+                'Actual': actual[:, col],
+                'Forecast': np.clip(forecast[:, j], 0, None),
+                'Lower_CI': np.clip(lower[:, j], 0, None),
+                'Upper_CI': np.clip(upper[:, j], 0, None),
+                'Is_Forecast': is_forecast,
+                'R2': np.full(len(grid_years), r_squared[j]),
+            }
+            if cache is not None:
+                cache.put(cache_keys[col], records[col])
+
+    cols = [col for col, record in enumerate(records) if record is not None]
+    lengths = [len(records[col]['Year']) for col in cols]
+    result = series_index.iloc[np.repeat(cols, lengths)].reset_index(drop=True)
+    for field in SERIES_FIELDS:
+        result[field] = np.concatenate([records[col][field] for col in cols])
+
+    result.insert(len(keys) + 1, 'Date', pd.to_datetime(result['Year'].astype(str), format='%Y'))
+    return result.sort_values(keys + ['Year'], kind='stable').reset_index(drop=True)
+
+def _backtest_patterns(task):
+    """
+    Rolling-origin errors of a list of (years, values) blocks, each block a
+    group of series observed in the same years.
+
+    At every origin the series are fitted on the years up to it, exactly as
+    fit_polynomial_batch would fit them, and the observed years within
+    `horizon` years after it are forecast. One pseudo-inverse per origin and
+    degree serves every series of a block. Returns, per block, a dict of
+    degree -> (origins, forecasts, absolute error sum, absolute percentage
+    error sum, number of nonzero actuals), each an array over the block's
+    series. Module-level so process pools can run it.
+    """
+    import numpy as np
+    blocks, degrees, min_train, horizon = task
+    results = []
+    for years, values in blocks:
+        n_series = values.shape[1]
+        stats = {}
+        for degree in degrees:
+            origins = forecasts = 0
+            abs_err = np.zeros(n_series)
+            pct_err = np.zeros(n_series)
+            pct_count = np.zeros(n_series)
+            for end in range(max(min_train, degree + 1), len(years)):
+                train_years = years[:end]
+                targets = (years > train_years[-1]) & (years <= train_years[-1] + horizon)
+                if not targets.any():
+                    continue
+                center, scale = train_years.mean(), max(train_years.std(), 1.0)
+                coefs = np.linalg.pinv(polynomial_design(train_years, center, scale, degree)) @ values[:end]
+                # Clipped at zero like forecast_batch
+                predicted = np.clip(polynomial_design(years[targets], center, scale, degree) @ coefs, 0, None)
+                actual = values[targets]
+                errors = np.abs(predicted - actual)
+                abs_err += errors.sum(axis=0)
+                nonzero = actual != 0
+                pct_err += np.divide(errors, np.abs(actual), out=np.zeros_like(errors), where=nonzero).sum(axis=0)
+                pct_count += nonzero.sum(axis=0)
+                origins += 1
+                forecasts += int(targets.sum())
+            stats[degree] = (origins, forecasts, abs_err, pct_err, pct_count)
+        results.append(stats)
+    return results
+
+def backtest_batch(data, occupation_categories=None, countries=None, degrees=BACKTEST_DEGREES,
+                   horizon=5, min_train=MIN_TRAIN_YEARS, by_country=True, workers=1):
+    """
+    Rolling-origin (expanding window) backtest of the polynomial trend for
+    every occupation series and every candidate degree.
+
+    Each observed year from the min_train-th on is a forecast origin: the
+    series is fitted on all years up to it and scored on the observed years
+    up to `horizon` years later. Series observed in the same years are
+    evaluated together with batched solves, as forecast_batch fits them;
+    with workers > 1 the groups are spread over a process pool.
+
+    Returns a DataFrame with the series keys and Degree, Origins, Forecasts,
+    MAE, MAPE (in percent, over nonzero actuals) and Best, True on the
+    degree with the lowest MAE of each series. Series too short to be
+    backtested at a degree have no row for it.
+    """
+    import numpy as np
+    from concurrent.futures import ProcessPoolExecutor
+    keys = series_keys(by_country)
+    matrix = series_matrix(data, occupation_categories, countries, by_country)
+    degrees = sorted(set(degrees))
+
+    observed = matrix.notna().to_numpy()
+    all_years = matrix.index.to_numpy().astype(float)
+    all_values = matrix.to_numpy(dtype=float)
+
+    patterns = {}
+    for col, mask in enumerate(observed.T):
+        if mask.sum() > min_train:
+            patterns.setdefault(mask.tobytes(), []).append(col)
+    groups = list(patterns.values())
+    blocks = [(all_years[observed[:, cols[0]]], all_values[np.ix_(observed[:, cols[0]], cols)]) for cols in groups]
+
+    # A few tasks per worker keeps the pool busy without pickling per series
+    n_tasks = max(1, min(len(blocks), workers * 4)) if workers > 1 else 1
+    tasks = [(blocks[i::n_tasks], degrees, min_train, horizon) for i in range(n_tasks)]
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            task_results = list(executor.map(_backtest_patterns, tasks))
+    else:
+        task_results = [_backtest_patterns(task) for task in tasks]
+
+    block_stats = [None] * len(blocks)
+    for i, results in enumerate(task_results):
+        block_stats[i::n_tasks] = results
+
+    series_index = matrix.columns.to_frame(index=False)
+    rows = {name: [] for name in ['col', 'Degree', 'Origins', 'Forecasts', 'MAE', 'MAPE']}
+    for cols, stats in zip(groups, block_stats):
+        for degree, (origins, forecasts, abs_err, pct_err, pct_count) in stats.items():
+            if not forecasts:
+                continue
+            rows['col'].append(np.asarray(cols))
+            rows['Degree'].append(np.full(len(cols), degree))
+            rows['Origins'].append(np.full(len(cols), origins))
+            rows['Forecasts'].append(np.full(len(cols), forecasts))
+            rows['MAE'].append(abs_err / forecasts)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                rows['MAPE'].append(np.where(pct_count > 0, 100 * pct_err / pct_count, np.nan))
+    if not rows['col']:
+        raise ValueError(f"No series has more than {min_train} observed years to backtest")
+
+    cols = np.concatenate(rows.pop('col'))
+    result = series_index.iloc[cols].reset_index(drop=True)
+    for name, parts in rows.items():
+        result[name] = np.concatenate(parts)
+    result = result.sort_values(keys + ['Degree'], kind='stable').reset_index(drop=True)
+
+    # Lowest MAE per series, the lower degree on a tie
+    best = result.groupby(keys, observed=True, sort=False)['MAE'].idxmin()
+    result['Best'] = False
+    result.loc[best.dropna().to_numpy(), 'Best'] = True
+    return result
 
 def forecast_occupations(data, occupation_categories=None, countries=None, forecast_years=5, 
-                        show_combined=True, save_path=None, degree=2):
+                        show_combined=True, save_path=None, degree=2, plot=True, cache=None,
+                        profiler=None):
     """
     Generate 5-year forecasts for selected occupation categories and countries.
     
     Parameters:
     -----------
-    data : pandas DataFrame
+    data : pandas DataFrame or CountCube
         The dataset containing immigration data with columns:
-        'Year', 'Region', 'Group', 'Subgroup', 'Total'
+        'Year', 'Region', 'Group', 'Subgroup', 'Total', or a CountCube of
+        Total built from it (Mergefn/immigration/cube.py), which skips
+        rescanning the rows on every call
     
     occupation_categories : list or None
         List of occupation categories to include. If None, all are included.
@@ -38,35 +518,39 @@ def forecast_occupations(data, occupation_categories=None, countries=None, forec
     degree : int
         Degree of polynomial regression (default: 2)
     
+    plot : bool
+        Whether to draw and show charts (default: True). With False nothing
+        is drawn and matplotlib is never imported; use render_forecasts on a
+        forecast_batch table to produce the charts later.
+    
+    cache : ForecastCache or None
+        Cache of per-series forecasts shared between calls (default: None)
+    
+    profiler : RunProfiler or None
+        Records the time of the fit and render stages
+        (Mergefn/immigration/profiling.py) (default: None)
+    
     Returns:
     --------
     dict
         Dictionary containing forecast dataframes for each occupation category
     """
-    # Filter for occupation data
-    data = data.copy()
-    occupation_data = data[data['Group'] == 'Occupation'].copy()
-    
-    # Convert year to datetime if it's not already
-    if not pd.api.types.is_datetime64_any_dtype(occupation_data['Year']):
-        occupation_data['Year'] = pd.to_datetime(occupation_data['Year'], format='%Y')
-    
-    # Filter for specified countries
-    if countries is not None:
-        occupation_data = occupation_data[occupation_data['Region'].isin(countries)]
-    
-    # Normalize occupation names
-    occupation_data['Occupation_Category'] = occupation_data['Subgroup'].str.strip()
+    from Mergefn.immigration.profiling import stage
     
-    # Filter for specified occupation categories
-    if occupation_categories is None:
-        occupation_categories = occupation_data['Occupation_Category'].unique()
-    else:
-        occupation_data = occupation_data[occupation_data['Occupation_Category'].isin(occupation_categories)]
+    # Fit every category in one batched solve
+    with stage(profiler, 'fit') as counts:
+        forecast_table = forecast_batch(
+            data, occupation_categories=occupation_categories, countries=countries,
+            forecast_years=forecast_years, degree=degree, by_country=False, cache=cache
+        )
+        counts['rows'] = len(forecast_table)
     
-    # Check if we have data
-    if occupation_data.empty:
-        raise ValueError("No data found for the specified filters")
+    # Keep the requested order, otherwise categories in order of appearance
+    # (in label order for a CountCube)
+    if occupation_categories is None and hasattr(data, 'columns'):
+        occupation_categories = prepare_occupation_data(data, countries)['Occupation_Category'].unique()
+    elif occupation_categories is None:
+        occupation_categories = forecast_table['Occupation_Category'].unique()
     
     # Create output directory if needed
     if save_path is not None:
@@ -75,219 +559,367 @@ def forecast_occupations(data, occupation_categories=None, countries=None, forec
     # Dictionary to store forecast results
     forecasts = {}
     
-    # Set up for combined plot
-    if show_combined:
-        plt.figure(figsize=(12, 8))
-        
-    # Define unique color map for consistent colors
-    num_categories = len(occupation_categories)
-    colors = plt.cm.viridis(np.linspace(0, 1, num_categories))
-    
-    # Set current year for labeling
-    current_year = datetime.now().year
+    # matplotlib is only imported when charts are drawn
+    if plot:
+        import matplotlib.pyplot as plt
+        colors = category_colors(len(occupation_categories))
     
     # Process each occupation category
     for idx, category in enumerate(occupation_categories):
         try:
-            # Filter for this category
-            category_data = occupation_data[occupation_data['Occupation_Category'] == category]
-            
-            # Group by year and sum
-            yearly_data = category_data.groupby(category_data['Year'].dt.year)['Total'].sum()
-            
-            # Create time series
-            ts = pd.Series(yearly_data.values, index=pd.date_range(
-                start=f'{yearly_data.index[0]}-01-01',
-                periods=len(yearly_data),
-                freq='AS'
-            ))
-            
-            # Prepare data for regression
-            years_array = np.array([d.year for d in ts.index]).reshape(-1, 1)
-            values = ts.values
-            
-            # Create polynomial features
-            poly = PolynomialFeatures(degree=degree)
-            X_poly = poly.fit_transform(years_array)
-            
-            # Fit polynomial regression
-            model = LinearRegression()
-            model.fit(X_poly, values)
-            
-            # Prepare forecast data
-            last_year = years_array[-1][0]
-            forecast_years_array = np.array(range(min(years_array)[0], last_year + forecast_years + 1)).reshape(-1, 1)
-            forecast_index = pd.date_range(
-                start=f'{forecast_years_array[0][0]}-01-01', 
-                periods=len(forecast_years_array), 
-                freq='AS'
-            )
-            
-            # Generate forecast
-            X_poly_future = poly.transform(forecast_years_array)
-            forecast_values = model.predict(X_poly_future)
-            
-            # Get confidence intervals
-            ols_model = sm.OLS(values, X_poly).fit()
-            predictions = ols_model.get_prediction(X_poly_future)
-            ci = predictions.conf_int(alpha=0.05)
-            
-            # Make sure no negative values
-            forecast_values = np.clip(forecast_values, 0, None)
-            lower_ci = np.clip(ci[:, 0], 0, None)
-            upper_ci = np.clip(ci[:, 1], 0, None)
-            
-            # Split into historical and forecast
-            historical_end_idx = len(years_array) - 1
-            historical_years = forecast_index[:historical_end_idx + 1]
-            future_years = forecast_index[historical_end_idx:]
-            historical_values = forecast_values[:historical_end_idx + 1]
-            future_values = forecast_values[historical_end_idx:]
+            category_forecast = forecast_table[forecast_table['Occupation_Category'] == category]
+            if category_forecast.empty:
+                raise ValueError("no data for this category")
             
             # Store results
-            forecast_df = pd.DataFrame({
-                'Date': forecast_index,
-                'Year': [d.year for d in forecast_index],
-                'Forecast': forecast_values,
-                'Lower_CI': lower_ci,
-                'Upper_CI': upper_ci,
-                'Is_Forecast': [i > historical_end_idx for i in range(len(forecast_index))]
-            })
+            forecasts[category] = category_forecast[
+                ['Date', 'Year', 'Forecast', 'Lower_CI', 'Upper_CI', 'Is_Forecast']
+            ].reset_index(drop=True)
             
-            forecasts[category] = forecast_df
+            r_squared = category_forecast['R2'].iloc[0]
             
             # Create individual plot for this category
-            plt.figure(figsize=(14, 8))
-            
-            # Plot actual data
-            plt.plot(ts.index, ts.values, 'o-', color=colors[idx], label='Historical Data', markersize=6)
-            
-            # Plot historical fit
-            plt.plot(
-                historical_years, historical_values, 
-                '--', color='lightgray', linewidth=2, 
-                label='Polynomial Fit (Historical)'
-            )
-            
-            # Plot forecast
-            plt.plot(
-                future_years, future_values, 
-                '-', color=colors[idx], linewidth=3, 
-                label='Forecast'
-            )
+            if plot:
+                with stage(profiler, 'render') as counts:
+                    fig = plt.figure(figsize=(14, 8))
+                    draw_category_forecast(fig, category_forecast, category, colors[idx])
+                    
+                    # Save if requested
+                    if save_path:
+                        fig.savefig(os.path.join(save_path, category_chart_name(category)), dpi=300, bbox_inches='tight')
+                    counts['rows'] = len(category_forecast)
+                
+                plt.show()
             
-            # Plot confidence interval
-            plt.fill_between(
-                forecast_index[historical_end_idx:], 
-                lower_ci[historical_end_idx:], 
-                upper_ci[historical_end_idx:], 
-                color=colors[idx], alpha=0.2, 
-                label='95% Confidence Interval'
-            )
-            
-            # Add forecast start line
-            plt.axvline(
-                x=historical_years[-1], 
-                color='gray', linestyle='--', 
-                alpha=0.7
-            )
-            
-            # Add annotation for forecast start
-            plt.text(
-                historical_years[-1], 
-                plt.ylim()[0] + (plt.ylim()[1] - plt.ylim()[0]) * 0.05,
-                'Forecast Start', rotation=90, verticalalignment='bottom'
-            )
-            
-            # Format plot
-            plt.title(f'5-Year Forecast for {category}', fontsize=16)
-            plt.xlabel('Year', fontsize=14)
-            plt.ylabel('Number of Immigrants', fontsize=14)
-            plt.grid(True, alpha=0.3)
-            plt.legend(loc='best')
-            
-            # Add R-squared to plot
-            plt.figtext(
-                0.15, 0.15, 
-                f"R² = {ols_model.rsquared:.3f}", 
-                bbox=dict(facecolor='white', alpha=0.8)
-            )
-            
-            plt.tight_layout()
-            
-            # Save if requested
-            if save_path:
-                safe_name = category.replace('/', '_').replace(':', '').replace(',', '').replace(' ', '_')
-                plt.savefig(f"{save_path}/{safe_name}_forecast.png", dpi=300, bbox_inches='tight')
-            
-            plt.show()
-            
-            # Add to combined plot if requested
-            if show_combined:
-                plt.plot(
-                    future_years, 
-                    future_values, 
-                    '-', color=colors[idx], 
-                    linewidth=2, label=category.split(',')[0]
-                )
-            
-            print(f"Forecast completed for: {category} | R²: {ols_model.rsquared:.3f}")
+            print(f"Forecast completed for: {category} | R²: {r_squared:.3f}")
             
         except Exception as e:
             print(f"Error processing {category}: {e}")
     
-    # Finalize combined plot
-    if show_combined and len(forecasts) > 0:
-        plt.title('Comparative 5-Year Forecast by Occupation Category', fontsize=16)
-        plt.xlabel('Year', fontsize=14)
-        plt.ylabel('Projected Number of Immigrants', fontsize=14)
-        plt.grid(True, alpha=0.3)
-        plt.axvline(x=pd.Timestamp(f"{current_year}-01-01"), color='gray', linestyle='--')
-        plt.text(
-            pd.Timestamp(f"{current_year}-01-01"), 
-            plt.ylim()[0] + (plt.ylim()[1] - plt.ylim()[0]) * 0.05,
-            'Current Year', rotation=90, verticalalignment='bottom'
-        )
-        plt.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
-        plt.tight_layout()
-        
-        if save_path:
-            plt.savefig(f"{save_path}/combined_forecast.png", dpi=300, bbox_inches='tight')
+    # Combined plot of all forecasts
+    if plot and show_combined and len(forecasts) > 0:
+        with stage(profiler, 'render'):
+            fig = plt.figure(figsize=(12, 8))
+            draw_combined_forecast(fig, forecast_table, list(forecasts), dict(zip(occupation_categories, colors)))
+            
+            if save_path:
+                fig.savefig(os.path.join(save_path, "combined_forecast.png"), dpi=300, bbox_inches='tight')
         
         plt.show()
     
     return forecasts
+
+def category_chart_name(category):
+    """File name of a category's forecast chart."""
+    safe_name = category.replace('/', '_').replace(':', '').replace(',', '').replace(' ', '_')
+    return f"{safe_name}_forecast.png"
+
+def category_colors(num_categories):
+    """One viridis color per category, as used on every chart."""
+    import numpy as np
+    import matplotlib
+    return matplotlib.colormaps['viridis'](np.linspace(0, 1, num_categories))
+
+def draw_category_forecast(fig, category_forecast, category, color):
+    """
+    Draw one category's history, polynomial fit, forecast and confidence
+    interval onto `fig` from its rows of the forecast_batch table.
+    """
+    import pandas as pd
+    ax = fig.add_subplot(1, 1, 1)
+    
+    forecast_index = pd.DatetimeIndex(category_forecast['Date'])
+    forecast_values = category_forecast['Forecast'].to_numpy()
+    lower_ci = category_forecast['Lower_CI'].to_numpy()
+    upper_ci = category_forecast['Upper_CI'].to_numpy()
+    r_squared = category_forecast['R2'].iloc[0]
+    
+    # Historical data
+    historical = category_forecast[~category_forecast['Is_Forecast'] & category_forecast['Actual'].notna()]
+    
+    # Split into historical and forecast
+    historical_end_idx = int((~category_forecast['Is_Forecast']).sum()) - 1
+    historical_years = forecast_index[:historical_end_idx + 1]
+    future_years = forecast_index[historical_end_idx:]
+    
+    # Plot actual data
+    ax.plot(pd.DatetimeIndex(historical['Date']), historical['Actual'], 'o-', color=color, label='Historical Data', markersize=6)
+    
+    # Plot historical fit
+    ax.plot(
+        historical_years, forecast_values[:historical_end_idx + 1], 
+        '--', color='lightgray', linewidth=2, 
+        label='Polynomial Fit (Historical)'
+    )
+    
+    # Plot forecast
+    ax.plot(
+        future_years, forecast_values[historical_end_idx:], 
+        '-', color=color, linewidth=3, 
+        label='Forecast'
+    )
+    
+    # Plot confidence interval
+    ax.fill_between(
+        future_years, 
+        lower_ci[historical_end_idx:], 
+        upper_ci[historical_end_idx:], 
+        color=color, alpha=0.2, 
+        label='95% Confidence Interval'
+    )
+    
+    # Add forecast start line
+    ax.axvline(
+        x=historical_years[-1], 
+        color='gray', linestyle='--', 
+        alpha=0.7
+    )
+    
+    # Add annotation for forecast start
+    ymin, ymax = ax.get_ylim()
+    ax.text(
+        historical_years[-1], 
+        ymin + (ymax - ymin) * 0.05,
+        'Forecast Start', rotation=90, verticalalignment='bottom'
+    )
+    
+    # Format plot
+    ax.set_title(f'5-Year Forecast for {category}', fontsize=16)
+    ax.set_xlabel('Year', fontsize=14)
+    ax.set_ylabel('Number of Immigrants', fontsize=14)
+    ax.grid(True, alpha=0.3)
+    ax.legend(loc='best')
+    
+    # Add R-squared to plot
+    fig.text(
+        0.15, 0.15, 
+        f"R² = {r_squared:.3f}", 
+        bbox=dict(facecolor='white', alpha=0.8)
+    )
+    
+    fig.tight_layout()
+
+def draw_combined_forecast(fig, forecast_table, categories, colors):
+    """Draw the forecast segment of every category onto one chart."""
+    import pandas as pd
+    ax = fig.add_subplot(1, 1, 1)
+    
+    for category in categories:
+        category_forecast = forecast_table[forecast_table['Occupation_Category'] == category]
+        historical_end_idx = int((~category_forecast['Is_Forecast']).sum()) - 1
+        future = category_forecast.iloc[historical_end_idx:]
+        ax.plot(
+            pd.DatetimeIndex(future['Date']), 
+            future['Forecast'], 
+            '-', color=colors[category], 
+            linewidth=2, label=category.split(',')[0]
+        )
+    
+    # Set current year for labeling
+    current_year = pd.Timestamp(f"{datetime.now().year}-01-01")
+    
+    ax.set_title('Comparative 5-Year Forecast by Occupation Category', fontsize=16)
+    ax.set_xlabel('Year', fontsize=14)
+    ax.set_ylabel('Projected Number of Immigrants', fontsize=14)
+    ax.grid(True, alpha=0.3)
+    ax.axvline(x=current_year, color='gray', linestyle='--')
+    ymin, ymax = ax.get_ylim()
+    ax.text(
+        current_year, 
+        ymin + (ymax - ymin) * 0.05,
+        'Current Year', rotation=90, verticalalignment='bottom'
+    )
+    ax.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
+    fig.tight_layout()
+
+def _render_chart(task):
+    """
+    Worker entry point: draw one chart with the Agg canvas and write it.
+    Figures are created without pyplot, so nothing is kept alive after the
+    chart is saved, however many charts a worker renders.
+    """
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    
+    kind, path, dpi, args = task
+    fig = Figure(figsize=(14, 8) if kind == 'category' else (12, 8))
+    FigureCanvasAgg(fig)
+    try:
+        if kind == 'category':
+            draw_category_forecast(fig, *args)
+        else:
+            draw_combined_forecast(fig, *args)
+        fig.savefig(path, dpi=dpi, bbox_inches='tight')
+    finally:
+        fig.clear()
+    return path
+
+def render_forecasts(forecast_table, save_path, occupation_categories=None, show_combined=True,
+                     workers=1, dpi=300, profiler=None):
+    """
+    Render the charts of forecast_occupations from a forecast_batch table,
+    after the fact and without a display.
+    
+    One PNG per occupation category plus combined_forecast.png are written
+    to save_path, on a pool of `workers` processes (in this process when
+    workers <= 1). Returns the paths written. A RunProfiler, when given,
+    records the whole rendering as the render stage.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    from Mergefn.immigration.profiling import stage
+    
+    if occupation_categories is None:
+        occupation_categories = list(forecast_table['Occupation_Category'].unique())
+    os.makedirs(save_path, exist_ok=True)
+    colors = category_colors(len(occupation_categories))
+    
+    tasks = []
+    for idx, category in enumerate(occupation_categories):
+        category_forecast = forecast_table[forecast_table['Occupation_Category'] == category]
+        if not category_forecast.empty:
+            tasks.append(('category', os.path.join(save_path, category_chart_name(category)), dpi,
+                          (category_forecast, category, colors[idx])))
+    
+    if show_combined and tasks:
+        drawn = [task[3][1] for task in tasks]
+        combined = forecast_table[forecast_table['Occupation_Category'].isin(drawn)]
+        tasks.append(('combined', os.path.join(save_path, "combined_forecast.png"), dpi,
+                      (combined, drawn, dict(zip(occupation_categories, colors)))))
+    
+    with stage(profiler, 'render') as counts:
+        counts['rows'] = len(tasks)
+        if workers <= 1:
+            return [_render_chart(task) for task in tasks]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(_render_chart, tasks))
+
 if __name__ == "__main__":
     import argparse
     
     parser = argparse.ArgumentParser(description='Generate occupation forecasts')
-    parser.add_argument('--data', required=True, help='Path to the data file (.csv or .xlsx)')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--data', help='Path to the data file (.parquet, .feather, .csv or .xlsx) or partitioned directory')
+    source.add_argument('--db', help='Database written by the merge (.sqlite/.db or .duckdb); only the rows of the '
+                                     'requested countries and occupations are read')
     parser.add_argument('--occupations', nargs='+', help='Occupation categories to forecast (if not specified, all will be used)')
     parser.add_argument('--countries', nargs='+', help='Countries to filter (if not specified, all will be used)')
     parser.add_argument('--years', type=int, default=5, help='Number of years to forecast (default: 5)')
     parser.add_argument('--output', help='Directory to save plots')
+    parser.add_argument('--headless', action='store_true',
+                        help='Compute forecasts without a display; charts are only rendered (with Agg) when --output is given')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Processes used to render charts in --headless mode or to run --backtest (default: 1)')
+    parser.add_argument('--backtest', metavar='CSV',
+                        help='Instead of forecasting, backtest every country x occupation series on horizons up to '
+                             '--years ahead and write MAE/MAPE per series and degree to CSV')
+    parser.add_argument('--degrees', type=int, nargs='+', default=list(BACKTEST_DEGREES),
+                        help=f'Polynomial degrees compared by --backtest (default: {" ".join(map(str, BACKTEST_DEGREES))})')
+    parser.add_argument('--min-train', type=int, default=MIN_TRAIN_YEARS,
+                        help=f'Observed years of the first --backtest training window (default: {MIN_TRAIN_YEARS})')
+    parser.add_argument('--cache-dir', help='Directory of cached per-series forecasts reused across runs')
+    parser.add_argument('--report', help='Write a run report (time, CPU, peak memory and rows of the load, fit and render stages) as .json or .csv')
+    parser.add_argument('--profiler', choices=['cprofile', 'pyinstrument'],
+                        help='Also profile the run with cProfile (.prof) or pyinstrument (.html), saved next to the report')
     
     args = parser.parse_args()
     
-    # Load data
-    if args.data.endswith('.csv'):
-        df = pd.read_csv(args.data)
-    elif args.data.endswith(('.xlsx', '.xls')):
-        df = pd.read_excel(args.data)
-    else:
-        raise ValueError("Data file must be .csv or .xlsx/.xls")
-    
-    # Run forecast
-    forecasts = forecast_occupations(
-        data=df,
-        occupation_categories=args.occupations,
-        countries=args.countries,
-        forecast_years=args.years,
-        show_combined=True,
-        save_path=args.output
-    )
+    # Validate the arguments before any heavy module is imported
+    if args.data and not os.path.exists(args.data):
+        parser.error(f"data file not found: {args.data}")
+    if args.data and not (args.data.endswith(DATA_EXTENSIONS) or os.path.isdir(args.data)):
+        parser.error("data file must be .parquet, .feather/.arrow, .csv, .xlsx/.xls or a partitioned directory")
+    if args.db and not os.path.isfile(args.db):
+        parser.error(f"database not found: {args.db}")
+    if args.db and not args.db.endswith(DB_EXTENSIONS):
+        parser.error("database must be .sqlite/.db or .duckdb")
+    if args.years < 1:
+        parser.error("--years must be at least 1")
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if min(args.degrees) < 0:
+        parser.error("--degrees must not be negative")
+    if args.min_train < 2:
+        parser.error("--min-train must be at least 2")
+    if args.profiler and not args.report:
+        parser.error("--profiler needs --report to know where to save the profile")
+    
+    # Loaded with the data modules, after the arguments are validated
+    from Mergefn.immigration.profiling import RunProfiler, run_profiler, stage
     
-    print(f"Forecasting complete. Generated forecasts for {len(forecasts)} occupation categories.")
+    profiler = RunProfiler() if args.report else None
+    profile_path = None
+    if args.profiler:
+        profile_path = os.path.splitext(args.report)[0] + ('.prof' if args.profiler == 'cprofile' else '.html')
+    
+    with run_profiler(args.profiler, profile_path):
+        # Load data
+        with stage(profiler, 'load') as counts:
+            if args.db:
+                df = query_data(args.db, countries=args.countries, occupation_categories=args.occupations)
+            else:
+                # Only the occupation rows asked for are read
+                df = load_data(args.data, filters={'Group': 'Occupation', 'Region': args.countries,
+                                                   'Subgroup': args.occupations})
+            counts['rows'] = len(df)
+        cache = ForecastCache(args.cache_dir) if args.cache_dir else None
+        
+        if args.backtest:
+            with stage(profiler, 'backtest') as counts:
+                backtest = backtest_batch(
+                    df,
+                    occupation_categories=args.occupations,
+                    countries=args.countries,
+                    degrees=args.degrees,
+                    horizon=args.years,
+                    min_train=args.min_train,
+                    workers=args.workers
+                )
+                counts['rows'] = len(backtest)
+            backtest.to_csv(args.backtest, index=False)
+            summary = backtest.groupby('Degree').agg(
+                Series=('MAE', 'size'), Median_MAE=('MAE', 'median'), Median_MAPE=('MAPE', 'median'),
+                Best=('Best', 'sum'))
+            print(summary.to_string(float_format='{:.2f}'.format))
+            print(f"Backtest of {backtest.drop_duplicates(['Region', 'Occupation_Category']).shape[0]} series "
+                  f"saved to {args.backtest}")
+        elif args.headless:
+            with stage(profiler, 'fit') as counts:
+                forecast_table = forecast_batch(
+                    df,
+                    occupation_categories=args.occupations,
+                    countries=args.countries,
+                    forecast_years=args.years,
+                    by_country=False,
+                    cache=cache
+                )
+                counts['rows'] = len(forecast_table)
+            if args.output:
+                written = render_forecasts(forecast_table, args.output, occupation_categories=args.occupations,
+                                           workers=args.workers, profiler=profiler)
+                print(f"Wrote {len(written)} charts to {args.output}")
+            print(f"Forecasting complete. Generated forecasts for "
+                  f"{forecast_table['Occupation_Category'].nunique()} occupation categories.")
+        else:
+            # Run forecast
+            forecasts = forecast_occupations(
+                data=df,
+                occupation_categories=args.occupations,
+                countries=args.countries,
+                forecast_years=args.years,
+                show_combined=True,
+                save_path=args.output,
+                cache=cache,
+                profiler=profiler
+            )
+            
+            print(f"Forecasting complete. Generated forecasts for {len(forecasts)} occupation categories.")
+    
+    if cache is not None:
+        print(f"Forecast cache: {cache.hits} hits, {cache.misses} misses, {cache.evictions} evictions")
+    if profiler is not None:
+        profiler.write(args.report)
+        print(profiler.summary())
+        print(f"Run report saved to {args.report}")
 
 # Example usage:
 """
@@ -313,4 +945,34 @@ forecasts = forecast_occupations(
 # Access forecast data for a specific category
 management_forecast = forecasts['Management, professional, and related occupations']
 print(management_forecast.tail())
+
+# Forecast every (country, occupation) series at once as one tidy table
+all_series = forecast_batch(df_common, occupation_categories=occupation_categories)
+print(all_series[all_series['Region'] == 'India'].tail())
+
+# Score degrees 1-3 on expanding windows for every (country, occupation) series
+scores = backtest_batch(df_common, occupation_categories=occupation_categories, workers=4)
+print(scores[scores['Best']].groupby('Degree').size())
+
+# Compute without drawing, then render the charts off-screen on 4 processes
+forecasts = forecast_occupations(df_common, occupation_categories=occupation_categories, plot=False)
+combined_table = forecast_batch(df_common, occupation_categories=occupation_categories, by_country=False)
+render_forecasts(combined_table, 'forecast_plots', workers=4)
+
+# Share fitted series between calls; only changed or new series are refitted
+cache = ForecastCache('.forecast_cache')
+india = forecast_batch(df_common, countries=['India'], cache=cache)
+india_china = forecast_batch(df_common, countries=['India', 'China'], cache=cache)  # India is a cache hit
+print(cache.hits, cache.misses)
+
+# Query an indexed database instead of loading the whole file
+# (python -m immigration.database --data allconfinal.xlsx --db merged.sqlite)
+india = query_data('merged.sqlite', countries=['India'],
+                   occupation_categories=['Management, professional, and related occupations'])
+forecasts = forecast_occupations(india[india['Year'] >= 2010], plot=False)
+
+# Aggregate once into a cube; every later query is array indexing instead of a rescan
+from Mergefn.immigration.cube import CountCube
+cube = CountCube.from_frame(df_common)
+forecasts = forecast_occupations(cube, occupation_categories=occupation_categories, plot=False)
 """
\ No newline at end of file
@@ -1 +1,3 @@
-from .merger import load_and_clean_data
\ No newline at end of file
+from .merger import load_and_clean_data
+from .ingest import ingest_files
+from .engine import load, run
@@ -0,0 +1,6 @@
+# immigration/__main__.py
+
+from .engine import main
+
+if __name__ == "__main__":
+    main()
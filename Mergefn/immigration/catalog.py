@@ -0,0 +1,262 @@
+# immigration/catalog.py
+
+import argparse
+import hashlib
+import os
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from .regions import ALIASES_PATH, ROLLUP_REGIONS, RegionNormalizer
+from .sources import find_sources, read_source_bytes, source_key, source_name, source_stat
+from .workbook import open_sheet, read_header
+
+# Bump when the table layout changes so old catalogs are rebuilt
+CATALOG_VERSION = 1
+
+# What a merge does with a cataloged workbook
+KEPT = "kept"
+DUPLICATE = "duplicate"
+EXCLUDED = "excluded"
+FAILED = "failed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS files (
+    source_key TEXT PRIMARY KEY,
+    source TEXT NOT NULL,
+    name TEXT NOT NULL,
+    position INTEGER,
+    size INTEGER,
+    mtime REAL,
+    sha256 TEXT,
+    year INTEGER,
+    raw_region TEXT,
+    region TEXT,
+    nrows INTEGER,
+    ncols INTEGER,
+    status TEXT,
+    duplicate_of TEXT,
+    same_content INTEGER,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS files_year_region ON files (year, region);
+CREATE INDEX IF NOT EXISTS files_sha256 ON files (sha256);
+CREATE INDEX IF NOT EXISTS files_status ON files (status, position);
+"""
+
+
+def scan_header(source: str) -> dict:
+    """
+    Worker entry point: the header cells, sheet size and SHA-256 of one
+    workbook, without building its table. Never raises; a workbook that
+    cannot be read comes back with its error.
+    """
+    record = {"source": source, "sha256": None, "year": None, "raw_region": None,
+              "nrows": None, "ncols": None, "error": None}
+    try:
+        contents = read_source_bytes(source)
+        record["sha256"] = hashlib.sha256(contents).hexdigest()
+        sheet = open_sheet(source, contents)
+        year, region = read_header(sheet)
+        record.update(year=int(year) if year else None, raw_region=region,
+                      nrows=sheet.nrows, ncols=sheet.ncols)
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+    return record
+
+
+def _scan_headers(sources, workers: int, executor=None):
+    """scan_header of every source in order, serially or on a process pool."""
+    chunksize = max(1, len(sources) // (max(workers or 1, 1) * 4))
+    if executor is not None:
+        return list(executor.map(scan_header, sources, chunksize=chunksize))
+    if workers is None or workers <= 1 or len(sources) <= 1:
+        return [scan_header(source) for source in sources]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(scan_header, sources, chunksize=chunksize))
+
+
+class Catalog:
+    """
+    SQLite catalog of the COB workbooks of a corpus: per file its fiscal
+    year, raw and standardized region, sheet dimensions, size, mtime and
+    content hash, and what a merge does with it.
+
+    refresh() reads only the header cells of new or changed workbooks and
+    classifies every file the way iter_ingested does, in input order:
+    continent and total rollups are excluded, and a file whose year and
+    region were already kept is a duplicate. A merge then parses only the
+    kept files (plan()), and coverage questions are SQL queries against the
+    indexed table.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.scanned = 0
+        self.reused = 0
+
+        version = None
+        if self.connection.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'meta'").fetchone():
+            row = self.connection.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+            version = row and row[0]
+        if version != str(CATALOG_VERSION):
+            self.connection.executescript("DROP TABLE IF EXISTS files; DROP TABLE IF EXISTS meta;")
+        self.connection.executescript(SCHEMA)
+        self.connection.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (str(CATALOG_VERSION),))
+        self.connection.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def refresh(self, sources, workers: int = 1, normalizer=None, executor=None) -> list:
+        """
+        Bring the catalog up to date with `sources` (see find_sources) and
+        return the kept ones in input order.
+
+        A workbook whose size and mtime are unchanged keeps its row; the
+        others, and those that failed before, are scanned on `workers`
+        processes (or the caller's executor). Sources no longer listed are
+        forgotten. Regions are standardized with normalizer (default: the
+        alias file) on every refresh, so alias file edits apply at once.
+        """
+        if normalizer is None:
+            normalizer = RegionNormalizer()
+        keys = [source_key(source) for source in sources]
+        known = {row[0]: row[1:] for row in self.connection.execute(
+            "SELECT source_key, size, mtime, status FROM files")}
+
+        stats, to_scan = [], []
+        for source, key in zip(sources, keys):
+            size, mtime = source_stat(source)
+            stats.append((size, mtime))
+            entry = known.get(key)
+            if entry is None or entry[0] != size or entry[1] != mtime or entry[2] == FAILED:
+                to_scan.append(source)
+        self.scanned, self.reused = len(to_scan), len(sources) - len(to_scan)
+
+        # Rows of re-scanned files are replaced; positions are refreshed below
+        scanned = {record["source"]: record for record in _scan_headers(to_scan, workers, executor)}
+        stat_of = dict(zip(sources, stats))
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO files (source_key, source, name, size, mtime, sha256, year, raw_region, "
+            "nrows, ncols, error) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(source_key(source), source, source_name(source), *stat_of[source], record["sha256"],
+              record["year"], record["raw_region"], record["nrows"], record["ncols"], record["error"])
+             for source, record in scanned.items()])
+
+        self.connection.execute(
+            "CREATE TEMP TABLE listed (source_key TEXT PRIMARY KEY, source TEXT, name TEXT, position INTEGER)")
+        try:
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO listed VALUES (?, ?, ?, ?)",
+                [(key, source, source_name(source), i) for i, (key, source) in enumerate(zip(keys, sources))])
+            self.connection.execute("DELETE FROM files WHERE source_key NOT IN (SELECT source_key FROM listed)")
+            self.connection.execute(
+                "UPDATE files SET (source, name, position) = "
+                "(SELECT source, name, position FROM listed WHERE listed.source_key = files.source_key)")
+        finally:
+            self.connection.execute("DROP TABLE listed")
+
+        kept = self._classify(normalizer)
+        self.connection.commit()
+        return kept
+
+    def _classify(self, normalizer) -> list:
+        """Set region and status of every row in position order; return the kept sources."""
+        rows = self.connection.execute(
+            "SELECT source_key, source, name, sha256, year, raw_region, error FROM files ORDER BY position").fetchall()
+        kept, first = [], {}
+        updates = []
+        for key, source, name, sha256, year, raw_region, error in rows:
+            region = duplicate_of = same_content = None
+            if error is not None:
+                status = FAILED
+            else:
+                region = normalizer.resolve(raw_region)
+                if region in ROLLUP_REGIONS:
+                    status = EXCLUDED
+                elif (year, region) in first:
+                    status = DUPLICATE
+                    duplicate_of, kept_sha256 = first[year, region]
+                    same_content = int(sha256 == kept_sha256)
+                else:
+                    status = KEPT
+                    first[year, region] = (name, sha256)
+                    kept.append(source)
+            updates.append((region, status, duplicate_of, same_content, key))
+        self.connection.executemany(
+            "UPDATE files SET region = ?, status = ?, duplicate_of = ?, same_content = ? WHERE source_key = ?",
+            updates)
+        return kept
+
+    def plan(self) -> list:
+        """The kept sources of the last refresh, in input order."""
+        return [row[0] for row in self.connection.execute(
+            "SELECT source FROM files WHERE status = ? ORDER BY position", (KEPT,))]
+
+    def frame(self, status: str = None) -> pd.DataFrame:
+        """The catalog rows, optionally of one status, in input order."""
+        query = "SELECT * FROM files"
+        params = ()
+        if status is not None:
+            query += " WHERE status = ?"
+            params = (status,)
+        return pd.read_sql_query(query + " ORDER BY position", self.connection, params=params)
+
+    def pairs(self) -> pd.DataFrame:
+        """(Year, Region) pairs of the kept files, with the file each comes from."""
+        return pd.read_sql_query(
+            "SELECT year AS Year, region AS Region, name AS File FROM files WHERE status = ? ORDER BY year, region",
+            self.connection, params=(KEPT,))
+
+    def counts(self) -> dict:
+        """Number of files per status."""
+        return dict(self.connection.execute("SELECT status, COUNT(*) FROM files GROUP BY status"))
+
+
+def build_catalog(inputs, catalog_path: str, workers: int = 1, aliases: str = ALIASES_PATH) -> dict:
+    """
+    Catalog the workbooks found in `inputs` (folders, .xls files or .zip
+    archives) into catalog_path. Returns the file count per status.
+    """
+    sources = find_sources(inputs)
+    with Catalog(catalog_path) as catalog:
+        catalog.refresh(sources, workers=workers, normalizer=RegionNormalizer(aliases))
+        counts = catalog.counts()
+        counts["scanned"], counts["reused"] = catalog.scanned, catalog.reused
+    return counts
+
+
+def main(argv=None) -> dict:
+    """Build or refresh a catalog from the command line (python -m immigration.catalog)."""
+    parser = argparse.ArgumentParser(description='Catalog the year and region headers of COB workbooks into SQLite')
+    parser.add_argument('--input', nargs='+', required=True, help='Folders, .xls workbooks or .zip archives to catalog')
+    parser.add_argument('--catalog', required=True, help='SQLite catalog to create or refresh')
+    parser.add_argument('--workers', type=int, default=1, help='Processes reading headers (default: 1, serial)')
+    parser.add_argument('--aliases', default=ALIASES_PATH, help='JSON file mapping region name variants to their standard name (default: immigration/region_aliases.json)')
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+
+    counts = build_catalog(args.input, args.catalog, workers=args.workers, aliases=args.aliases)
+    print(f"Cataloged {sum(counts.get(status, 0) for status in (KEPT, DUPLICATE, EXCLUDED, FAILED))} workbooks "
+          f"into {args.catalog} ({counts['scanned']} scanned, {counts['reused']} unchanged)")
+    for status in (KEPT, DUPLICATE, EXCLUDED, FAILED):
+        print(f"  {status:<10}{counts.get(status, 0):>8}")
+    return counts
+
+
+if __name__ == "__main__":
+    main()
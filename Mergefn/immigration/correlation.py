@@ -0,0 +1,285 @@
+# immigration/correlation.py
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .cube import CountCube
+
+AGE = "Age"
+OCCUPATION = "Occupation"
+ADMISSION = "Broad Class of Admission"
+
+# Group pairs correlated by default, as in the EDA notebook's heatmaps
+PAIRS = [(AGE, OCCUPATION), (AGE, ADMISSION), (OCCUPATION, ADMISSION)]
+
+# Age brackets in display order; the published labels vary ("18 to 24
+# years", "18-24 years") and are folded into these by age_group()
+AGE_GROUPS = ["Under 18", "18-24", "25-34", "35-44", "45-54", "55-64", "65 and over"]
+
+# Region of the panels pooling every country's (country, year) rows
+ALL_REGIONS = "All"
+
+# Windows with fewer (country, year) rows get no panel
+MIN_ROWS = 3
+
+RESULT_COLUMNS = ["Region", "Start", "End", "Rows", "Group1", "Category1", "Group2", "Category2", "Correlation"]
+
+
+def age_group(label: str):
+    """Age bracket of an Age subgroup label (None for Unknown), as the notebook's standardize_age."""
+    age = str(label)
+    if "Under 18" in age:
+        return "Under 18"
+    for low, high in (("18", "24"), ("25", "34"), ("35", "44"), ("45", "54"), ("55", "64")):
+        if low in age and high in age:
+            return f"{low}-{high}"
+    if "65" in age:
+        return "65 and over"
+    return None
+
+
+def group_matrix(cube: CountCube, group: str, regions=None, years=None):
+    """
+    (Region, Year, Category) counts of one group and the (Region, Year)
+    mask of the rows with data. Missing categories of a row with data count
+    as zero, like the notebook's unstack().fillna(0). Age subgroups are
+    summed into AGE_GROUPS; other categories are the group's subgroups.
+    Returns (matrix, present, categories).
+    """
+    values, (_, _, groups, subgroups) = cube.select(years=years, regions=regions, groups=[group])
+    if not groups:
+        # A group absent from the data has no rows
+        values = np.full(values.shape[:2] + (0,), np.nan)
+        subgroups = []
+    else:
+        values = values[:, :, 0, :]
+    values = values.transpose(1, 0, 2)
+    has_data = ~np.isnan(values)
+    # The subgroup axis spans every group; keep this group's subgroups
+    keep = has_data.any(axis=(0, 1))
+    values, has_data = values[:, :, keep], has_data[:, :, keep]
+    subgroups = [label for label, kept in zip(subgroups, keep) if kept]
+    if group == AGE:
+        brackets = [age_group(label) for label in subgroups]
+        categories = [bracket for bracket in AGE_GROUPS if bracket in brackets]
+    else:
+        brackets = categories = list(subgroups)
+    # One-hot subgroup -> category matrix; unmatched subgroups are dropped
+    position = {category: i for i, category in enumerate(categories)}
+    onehot = np.zeros((len(subgroups), len(categories)))
+    for i, bracket in enumerate(brackets):
+        if bracket in position:
+            onehot[i, position[bracket]] = 1.0
+    matrix = np.where(has_data, values, 0.0) @ onehot
+    present = (has_data.astype(float) @ onehot).any(axis=2)
+    return matrix, present, categories
+
+
+def year_windows(years, window: int = None, step: int = 1) -> list:
+    """(start, end) of every window of `window` calendar years, or the whole span when window is None."""
+    first, last = min(years), max(years)
+    if window is None or window >= last - first + 1:
+        return [(first, last)]
+    return [(start, start + window - 1) for start in range(first, last - window + 2, step)]
+
+
+def _window_moments(task):
+    """
+    Sums over the rows of every window of a block of regions: the row
+    count, the sums and sums of squares of both groups' categories and the
+    sums of their cross products, each with leading (region, window) axes.
+    Module-level so process pools can run it.
+    """
+    a, b, rows, windows = task
+    # (region, window, year) weight of every row
+    weights = rows[:, None, :] * windows[None, :, :]
+    n = weights.sum(axis=2)
+    sum_a, sum_b = weights @ a, weights @ b
+    sum_aa, sum_bb = weights @ (a * a), weights @ (b * b)
+    cross = (a[:, :, :, None] * b[:, :, None, :]).reshape(a.shape[0], a.shape[1], -1)
+    sum_ab = (weights @ cross).reshape(n.shape + (a.shape[2], b.shape[2]))
+    return n, sum_a, sum_b, sum_aa, sum_bb, sum_ab
+
+
+def _correlations(n, sum_a, sum_b, sum_aa, sum_bb, sum_ab) -> np.ndarray:
+    """Pearson correlations from window moments; NaN for a category constant over the window."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        var_a = sum_aa - sum_a ** 2 / n[..., None]
+        var_b = sum_bb - sum_b ** 2 / n[..., None]
+        cov = sum_ab - sum_a[..., :, None] * sum_b[..., None, :] / n[..., None, None]
+        # Rounding leaves a tiny variance on constant categories
+        var_a = np.where(var_a > 1e-10 * np.maximum(sum_aa, 1.0), var_a, np.nan)
+        var_b = np.where(var_b > 1e-10 * np.maximum(sum_bb, 1.0), var_b, np.nan)
+        return np.clip(cov / np.sqrt(var_a[..., :, None] * var_b[..., None, :]), -1.0, 1.0)
+
+
+def correlation_panels(data, pairs=PAIRS, regions=None, years=None, window: int = None, step: int = 1,
+                       min_rows: int = MIN_ROWS, pooled: bool = True, workers: int = 1) -> pd.DataFrame:
+    """
+    Correlation matrices between the categories of each pair of groups, for
+    every country and window of years, in one batch.
+
+    Each group is pivoted into a (country, year) x category matrix; the rows
+    of a pair are the (country, year) pairs where both groups have data, as
+    in the notebook's inner merge. A panel correlates these rows within a
+    window of `window` years (every `step` years; the whole span when None)
+    for one country, and, when pooled, for every country at once under
+    Region ALL_REGIONS, which over the whole span is the notebook's heatmap.
+
+    Moments of all countries, windows and category pairs are summed with a
+    few matrix products; workers > 1 splits the countries over processes.
+    Data is the merged dataset or a CountCube of its Total. Returns one row
+    per panel cell (RESULT_COLUMNS), panels with fewer than min_rows rows
+    left out.
+    """
+    cube = data if isinstance(data, CountCube) else CountCube.from_frame(data)
+    groups = list(dict.fromkeys(group for pair in pairs for group in pair))
+    matrices = {group: group_matrix(cube, group, regions, years) for group in groups}
+    _, (year_labels, region_labels, _, _) = cube.select(years=years, regions=regions, groups=[])
+    if not year_labels or not region_labels:
+        return pd.DataFrame(columns=RESULT_COLUMNS)
+    windows = year_windows(year_labels, window, step)
+    year_array = np.asarray(year_labels)
+    window_mask = np.array([(year_array >= start) & (year_array <= end) for start, end in windows], dtype=float)
+
+    n_blocks = max(1, min(workers, len(region_labels))) if workers and workers > 1 else 1
+    blocks = np.array_split(np.arange(len(region_labels)), n_blocks)
+    tasks = []
+    for group1, group2 in pairs:
+        a, present_a, _ = matrices[group1]
+        b, present_b, _ = matrices[group2]
+        rows = (present_a & present_b).astype(float)
+        # Shifting every row by the same means keeps the correlations and
+        # the pooled sums, and keeps the sums of squares small
+        shift_a = a[rows > 0].mean(axis=0) if rows.any() else 0.0
+        shift_b = b[rows > 0].mean(axis=0) if rows.any() else 0.0
+        a = (a - shift_a) * rows[:, :, None]
+        b = (b - shift_b) * rows[:, :, None]
+        tasks.extend((a[block], b[block], rows[block], window_mask) for block in blocks)
+
+    if n_blocks > 1:
+        with ProcessPoolExecutor(max_workers=n_blocks) as executor:
+            results = list(executor.map(_window_moments, tasks))
+    else:
+        results = [_window_moments(task) for task in tasks]
+
+    # Labels are stored as category codes over vocabularies shared by every pair
+    region_vocabulary = list(region_labels) + ([ALL_REGIONS] if pooled else [])
+    category_vocabulary = list(dict.fromkeys(c for group in groups for c in matrices[group][2]))
+    category_code = {category: i for i, category in enumerate(category_vocabulary)}
+    starts = np.array([start for start, _ in windows], dtype=np.int16)
+    ends = np.array([end for _, end in windows], dtype=np.int16)
+
+    columns = {col: [] for col in RESULT_COLUMNS}
+    for p, (group1, group2) in enumerate(pairs):
+        moments = [np.concatenate(parts) for parts in zip(*results[p * n_blocks:(p + 1) * n_blocks])]
+        if pooled:
+            moments = [np.concatenate([m, m.sum(axis=0, keepdims=True)]) for m in moments]
+        n = moments[0]
+        corr = _correlations(*moments)
+
+        codes1 = np.array([category_code[c] for c in matrices[group1][2]], dtype=np.int64)
+        codes2 = np.array([category_code[c] for c in matrices[group2][2]], dtype=np.int64)
+        region_pos, window_pos = np.nonzero(n >= min_rows)
+        cells = len(codes1) * len(codes2)
+        columns["Region"].append(np.repeat(region_pos, cells))
+        columns["Start"].append(np.repeat(starts[window_pos], cells))
+        columns["End"].append(np.repeat(ends[window_pos], cells))
+        columns["Rows"].append(np.repeat(n[region_pos, window_pos], cells).astype(np.int32))
+        columns["Group1"].append(np.full(len(region_pos) * cells, groups.index(group1)))
+        columns["Category1"].append(np.tile(np.repeat(codes1, len(codes2)), len(region_pos)))
+        columns["Group2"].append(np.full(len(region_pos) * cells, groups.index(group2)))
+        columns["Category2"].append(np.tile(codes2, len(codes1) * len(region_pos)))
+        columns["Correlation"].append(corr[region_pos, window_pos].reshape(-1).astype(np.float32))
+
+    columns = {col: np.concatenate(parts) for col, parts in columns.items()}
+    vocabularies = {"Region": region_vocabulary, "Group1": groups, "Group2": groups,
+                    "Category1": category_vocabulary, "Category2": category_vocabulary}
+    for col, vocabulary in vocabularies.items():
+        columns[col] = pd.Categorical.from_codes(columns[col], categories=vocabulary)
+    return pd.DataFrame(columns)
+
+
+def correlation_matrix(panels: pd.DataFrame, group1: str, group2: str, region: str = ALL_REGIONS,
+                       start: int = None, end: int = None) -> pd.DataFrame:
+    """
+    One panel of correlation_panels (or read_correlations) as a Category1 x
+    Category2 table, ready for a heatmap. Start and end default to the
+    widest window of the region.
+    """
+    rows = panels[(panels["Region"] == region) & (panels["Group1"] == group1) & (panels["Group2"] == group2)]
+    if start is None or end is None:
+        widest = (rows["End"] - rows["Start"]).max()
+        rows = rows[rows["End"] - rows["Start"] == widest]
+        start, end = rows["Start"].min(), rows["End"].min()
+    rows = rows[(rows["Start"] == start) & (rows["End"] == end)]
+    table = rows.pivot(index="Category1", columns="Category2", values="Correlation")
+    order1 = [c for c in rows["Category1"].drop_duplicates()]
+    order2 = [c for c in rows["Category2"].drop_duplicates()]
+    return table.loc[order1, order2].rename_axis(index=group1, columns=group2)
+
+
+def write_correlations(panels: pd.DataFrame, path: str) -> str:
+    """Write panels to a Parquet file: labels dictionary-encoded, years int16, correlations float32."""
+    panels.to_parquet(path, index=False)
+    return path
+
+
+def read_correlations(path: str, regions=None, groups=None) -> pd.DataFrame:
+    """
+    Panels written by write_correlations, optionally only those of some
+    regions and of pairs involving some groups (read as row filters).
+    """
+    filters = []
+    if regions is not None:
+        filters.append(("Region", "in", [regions] if isinstance(regions, str) else list(regions)))
+    if groups is not None:
+        groups = [groups] if isinstance(groups, str) else list(groups)
+        filters.append(("Group1", "in", groups))
+    panels = pd.read_parquet(path, filters=filters or None)
+    if groups is not None:
+        panels = panels[panels["Group2"].isin(groups)]
+    return panels.reset_index(drop=True)
+
+
+def main(argv=None) -> pd.DataFrame:
+    """Compute every correlation panel of a merged dataset (python -m immigration.correlation)."""
+    from .coverage import Coverage
+    from .storage import read_dataset
+
+    parser = argparse.ArgumentParser(description='Correlate age, occupation and admission class for every country and window of years')
+    parser.add_argument('--data', required=True, help='Merged dataset: .parquet, .feather/.arrow, .xlsx, .csv, database or partitioned directory')
+    parser.add_argument('--output', required=True, help='Parquet file to write the correlation panels to')
+    parser.add_argument('--window', type=int, help='Years per window (default: the whole span)')
+    parser.add_argument('--step', type=int, default=1, help='Years between window starts (default: 1)')
+    parser.add_argument('--since', type=int, help='Only use years after this one (the notebook uses 2005)')
+    parser.add_argument('--max-missing', type=int, help='Only use countries missing at most this many years, like the notebook\'s common countries')
+    parser.add_argument('--min-rows', type=int, default=MIN_ROWS, help=f'Fewest (country, year) rows of a panel (default: {MIN_ROWS})')
+    parser.add_argument('--workers', type=int, default=1, help='Processes computing the panels (default: 1, serial)')
+    args = parser.parse_args(argv)
+    if args.window is not None and args.window < 2:
+        parser.error("--window must be at least 2 years")
+    if args.step < 1:
+        parser.error("--step must be at least 1 year")
+
+    filters = {"Group": sorted({group for pair in PAIRS for group in pair})}
+    if args.since is not None:
+        filters["Year"] = range(args.since + 1, 10_000)
+    df = read_dataset(args.data, columns=["Year", "Region", "Group", "Subgroup", "Total"], filters=filters)
+    regions = None
+    if args.max_missing is not None:
+        regions = Coverage.from_frame(df).common_countries(args.max_missing)
+
+    panels = correlation_panels(df, regions=regions, window=args.window, step=args.step,
+                                min_rows=args.min_rows, workers=args.workers)
+    write_correlations(panels, args.output)
+    n_panels = len(panels.groupby(["Region", "Start", "End", "Group1", "Group2"], observed=True))
+    print(f"Wrote {n_panels} correlation panels ({len(panels)} cells) to {args.output}")
+    return panels
+
+
+if __name__ == "__main__":
+    main()
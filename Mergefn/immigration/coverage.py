@@ -0,0 +1,162 @@
+# immigration/coverage.py
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+# Countries missing at most this many years count as continuous (EDA.ipynb)
+MAX_MISSING_YEARS = 2
+
+
+def _year_codes(years: pd.Series) -> pd.Series:
+    """Year as an integer, whether stored as a string, an integer or a datetime."""
+    if pd.api.types.is_datetime64_any_dtype(years):
+        return years.dt.year
+    return pd.to_numeric(years).astype(int)
+
+
+class Coverage:
+    """
+    Region x Year availability bitmap of the merged dataset: True where a
+    region has any row in a year. Regions and years are sorted.
+
+    Built in one pass from the Year and Region columns (from_frame), a
+    CountCube (from_cube) or the kept files of a catalog (Catalog.pairs()).
+    Missing years, the common countries and the per-region year lists are
+    reductions over the bitmap. Region names are casefolded once, so
+    search() scans the few hundred distinct names instead of every row.
+    update() folds in the rows of a new (or re-merged) fiscal year without
+    rebuilding from the full dataset.
+    """
+
+    def __init__(self, present: np.ndarray, regions, years):
+        self.present = np.asarray(present, dtype=bool)
+        self.regions = list(regions)
+        self.years = [int(year) for year in years]
+        self._index()
+
+    def _index(self):
+        self.region_index = {label: i for i, label in enumerate(self.regions)}
+        self.year_index = {label: i for i, label in enumerate(self.years)}
+        self._folded = [label.casefold() for label in self.regions]
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "Coverage":
+        """Coverage of the rows of a long-format dataset (only Year and Region are read)."""
+        df = df[["Year", "Region"]].dropna()
+        year_codes, years = pd.factorize(_year_codes(df["Year"]), sort=True)
+        region_codes, regions = pd.factorize(df["Region"].astype(str), sort=True)
+        present = np.zeros((len(regions), len(years)), dtype=bool)
+        present[region_codes, year_codes] = True
+        return cls(present, regions.tolist(), years.tolist())
+
+    @classmethod
+    def from_cube(cls, cube) -> "Coverage":
+        """Coverage of a CountCube: a region has a year when any of its cells holds data."""
+        present = (~np.isnan(cube.values)).any(axis=(2, 3)).T
+        return cls(present, cube.regions, cube.years)
+
+    def __repr__(self):
+        return f"<Coverage: {len(self.regions)} regions x {len(self.years)} years, {int(self.present.sum())} with data>"
+
+    def availability(self) -> pd.DataFrame:
+        """The bitmap as a 0/1 Region x Year table, as plotted in the notebook's heatmap."""
+        return pd.DataFrame(self.present.astype(int), index=pd.Index(self.regions, name="Region"),
+                            columns=pd.Index(self.years, name="Year"))
+
+    def year_counts(self) -> pd.Series:
+        """Number of years with data per region."""
+        return pd.Series(self.present.sum(axis=1), index=pd.Index(self.regions, name="Region"), name="Years")
+
+    def missing(self) -> pd.DataFrame:
+        """(Year, Region) pairs without data, by year then region."""
+        region_pos, year_pos = np.nonzero(~self.present.T)[::-1]
+        return pd.DataFrame({"Year": np.asarray(self.years, dtype=int)[year_pos],
+                             "Region": np.asarray(self.regions, dtype=object)[region_pos]})
+
+    def missing_years(self) -> dict:
+        """Region -> sorted years without data, for the regions with any gap."""
+        years = np.asarray(self.years)
+        gaps = ~self.present
+        return {self.regions[i]: years[gaps[i]].tolist() for i in np.flatnonzero(gaps.any(axis=1))}
+
+    def common_countries(self, max_missing: int = MAX_MISSING_YEARS) -> list:
+        """Regions missing at most max_missing of the years, sorted."""
+        keep = (~self.present).sum(axis=1) <= max_missing
+        return [region for region, kept in zip(self.regions, keep) if kept]
+
+    def search(self, term: str) -> list:
+        """
+        Regions whose name contains term, ignoring case, like the notebook's
+        str.contains lookup: "Guinea" also finds Guinea-Bissau and Papua New
+        Guinea. Only the distinct region names are scanned.
+        """
+        term = term.casefold()
+        return [region for region, folded in zip(self.regions, self._folded) if term in folded]
+
+    def years_of(self, regions) -> list:
+        """Sorted years in which any of the regions has data."""
+        if isinstance(regions, str):
+            regions = [regions]
+        positions = [self.region_index[region] for region in regions if region in self.region_index]
+        if not positions:
+            return []
+        years = np.asarray(self.years)
+        return years[self.present[positions].any(axis=0)].tolist()
+
+    def update(self, df: pd.DataFrame) -> "Coverage":
+        """
+        Fold in the rows of newly merged years. Every year in df replaces its
+        column (a re-merged year may have lost regions); other years keep
+        theirs, and new regions and years are inserted in sorted order.
+        Returns self.
+        """
+        new = Coverage.from_frame(df)
+        regions = sorted(set(self.regions) | set(new.regions))
+        years = sorted(set(self.years) | set(new.years))
+        region_index = {label: i for i, label in enumerate(regions)}
+        year_index = {label: i for i, label in enumerate(years)}
+
+        present = np.zeros((len(regions), len(years)), dtype=bool)
+        old_rows = np.array([region_index[label] for label in self.regions], dtype=np.int64)
+        old_cols = np.array([year_index[label] for label in self.years], dtype=np.int64)
+        present[np.ix_(old_rows, old_cols)] = self.present
+        new_rows = np.array([region_index[label] for label in new.regions], dtype=np.int64)
+        new_cols = np.array([year_index[label] for label in new.years], dtype=np.int64)
+        present[:, new_cols] = False
+        present[np.ix_(new_rows, new_cols)] = new.present
+
+        self.present, self.regions, self.years = present, regions, years
+        self._index()
+        return self
+
+
+def main(argv=None) -> Coverage:
+    """Print the coverage of a merged dataset (python -m immigration.coverage)."""
+    from .storage import read_dataset
+
+    parser = argparse.ArgumentParser(description='Year x region coverage of the merged dataset')
+    parser.add_argument('--data', required=True, help='Merged dataset: .parquet, .feather/.arrow, .xlsx, .csv, database or partitioned directory')
+    parser.add_argument('--since', type=int, help='Only count years after this one (the notebook uses 2005)')
+    parser.add_argument('--max-missing', type=int, default=MAX_MISSING_YEARS, help=f'Years a common country may miss (default: {MAX_MISSING_YEARS})')
+    parser.add_argument('--search', help='Print the years available for the countries matching this name')
+    parser.add_argument('--output', help='CSV file to write the Region x Year availability table to')
+    args = parser.parse_args(argv)
+
+    filters = {"Year": range(args.since + 1, 10_000)} if args.since is not None else None
+    coverage = Coverage.from_frame(read_dataset(args.data, columns=["Year", "Region"], filters=filters))
+    common = coverage.common_countries(args.max_missing)
+    print(f"{len(coverage.regions)} regions over {len(coverage.years)} years, {len(coverage.missing())} "
+          f"region-years missing; {len(common)} countries miss at most {args.max_missing} years")
+    if args.search:
+        for region in coverage.search(args.search):
+            years = coverage.years_of(region)
+            print(f"  {region}: {len(years)} years ({', '.join(map(str, years))})")
+    if args.output:
+        coverage.availability().to_csv(args.output)
+    return coverage
+
+
+if __name__ == "__main__":
+    main()
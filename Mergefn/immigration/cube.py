@@ -0,0 +1,128 @@
+# immigration/cube.py
+
+import numpy as np
+import pandas as pd
+
+CUBE_AXES = ["Year", "Region", "Group", "Subgroup"]
+
+
+def _positions(index: dict, labels) -> np.ndarray:
+    """Sorted axis positions of the labels present in index (all when None)."""
+    if labels is None:
+        return np.arange(len(index))
+    if isinstance(labels, (str, int, np.integer)):
+        labels = [labels]
+    return np.array(sorted({index[label] for label in labels if label in index}), dtype=np.int64)
+
+
+class CountCube:
+    """
+    Dense (Year, Region, Group, Subgroup) array of one count column of the
+    merged dataset, with a label -> position dictionary per axis.
+
+    Rows sharing a cell are summed when the cube is built; cells without any
+    row are NaN, so "no data" stays distinct from a published zero. Subgroup
+    labels are stripped of surrounding whitespace and every axis is sorted.
+    Slicing by any set of labels is plain array indexing, and sums over
+    countries or categories are one vectorized reduction.
+    """
+
+    def __init__(self, values: np.ndarray, years, regions, groups, subgroups, value: str = "Total"):
+        self.values = values
+        self.value = value
+        self.years = list(years)
+        self.regions = list(regions)
+        self.groups = list(groups)
+        self.subgroups = list(subgroups)
+        self.year_index = {label: i for i, label in enumerate(self.years)}
+        self.region_index = {label: i for i, label in enumerate(self.regions)}
+        self.group_index = {label: i for i, label in enumerate(self.groups)}
+        self.subgroup_index = {label: i for i, label in enumerate(self.subgroups)}
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, value: str = "Total") -> "CountCube":
+        """Aggregate the long-format merged dataset into a cube of `value`."""
+        df = df.dropna(subset=["Year", "Region", "Group", "Subgroup"])
+
+        # Year may be a string, an integer or a datetime
+        years = df["Year"]
+        if pd.api.types.is_datetime64_any_dtype(years):
+            years = years.dt.year
+        axes = [
+            pd.to_numeric(years).astype(int),
+            df["Region"].astype(str),
+            df["Group"].astype(str),
+            df["Subgroup"].astype(str).str.strip(),
+        ]
+
+        codes, vocabularies = [], []
+        for column in axes:
+            code, vocabulary = pd.factorize(column, sort=True)
+            codes.append(code)
+            vocabularies.append(vocabulary.tolist())
+        shape = tuple(len(vocabulary) for vocabulary in vocabularies)
+
+        # One bincount sums every cell; missing values count as zero, as in groupby().sum()
+        flat = np.ravel_multi_index(codes, shape) if len(df) else np.zeros(0, dtype=np.int64)
+        weights = np.nan_to_num(pd.to_numeric(df[value], errors="coerce").to_numpy(dtype=float))
+        size = int(np.prod(shape))
+        sums = np.bincount(flat, weights=weights, minlength=size)
+        rows = np.bincount(flat, minlength=size)
+        values = np.where(rows > 0, sums, np.nan).reshape(shape)
+        return cls(values, *vocabularies, value=value)
+
+    def __repr__(self):
+        dims = " x ".join(f"{len(labels)} {axis}" for axis, labels in
+                          zip(CUBE_AXES, [self.years, self.regions, self.groups, self.subgroups]))
+        return f"<CountCube of {self.value}: {dims}>"
+
+    def select(self, years=None, regions=None, groups=None, subgroups=None):
+        """
+        Sub-cube of the given labels on each axis (all when None), as
+        (values, (years, regions, groups, subgroups)). Unknown labels are
+        ignored, like isin().
+        """
+        positions = [
+            _positions(self.year_index, years),
+            _positions(self.region_index, regions),
+            _positions(self.group_index, groups),
+            _positions(self.subgroup_index, subgroups),
+        ]
+        values = self.values[np.ix_(*positions)]
+        vocabularies = [self.years, self.regions, self.groups, self.subgroups]
+        labels = tuple([vocabulary[p] for p in pos] for vocabulary, pos in zip(vocabularies, positions))
+        return values, labels
+
+    def total(self, years=None, regions=None, groups=None, subgroups=None) -> float:
+        """Sum over the selected cells; NaN when none of them has data."""
+        values, _ = self.select(years, regions, groups, subgroups)
+        return float(_nansum(values, axis=None))
+
+    def pivot(self, group: str, regions=None, subgroups=None, by_region: bool = True) -> pd.DataFrame:
+        """
+        Year x series matrix of one group, summed over the selected regions
+        unless by_region. Columns are (Region, Subgroup) pairs or Subgroups,
+        and only years and series with data are kept, so the result matches
+        pivot_table(index='Year', columns=..., values=value, aggfunc='sum').
+        """
+        values, (years, region_labels, _, subgroup_labels) = self.select(
+            regions=regions, groups=[group], subgroups=subgroups)
+        # Collapse the group axis; an unknown group leaves every cell NaN
+        values = _nansum(values, axis=2)
+
+        if by_region:
+            matrix = values.reshape(len(years), -1)
+            columns = pd.MultiIndex.from_product([region_labels, subgroup_labels], names=["Region", "Subgroup"])
+        else:
+            matrix = _nansum(values, axis=1)
+            columns = pd.Index(subgroup_labels, name="Subgroup")
+
+        frame = pd.DataFrame(matrix, index=pd.Index(years, name="Year"), columns=columns)
+        return frame.dropna(axis=0, how="all").dropna(axis=1, how="all")
+
+
+def _nansum(values: np.ndarray, axis):
+    """Sum ignoring NaN, but NaN where every summed cell is NaN."""
+    present = ~np.isnan(values)
+    sums = np.where(present, values, 0.0).sum(axis=axis)
+    return np.where(present.any(axis=axis), sums, np.nan)
@@ -0,0 +1,192 @@
+# immigration/database.py
+
+import argparse
+import os
+import sqlite3
+
+import pandas as pd
+
+from .schema import CATEGORY_COLUMNS, conform
+
+# Table of the merged dataset in a database file
+TABLE = "immigration"
+
+# Lookup index of the analysis queries; Group/Subgroup/Year also serves
+# queries over every country
+INDEXES = {
+    f"{TABLE}_lookup": ["Region", "Group", "Subgroup", "Year"],
+    f"{TABLE}_group": ["Group", "Subgroup", "Year"],
+}
+
+# Database engines by file extension (see storage.FORMATS)
+ENGINES = {
+    ".sqlite": "sqlite",
+    ".db": "sqlite",
+    ".duckdb": "duckdb",
+}
+
+# Filter argument of query_dataset -> column it restricts
+FILTER_COLUMNS = {"regions": "Region", "groups": "Group", "subgroups": "Subgroup"}
+
+
+def database_engine(path: str) -> str:
+    """Engine of a database file from its extension (SQLite unless .duckdb)."""
+    return ENGINES.get(os.path.splitext(path)[1].lower(), "sqlite")
+
+
+def quote(name: str) -> str:
+    """Quote a column name; Group is an SQL keyword."""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def connect(path: str, engine: str = "sqlite"):
+    """
+    Open a database file with SQLite (standard library) or DuckDB, which is
+    optional: pip install duckdb.
+    """
+    if engine == "sqlite":
+        return sqlite3.connect(path)
+    try:
+        import duckdb
+    except ImportError:
+        raise ImportError("DuckDB databases need the duckdb package: pip install duckdb")
+    return duckdb.connect(path)
+
+
+def _fetch(connection, sql: str, params=()) -> pd.DataFrame:
+    if isinstance(connection, sqlite3.Connection):
+        return pd.read_sql_query(sql, connection, params=list(params))
+    return connection.execute(sql, list(params)).df()
+
+
+class DatabaseWriter:
+    """
+    Append chunks of the merged dataset to the TABLE of a database file,
+    replacing any earlier table; close() builds the INDEXES. Category
+    columns are stored as text and restored by query_dataset.
+
+    Chunks go to a staging table that close() renames to TABLE, so the
+    earlier table stays readable until then and abort() keeps it.
+    """
+
+    def __init__(self, path: str, engine: str = None):
+        self.path = path
+        self.engine = engine or database_engine(path)
+        self.connection = connect(path, self.engine)
+        self.staging = f"{TABLE}_staging"
+        self.connection.execute(f"DROP TABLE IF EXISTS {self.staging}")
+        self.columns = None
+
+    def append(self, df: pd.DataFrame):
+        """Insert one chunk; the first one creates the table."""
+        df = df.astype({col: object for col in CATEGORY_COLUMNS if col in df.columns})
+        if self.columns is None:
+            self.columns = list(df.columns)
+        df = df.reindex(columns=self.columns)
+        if self.engine == "sqlite":
+            df.to_sql(self.staging, self.connection, if_exists="append", index=False, chunksize=10_000)
+            return
+        self.connection.register("chunk", df)
+        try:
+            self.connection.execute(f"CREATE TABLE IF NOT EXISTS {self.staging} AS SELECT * FROM chunk LIMIT 0")
+            self.connection.execute(f"INSERT INTO {self.staging} SELECT * FROM chunk")
+        finally:
+            self.connection.unregister("chunk")
+
+    def close(self):
+        """Replace the table with the staged one, index it and close the file."""
+        if self.connection is None:
+            return
+        self.connection.execute(f"DROP TABLE IF EXISTS {TABLE}")
+        if self.columns is not None:
+            self.connection.execute(f"ALTER TABLE {self.staging} RENAME TO {TABLE}")
+            for name, columns in INDEXES.items():
+                if set(columns) <= set(self.columns):
+                    self.connection.execute(
+                        f"CREATE INDEX {name} ON {TABLE} ({', '.join(quote(col) for col in columns)})")
+            if self.engine == "sqlite":
+                # Row counts per index let the planner pick between them
+                self.connection.execute("ANALYZE")
+        self.connection.commit()
+        self.connection.close()
+        self.connection = None
+
+    def abort(self):
+        """Drop the staged rows and close the file, keeping the earlier table."""
+        if self.connection is None:
+            return
+        self.connection.execute(f"DROP TABLE IF EXISTS {self.staging}")
+        self.connection.commit()
+        self.connection.close()
+        self.connection = None
+
+
+def query_sql(columns=None, years=None, **filters):
+    """
+    SELECT statement and parameters of query_dataset. A range of years
+    becomes a BETWEEN, any other collection an IN list.
+    """
+    where, params = [], []
+    for argument, values in filters.items():
+        if values is None:
+            continue
+        if isinstance(values, str):
+            values = [values]
+        values = list(values)
+        where.append(f"{quote(FILTER_COLUMNS[argument])} IN ({', '.join('?' * len(values))})")
+        params.extend(values)
+
+    if isinstance(years, range) and years.step == 1:
+        where.append("Year BETWEEN ? AND ?")
+        params.extend([years.start, years.stop - 1])
+    elif years is not None:
+        years = [int(year) for year in years]
+        where.append(f"Year IN ({', '.join('?' * len(years))})")
+        params.extend(years)
+
+    selected = "*" if columns is None else ", ".join(quote(col) for col in columns)
+    sql = f"SELECT {selected} FROM {TABLE}"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    return sql, params
+
+
+def query_dataset(path: str, regions=None, groups=None, subgroups=None, years=None,
+                  columns=None, engine: str = None) -> pd.DataFrame:
+    """
+    Rows of the merged dataset in a database file matching every filter
+    given, with the canonical dtypes (see schema.conform). regions, groups
+    and subgroups are labels or lists of labels; years is a range (e.g.
+    range(2010, 2023)) or a list of years; columns limits the columns read.
+    Only the matching rows are fetched, through the lookup indexes.
+
+        query_dataset("merged.sqlite", regions="India", groups="Occupation",
+                      subgroups="Management, professional, and related occupations",
+                      years=range(2010, 2023))
+    """
+    sql, params = query_sql(columns, years, regions=regions, groups=groups, subgroups=subgroups)
+    if not os.path.exists(path):
+        raise FileNotFoundError(path)
+    connection = connect(path, engine or database_engine(path))
+    try:
+        return conform(_fetch(connection, sql, params))
+    finally:
+        connection.close()
+
+
+def main(argv=None):
+    """Export a merged dataset to a database file (python -m immigration.database)."""
+    from .storage import read_dataset, write_dataset
+
+    parser = argparse.ArgumentParser(description='Export the merged dataset to an indexed SQLite or DuckDB file')
+    parser.add_argument('--data', required=True, help='Merged dataset: .parquet, .feather/.arrow, .xlsx or .csv')
+    parser.add_argument('--db', required=True, help='Database to write: .sqlite/.db, or .duckdb (needs duckdb)')
+    args = parser.parse_args(argv)
+
+    df = read_dataset(args.data)
+    write_dataset(df, args.db)
+    print(f"Wrote {len(df)} rows to table {TABLE} of {args.db}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+# immigration/engine.py
+
+import argparse
+import os
+import tempfile
+import warnings
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pandas as pd
+
+from .impute import HIERARCHIES
+from .manifest import ParseCache
+from .pipeline import DEFAULT_CHUNK_ROWS, DROP_SUBGROUPS, merge_workbooks
+from .profiling import PROFILERS, RunProfiler, run_profiler, stage
+from .regions import ALIASES_PATH, RegionNormalizer
+from .sections import SECTION_LIBRARY, section_definitions
+from .sources import find_sources
+from .storage import PARTITIONED, read_dataset, storage_format, write_dataset
+
+# Named merge configurations: the sections kept, the subgroup rows dropped
+# from them and whether withheld ('D') cells are imputed
+PROFILES = {
+    # The analysis dataset of Mergercode.py
+    "final": {
+        "sections": ["Age", "Occupation", "Admission"],
+        "drop_subgroups": DROP_SUBGROUPS,
+        "impute": True,
+    },
+    # Every section of the profile tables as published, as Merge_fn.py kept
+    # them. The rows follow the rules of the main merge, not those of the
+    # old Merge_fn.py/merger.py: sections are tagged per workbook (the old
+    # scripts took every section boundary from the first file); continent
+    # and total workbooks are dropped, as are later duplicates of a
+    # (Year, Region, Group, Subgroup); region names are standardized
+    # (immigration.regions); "Total" subgroup rows are dropped; and a row
+    # is dropped only when Total, Male and Female are all missing, not any
+    # of them.
+    "all": {
+        "sections": list(SECTION_LIBRARY),
+        "drop_subgroups": ["No occupation/not working outside home"],
+        "impute": False,
+    },
+}
+
+# Executor classes that can parse the workbooks; "serial" parses in this process
+EXECUTORS = {
+    "process": ProcessPoolExecutor,
+    "thread": ThreadPoolExecutor,
+    "serial": None,
+}
+
+
+def run(inputs, output_path: str, profile: str = "final", sections=None, workers: int = 1,
+        executor="process", incremental: bool = False, cache_dir: str = None,
+        hierarchy: str = "region-group", chunk_rows: int = DEFAULT_CHUNK_ROWS,
+        verbose: bool = True, profiler=None, aliases: str = ALIASES_PATH,
+        region_report: str = None, catalog: str = None, append: bool = False) -> dict:
+    """
+    Merge the workbooks found in `inputs` (folders, .xls files or .zip
+    archives, see find_sources) into output_path.
+
+    profile names an entry of PROFILES; sections optionally overrides its
+    section names (keys of SECTION_LIBRARY). executor is a key of EXECUTORS
+    run with `workers` workers, or a concurrent.futures.Executor the caller
+    owns. With incremental, unchanged workbooks are read from the parse
+    cache in cache_dir (default: .merge_cache next to the output). A
+    RunProfiler, when given, times every stage and workbook.
+
+    Region names are standardized with the alias file `aliases`; names it
+    does not list are matched by their words or fuzzily, or kept, and
+    written to region_report (CSV) for review. They are listed when
+    verbose and otherwise counted in a warning.
+
+    With a catalog path, the header cells of new or changed workbooks are
+    first recorded in that SQLite catalog (immigration.catalog), and
+    duplicate and rollup workbooks are dropped before any table is parsed.
+
+    An output_path without an extension is written as a directory
+    partitioned by Year and Group (immigration.partitions); with append,
+    only the partitions of the years merged are rewritten, so adding a
+    fiscal year leaves the others untouched. Append needs a profile that
+    does not impute: the means that replace 'D' pool every year of a
+    region, so appending a year would change the imputed cells of the
+    others too; rerun the whole merge instead.
+
+    Returns the summary of merge_workbooks plus the kept groups and the
+    number of region names not in the alias file.
+    """
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown profile {profile!r}; expected one of {sorted(PROFILES)}")
+    settings = PROFILES[profile]
+    output_format = storage_format(output_path, write=True)
+    if append and output_format != PARTITIONED:
+        raise ValueError("append needs a partitioned output: a directory path without an extension")
+    if append and settings["impute"]:
+        raise ValueError(f"append cannot be used with the {profile!r} profile: its imputed means span every year")
+    definitions = section_definitions(sections or settings["sections"])
+
+    with stage(profiler, "discovery") as counts:
+        excel_files = find_sources(inputs)
+        counts["rows"] = len(excel_files)
+    if verbose:
+        print(f"Found {len(excel_files)} .xls files in the specified inputs")
+
+    if catalog:
+        from .catalog import Catalog
+
+        with stage(profiler, "catalog") as counts, Catalog(catalog) as corpus:
+            pool = executor if not isinstance(executor, str) else None
+            kept = corpus.refresh(excel_files, workers=workers if executor == "process" else 1,
+                                  normalizer=RegionNormalizer(aliases), executor=pool)
+            counts["rows"] = corpus.scanned
+            if verbose:
+                print(f"Catalog {catalog}: {corpus.scanned} workbooks scanned, {corpus.reused} unchanged; "
+                      f"skipping {len(excel_files) - len(kept)} duplicate, rollup or unreadable workbooks")
+        excel_files = kept
+
+    # Reuse parsed frames of unchanged workbooks from the previous run
+    cache = None
+    if incremental:
+        cache = ParseCache(cache_dir or os.path.join(os.path.dirname(output_path), ".merge_cache"))
+
+    normalizer = RegionNormalizer(aliases)
+    options = dict(cache=cache, hierarchy=hierarchy, chunk_rows=chunk_rows, verbose=verbose,
+                   sections=definitions, drop_subgroups=settings["drop_subgroups"],
+                   impute=settings["impute"], profiler=profiler, normalizer=normalizer,
+                   keep_partitions=append)
+
+    if not isinstance(executor, str):
+        summary = merge_workbooks(excel_files, output_path, workers=workers, executor=executor, **options)
+    elif EXECUTORS[executor] is None or workers <= 1:
+        summary = merge_workbooks(excel_files, output_path, workers=1, **options)
+    else:
+        with EXECUTORS[executor](max_workers=workers) as pool:
+            summary = merge_workbooks(excel_files, output_path, workers=workers, executor=pool, **options)
+
+    summary["groups"] = [section["group"] for section in definitions if section["group"]]
+    unmatched = normalizer.unmatched()
+    summary["unmatched_regions"] = len(unmatched)
+    if unmatched and not verbose:
+        warnings.warn(f"{len(unmatched)} region names are not in the alias file {aliases}")
+    elif unmatched:
+        print(f"WARNING: {len(unmatched)} region names are not in the alias file {aliases}:")
+        for row in unmatched[:10]:
+            print(f"  - {row['name']!r} -> {row['resolved']!r} ({row['method']})")
+        if len(unmatched) > 10:
+            print(f"  ... and {len(unmatched) - 10} more; see --region-report")
+    if region_report:
+        normalizer.report(region_report)
+        if verbose:
+            print(f"Region name report saved to {region_report}")
+    return summary
+
+
+def load(inputs, profile: str = "all", **options) -> pd.DataFrame:
+    """
+    Merge the workbooks in `inputs` and return the dataset as a DataFrame
+    instead of keeping a file; options are those of run, but verbose is
+    off unless asked for.
+    """
+    options.setdefault("verbose", False)
+    with tempfile.TemporaryDirectory(prefix=".merge_") as tmp_dir:
+        output_path = os.path.join(tmp_dir, "merged.parquet")
+        summary = run(inputs, output_path, profile=profile, **options)
+        if summary["rows"] == 0:
+            return pd.DataFrame()
+        return read_dataset(output_path)
+
+
+def build_parser(defaults=None) -> argparse.ArgumentParser:
+    """Command line of the engine; defaults pre-fill any of its options."""
+    parser = argparse.ArgumentParser(description='Merge COB profile workbooks into one dataset')
+    parser.add_argument('--input', nargs='+', help='Folders, .xls workbooks or .zip archives to merge')
+    parser.add_argument('--output', help='Merged dataset path: .parquet, .feather/.arrow, .xlsx, .csv, .sqlite/.duckdb, '
+                                         'or a directory (no extension) partitioned by Year and Group')
+    parser.add_argument('--profile', choices=sorted(PROFILES), default='final', help='Sections and cleaning rules to apply (default: final)')
+    parser.add_argument('--sections', nargs='+', choices=list(SECTION_LIBRARY), help='Sections to keep, overriding the profile')
+    parser.add_argument('--workers', type=int, default=1, help='Number of workers for parsing (default: 1, serial)')
+    parser.add_argument('--executor', choices=list(EXECUTORS), default='process', help='How workers run (default: process)')
+    parser.add_argument('--excel', action='store_true', help='Also export the merged dataset as .xlsx next to the output')
+    parser.add_argument('--impute-hierarchy', choices=sorted(HIERARCHIES), default='region-group', help="Fallback levels for the mean that replaces 'D' (default: region-group)")
+    parser.add_argument('--append', action='store_true', help='Into a partitioned --output, rewrite only the partitions of the merged years and keep the rest (profiles without imputation only)')
+    parser.add_argument('--incremental', action='store_true', help='Only re-parse workbooks that are new or changed since the last run')
+    parser.add_argument('--cache-dir', help='Parse cache for --incremental (default: .merge_cache next to the output file)')
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS, help=f'Workbook rows processed per chunk; bounds peak memory (default: {DEFAULT_CHUNK_ROWS})')
+    parser.add_argument('--aliases', default=ALIASES_PATH, help='JSON file mapping region name variants to their standard name (default: immigration/region_aliases.json)')
+    parser.add_argument('--catalog', help='SQLite catalog of workbook headers, refreshed before the merge; only the files it keeps are parsed')
+    parser.add_argument('--region-report', help='Write the region names missing from the alias file, and what they were matched to, as CSV')
+    parser.add_argument('--report', help='Write a run report (time, CPU, peak memory and rows per stage, parse time per workbook) as .json or .csv')
+    parser.add_argument('--profiler', choices=PROFILERS, help='Also profile the run with cProfile (.prof) or pyinstrument (.html), saved next to the report or output')
+    if defaults:
+        parser.set_defaults(**defaults)
+    return parser
+
+
+def main(argv=None, defaults=None) -> dict:
+    """Run the engine from the command line (python -m immigration)."""
+    parser = build_parser(defaults)
+    args = parser.parse_args(argv)
+    if not args.input:
+        parser.error("--input is required")
+    if not args.output:
+        parser.error("--output is required")
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    try:
+        storage_format(args.output, write=True)
+    except ValueError as e:
+        parser.error(f"--output: {e}")
+    if args.append and storage_format(args.output) != PARTITIONED:
+        parser.error("--append needs a partitioned --output (a directory path without an extension)")
+    if args.append and PROFILES[args.profile]["impute"]:
+        parser.error(f"--append cannot be used with --profile {args.profile}, which imputes 'D' cells from "
+                     f"every year; rerun the full merge or use a profile without imputation")
+
+    profiler = RunProfiler() if args.report else None
+    profile_path = None
+    if args.profiler:
+        extension = ".prof" if args.profiler == "cprofile" else ".html"
+        profile_path = os.path.splitext(args.report or args.output)[0] + extension
+
+    with run_profiler(args.profiler, profile_path):
+        summary = run(
+            args.input,
+            args.output,
+            profile=args.profile,
+            sections=args.sections,
+            workers=args.workers,
+            executor=args.executor,
+            incremental=args.incremental,
+            cache_dir=args.cache_dir,
+            hierarchy=args.impute_hierarchy,
+            chunk_rows=args.chunk_rows,
+            profiler=profiler,
+            aliases=args.aliases,
+            region_report=args.region_report,
+            catalog=args.catalog,
+            append=args.append,
+        )
+
+    if summary["rows"] > 0:
+        # Excel export is an optional extra, it is much slower than the columnar formats
+        if args.excel and storage_format(args.output) != "excel":
+            excel_path = os.path.splitext(args.output)[0] + ".xlsx"
+            write_dataset(read_dataset(args.output), excel_path)
+            print(f"Excel copy saved to {excel_path}")
+
+        print(f"Processing complete. Filtered data saved to {args.output}")
+        print(f"Dataset contains {summary['rows']} rows with data from {', '.join(summary['groups'])} categories.")
+        print(f"Data spans {summary['years']} years and {summary['regions']} regions.")
+
+    if profiler is not None:
+        profiler.write(args.report)
+        print(profiler.summary())
+        print(f"Run report saved to {args.report}")
+    return summary
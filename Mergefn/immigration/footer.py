@@ -0,0 +1,49 @@
+# immigration/footer.py
+
+import re
+
+import pandas as pd
+
+# Notes printed below the table of a COB profile sheet. FY2005-FY2022 use
+# "D Data withheld to limit disclosure." (one or two spaces after the D),
+# "- Represents zero" (with or without a period), and a "Source: U.S.
+# Department of Homeland Security" or "Source: DHS Office of Immigration
+# Statistics" line; "Note:" lines precede them in some tables.
+FOOTER_INDICATORS = ["Represents zero", "Data withheld", "Note:", "- Represents", r"^\s*Source:"]
+
+# All indicators in one case-insensitive pattern, compiled once per process
+FOOTER_PATTERN = re.compile("|".join(f"(?:{indicator})" for indicator in FOOTER_INDICATORS), re.IGNORECASE)
+
+
+def is_footer(value) -> bool:
+    """Whether a Characteristic cell is a footer note."""
+    return isinstance(value, str) and FOOTER_PATTERN.search(value) is not None
+
+
+def footer_position(values) -> int:
+    """
+    Position of the first footer note in a sequence of Characteristic
+    cells, in one pass that stops there; len(values) when there is none.
+    """
+    for position, value in enumerate(values):
+        if isinstance(value, str) and FOOTER_PATTERN.search(value):
+            return position
+    return len(values)
+
+
+def sheet_footer_row(sheet, first_row: int = 0) -> int:
+    """
+    Sheet row of the first footer note at or below first_row, reading only
+    the first column and stopping at the note; sheet.nrows when there is none.
+    """
+    for row in range(first_row, sheet.nrows):
+        if is_footer(sheet.cell_value(row, 0)):
+            return row
+    return sheet.nrows
+
+
+def trim_footer(df: pd.DataFrame) -> pd.DataFrame:
+    """Cut a data table at its first footer note."""
+    if df.empty:
+        return df
+    return df.iloc[:footer_position(df.iloc[:, 0].tolist())]
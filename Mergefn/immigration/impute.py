@@ -0,0 +1,266 @@
+# immigration/impute.py
+
+import numpy as np
+import pandas as pd
+
+from .schema import COUNT_COLUMNS, IMPUTED_COLUMN, imputed_flag
+
+# Withheld ('D') cells of one (Region, Group, Subgroup) all get the same value
+IMPUTE_KEYS = ["Region", "Group", "Subgroup"]
+
+# Fallback levels for the mean that replaces 'D'; [] is the whole column.
+# A level is used when its mean exists and is non-zero, otherwise the next.
+HIERARCHIES = {
+    "region-group": [["Region", "Group"], ["Region"], []],
+    "region": [["Region"], []],
+    "global": [[]],
+}
+
+
+def _group_positions(df: pd.DataFrame, keys):
+    """
+    Return (codes, positions): the group code of every row for `keys` and,
+    per code, the row positions of that group in ascending order. Rows with
+    a missing key get code -1 and belong to no group.
+    """
+    if not keys:
+        codes = np.zeros(len(df), dtype=np.int64)
+    else:
+        codes = df.groupby(list(keys), sort=False, dropna=True).ngroup().to_numpy()
+    order = np.argsort(codes, kind="stable")
+    sorted_codes = codes[order]
+    n_groups = int(codes.max()) + 1 if len(codes) else 0
+    bounds = np.searchsorted(sorted_codes, np.arange(n_groups + 1))
+    positions = [order[bounds[g]:bounds[g + 1]] for g in range(n_groups)]
+    return codes, positions
+
+
+def _mean(values: np.ndarray) -> float:
+    """Mean of the non-missing values, summed the way Series.mean sums them."""
+    values = values[~np.isnan(values)]
+    if len(values) == 0:
+        return np.nan
+    return values.sum() / np.float64(len(values))
+
+
+def _impute_sequential(df, values, d_mask, hierarchy):
+    """
+    Replace withheld cells one (Region, Group, Subgroup) at a time, in order
+    of first appearance. Each mean sees the values imputed before it, which
+    is what the original per-combination loop in Mergercode.py did, so the
+    result is bit-identical to it.
+
+    This is the default of impute_withheld even though _impute_transform is
+    faster: the two are not equivalent. Here a (Region, Group) mean counts
+    the cells already imputed in earlier subgroups, there it counts only
+    published values, so the result depends on row order. On the full
+    corpus about 170 of the 40,000 withheld cells differ, by up to 0.4.
+    """
+    combo_codes, combo_positions = _group_positions(df, IMPUTE_KEYS)
+    levels = [_group_positions(df, keys) for keys in hierarchy]
+
+    d_rows = np.flatnonzero(d_mask)
+    d_codes = combo_codes[d_rows]
+    _, first = np.unique(d_codes, return_index=True)
+
+    for start in np.sort(first):
+        row = d_rows[start]
+        mean = np.nan
+        for codes, positions in levels:
+            code = codes[row]
+            mean = _mean(values[positions[code]]) if code >= 0 else np.nan
+            if not (np.isnan(mean) or mean == 0):
+                break
+
+        # A combination with a missing key never matched in the original loop
+        code = d_codes[start]
+        if code >= 0:
+            rows = combo_positions[code]
+            values[rows[d_mask[rows]]] = mean
+    return values
+
+
+def _impute_transform(df, values, d_mask, hierarchy):
+    """
+    Replace withheld cells with means of the published values only, using
+    one groupby/transform per hierarchy level. Independent of row order,
+    but not identical to _impute_sequential (see there).
+    """
+    observed = pd.Series(values, index=df.index)
+    filled = pd.Series(np.nan, index=df.index)
+    for keys in hierarchy:
+        if keys:
+            mean = observed.groupby([df[k] for k in keys], sort=False, dropna=True).transform("mean")
+        else:
+            mean = pd.Series(observed.mean(), index=df.index)
+        usable = filled.isna() & mean.notna() & (mean != 0)
+        filled = filled.where(~usable, mean)
+
+    # The last level applies even when its mean is missing or zero
+    if hierarchy:
+        filled = filled.where(filled.notna(), mean)
+
+    # Rows whose (Region, Group, Subgroup) has a missing key are not filled
+    complete = df[IMPUTE_KEYS].notna().all(axis=1).to_numpy()
+    target = d_mask & complete
+    values[target] = filled.to_numpy()[target]
+    return values
+
+
+def impute_withheld(df: pd.DataFrame, columns=COUNT_COLUMNS, hierarchy="region-group",
+                    sequential: bool = True, verbose: bool = True) -> pd.DataFrame:
+    """
+    Turn count columns numeric: '-' becomes 0 and withheld 'D' cells are
+    replaced by the mean of their (Region, Group), falling back to the
+    Region and then the column mean when a level has no usable mean.
+
+    hierarchy is a key of HIERARCHIES or a list of key lists. With
+    sequential=True, means include values imputed earlier in the pass,
+    which reproduces the original Mergercode.py output exactly; with
+    sequential=False they come from published values only via one
+    groupby/transform per level, which is faster and independent of row
+    order but changes a few imputed cells.
+    """
+    if isinstance(hierarchy, str):
+        hierarchy = HIERARCHIES[hierarchy]
+    impute = _impute_sequential if sequential else _impute_transform
+
+    df = df.copy()
+    for col in columns:
+        if col not in df.columns:
+            continue
+
+        # First replace "-" with 0
+        df[col] = df[col].mask(df[col] == "-", 0)
+
+        # Identify "D" values, they become NaN on conversion
+        d_mask = (df[col] == "D").to_numpy()
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+
+        if d_mask.any():
+            if verbose:
+                print(f"Replacing {d_mask.sum()} 'D' values in {col} column with region-specific group means")
+            values = df[col].to_numpy(dtype=np.float64, copy=True)
+            df[col] = impute(df, values, d_mask, hierarchy)
+
+    return df
+
+
+def _level_key(combo, keys):
+    """Project a (Region, Group, Subgroup) combination onto a hierarchy level."""
+    return tuple(combo[IMPUTE_KEYS.index(key)] for key in keys)
+
+
+class RunningImputer:
+    """
+    impute_withheld for data that arrives in chunks.
+
+    add() converts the count columns of a chunk ('-' becomes 0, 'D' NaN),
+    flags the withheld cells in IMPUTED_COLUMN and folds the published
+    values into running sums and counts per hierarchy level. finish() then
+    replays the sequential imputation on those aggregates alone: each
+    (Region, Group, Subgroup), in order of its first withheld cell, takes
+    the mean of its level and adds its imputed cells to every level, as
+    the original per-combination loop did. fill() applies the means to a
+    chunk. Memory grows with the number of combinations, not of rows.
+
+    The means match impute_withheld(sequential=True) up to floating point
+    summation order.
+    """
+
+    def __init__(self, columns=COUNT_COLUMNS, hierarchy="region-group"):
+        if isinstance(hierarchy, str):
+            hierarchy = HIERARCHIES[hierarchy]
+        self.columns = list(columns)
+        self.hierarchy = [list(keys) for keys in hierarchy]
+        self.sums = {col: [{} for _ in self.hierarchy] for col in self.columns}
+        self.counts = {col: [{} for _ in self.hierarchy] for col in self.columns}
+        # Withheld cells per combination, in order of first appearance
+        self.withheld = {col: {} for col in self.columns}
+        self.withheld_cells = {col: 0 for col in self.columns}
+        self.means = None
+
+    def add(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Convert and flag the count columns of a chunk and update the aggregates."""
+        df = df.copy()
+        flags = np.zeros(len(df), dtype=np.uint8)
+        for col in self.columns:
+            if col not in df.columns:
+                continue
+
+            df[col] = df[col].mask(df[col] == "-", 0)
+            d_mask = (df[col] == "D").to_numpy()
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+            flags[d_mask] |= imputed_flag(col)
+            self.withheld_cells[col] += int(d_mask.sum())
+
+            values = df[col].to_numpy(dtype=np.float64)
+            published = ~np.isnan(values)
+            for level, keys in enumerate(self.hierarchy):
+                self._accumulate(col, level, df, keys, values, published)
+
+            if d_mask.any():
+                withheld = self.withheld[col]
+                sizes = df.loc[d_mask, IMPUTE_KEYS].groupby(IMPUTE_KEYS, sort=False, dropna=True).size()
+                for combo, size in sizes.items():
+                    withheld[combo] = withheld.get(combo, 0) + int(size)
+
+        df[IMPUTED_COLUMN] = flags
+        return df
+
+    def _accumulate(self, col, level, df, keys, values, published):
+        sums, counts = self.sums[col][level], self.counts[col][level]
+        if not keys:
+            sums[()] = sums.get((), 0.0) + values[published].sum()
+            counts[()] = counts.get((), 0) + int(published.sum())
+            return
+
+        observed = pd.Series(values[published])
+        grouped = observed.groupby([df[key].to_numpy()[published] for key in keys], dropna=True).agg(["sum", "count"])
+        for key, total, count in zip(grouped.index, grouped["sum"], grouped["count"]):
+            key = key if isinstance(key, tuple) else (key,)
+            sums[key] = sums.get(key, 0.0) + total
+            counts[key] = counts.get(key, 0) + int(count)
+
+    def finish(self, verbose: bool = True):
+        """Compute the mean of every withheld combination from the aggregates."""
+        self.means = {}
+        for col in self.columns:
+            if verbose and self.withheld_cells[col]:
+                print(f"Replacing {self.withheld_cells[col]} 'D' values in {col} column with region-specific group means")
+
+            sums = [dict(level) for level in self.sums[col]]
+            counts = [dict(level) for level in self.counts[col]]
+            means = {}
+            for combo, size in self.withheld[col].items():
+                mean = np.nan
+                for level, keys in enumerate(self.hierarchy):
+                    key = _level_key(combo, keys)
+                    count = counts[level].get(key, 0)
+                    mean = sums[level][key] / np.float64(count) if count else np.nan
+                    if not (np.isnan(mean) or mean == 0):
+                        break
+                means[combo] = mean
+
+                # Later means see the values imputed here
+                if not np.isnan(mean):
+                    for level, keys in enumerate(self.hierarchy):
+                        key = _level_key(combo, keys)
+                        sums[level][key] = sums[level].get(key, 0.0) + mean * size
+                        counts[level][key] = counts[level].get(key, 0) + size
+            self.means[col] = pd.Series(means, dtype=np.float64)
+        return self.means
+
+    def fill(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Replace the flagged cells of a chunk from add() with their means."""
+        df = df.copy()
+        flags = df[IMPUTED_COLUMN].to_numpy()
+        for col in self.columns:
+            mask = (flags & imputed_flag(col)) != 0
+            if not mask.any():
+                continue
+            combos = pd.MultiIndex.from_frame(df.loc[mask, IMPUTE_KEYS])
+            values = df[col].to_numpy(dtype=np.float64, copy=True)
+            values[mask] = self.means[col].reindex(combos).to_numpy()
+            df[col] = values
+        return df
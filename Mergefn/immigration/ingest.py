@@ -0,0 +1,213 @@
+# immigration/ingest.py
+
+import os
+import glob
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# trim_footer, FOOTER_INDICATORS and standardize_region_name used to live here
+from .footer import FOOTER_INDICATORS, sheet_footer_row, trim_footer  # noqa: F401
+from .regions import ROLLUP_REGIONS, default_normalizer, standardize_region_name  # noqa: F401
+from .sources import source_name
+from .workbook import HEADER_ROW, open_sheet, read_header, read_sheet_table
+
+# Continents and totals that are published as their own workbooks
+REGIONS_TO_EXCLUDE = ROLLUP_REGIONS
+
+
+def find_excel_files(input_folder: str) -> list:
+    """Return the .xls workbooks in input_folder in glob order."""
+    return glob.glob(os.path.join(input_folder, "*.xls"))
+
+
+class _StageTimer:
+    """Wall and CPU time of consecutive steps of one worker call."""
+
+    def __init__(self):
+        self.timings = {}
+        self._wall, self._cpu = time.perf_counter(), time.process_time()
+
+    def lap(self, name: str, rows: int = 0):
+        wall, cpu = time.perf_counter(), time.process_time()
+        self.timings[name] = (wall - self._wall, cpu - self._cpu, rows)
+        self._wall, self._cpu = wall, cpu
+
+
+def _parse_file(file_path: str):
+    """
+    Worker entry point. Never raises, so one bad workbook cannot take down
+    the pool; returns ((year, region, df, error), timings) instead, where
+    timings maps each step done ("metadata read", "footer trim", "table
+    read") to its (wall, cpu, rows). The region is the name as published;
+    the caller standardizes it. The table of a continent or total rollup is
+    never read, and no table is read past its footer notes.
+    """
+    year = region = None
+    timer = _StageTimer()
+    try:
+        # The header cells and the table come from the same open sheet
+        sheet = open_sheet(file_path)
+        year, region = read_header(sheet)
+        timer.lap("metadata read")
+        if region in REGIONS_TO_EXCLUDE:
+            return (year, region, None, None), timer.timings
+
+        end_row = sheet_footer_row(sheet, HEADER_ROW + 1)
+        timer.lap("footer trim", end_row - HEADER_ROW - 1)
+        df = read_sheet_table(sheet, end_row=end_row)
+        timer.lap("table read", len(df))
+        df["Year"] = year
+        df["Region"] = region
+        return (year, region, df, None), timer.timings
+    except Exception as e:
+        return (year, region, None, e), timer.timings
+
+
+def _map_files(excel_files, workers, executor=None):
+    """
+    Yield (result, timings) of _parse_file in input order, serially or on a
+    process pool.
+    A concurrent.futures executor given by the caller is used instead of
+    the pool, and left running.
+    """
+    chunksize = max(1, len(excel_files) // (max(workers or 1, 1) * 4))
+    if executor is not None:
+        yield from executor.map(_parse_file, excel_files, chunksize=chunksize)
+        return
+
+    if workers is None or workers <= 1 or len(excel_files) <= 1:
+        yield from map(_parse_file, excel_files)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(_parse_file, excel_files, chunksize=chunksize)
+
+
+def _map_files_cached(excel_files, workers, cache, verbose, executor=None):
+    """
+    Like _map_files, but reuse cached results for unchanged workbooks and
+    only parse the new or changed ones. Fresh results are stored in the cache;
+    reused ones come with timings None.
+    """
+    # Cached results are only loaded when their turn comes
+    cached = [cache.fresh(file_path) for file_path in excel_files]
+    to_parse = [file_path for file_path, is_cached in zip(excel_files, cached) if not is_cached]
+
+    if verbose:
+        print(f"Reusing {cache.hits} cached workbooks, parsing {len(to_parse)} new or changed")
+
+    parsed = _map_files(to_parse, workers, executor)
+    for file_path, is_cached in zip(excel_files, cached):
+        if is_cached:
+            yield cache.load(file_path), None
+            continue
+
+        result, timings = next(parsed)
+        # Failed parses are retried on the next run
+        if result[3] is None:
+            cache.store(file_path, result)
+        yield result, timings
+
+
+def iter_ingested(excel_files, workers: int = 1, verbose: bool = True, cache=None,
+                  processed_combinations=None, executor=None, profiler=None, normalizer=None):
+    """
+    Generator behind ingest_files: yield the table of every kept workbook,
+    one at a time and in the order of excel_files, so a caller can process
+    and release each before the next is parsed.
+
+    processed_combinations, when given, is filled with "year-region" -> the
+    file it was taken from as workbooks are consumed. executor optionally
+    replaces the process pool (see _map_files). A RunProfiler, when given,
+    records the parse time of every workbook. Region names are
+    standardized here by normalizer (default: the alias file, see
+    immigration.regions), so cached parses pick up alias file edits.
+    """
+    if processed_combinations is None:
+        processed_combinations = {}
+    if normalizer is None:
+        normalizer = default_normalizer()
+
+    if cache is None:
+        results = _map_files(excel_files, workers, executor)
+    else:
+        results = _map_files_cached(excel_files, workers, cache, verbose, executor)
+
+    for file_path, ((year, region, df, error), timings) in zip(excel_files, results):
+        if profiler is not None:
+            if error is not None:
+                status = "failed"
+            elif timings is None:
+                status = "cached"
+            else:
+                status = "parsed" if df is not None else "skipped"
+            profiler.add_file(source_name(file_path), timings, 0 if df is None else len(df), status)
+
+        if verbose:
+            print(f"Processing file: {source_name(file_path)}")
+
+        # The metadata rows could not be read at all
+        if year is None or region is None:
+            print(f"Error processing {file_path}: {str(error)}")
+            continue
+
+        region = normalizer.resolve(region)
+        if df is not None:
+            df["Region"] = region
+
+        if region in REGIONS_TO_EXCLUDE:
+            if verbose:
+                print(f"  - Skipping excluded region: {region}")
+            continue
+
+        # Check if this year-region combination has already been processed
+        year_region_key = f"{year}-{region}"
+        if year_region_key in processed_combinations:
+            if verbose:
+                print(f"  - Skipping duplicate year-region combination: {year}-{region}")
+                print(f"    Already processed from file: {processed_combinations[year_region_key]}")
+            continue
+
+        # Mark this combination as processed, even if its table fails below
+        processed_combinations[year_region_key] = source_name(file_path)
+
+        if verbose:
+            print(f"  - Year extracted: {year}, Region extracted: {region} (standardized)")
+
+        if error is not None:
+            print(f"Error processing {file_path}: {str(error)}")
+            continue
+
+        if verbose:
+            print(f"  - Successfully processed with {len(df)} rows")
+        yield df
+
+    # Sources that have disappeared drop out of the cache, and their rows with them
+    if cache is not None:
+        cache.prune(excel_files)
+        cache.save()
+
+
+def ingest_files(excel_files, workers: int = 1, verbose: bool = True, cache=None, executor=None):
+    """
+    Parse COB workbooks and apply the first-file-wins year/region dedup.
+
+    excel_files may mix workbook paths and zip archive members (see
+    immigration.sources); members are read from memory and recorded as
+    "archive.zip:member.xls" in processed_combinations.
+
+    Files are parsed on a pool of `workers` processes (serially when
+    workers <= 1), but results are consumed in the order of excel_files so
+    the kept files and the row order match a serial run exactly.
+
+    With a ParseCache, only workbooks that are new or changed since the
+    last run are parsed; the dedup still runs over every file.
+
+    Returns (all_dataframes, processed_combinations), where
+    processed_combinations maps "year-region" to the file it was taken from.
+    """
+    processed_combinations = {}
+    all_dataframes = list(iter_ingested(excel_files, workers=workers, verbose=verbose, cache=cache,
+                                        processed_combinations=processed_combinations,
+                                        executor=executor))
+    return all_dataframes, processed_combinations
@@ -0,0 +1,113 @@
+# immigration/manifest.py
+
+import os
+import json
+import pickle
+
+from .sources import source_digest, source_key, source_stat
+
+# Bump when the parse result format changes so old caches are discarded
+CACHE_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+FRAMES_DIR = "frames"
+
+
+class ParseCache:
+    """
+    On-disk cache of parsed workbooks for incremental merges.
+
+    The manifest records, per source (a file path or a zip archive member),
+    the size, mtime and content hash, plus the name of the pickled parse
+    result. A source whose size and mtime are unchanged is reused without
+    being read; otherwise its content hash decides whether the cached result
+    still applies.
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        self.frames_dir = os.path.join(cache_dir, FRAMES_DIR)
+        self.manifest_path = os.path.join(cache_dir, MANIFEST_NAME)
+        self.manifest = {}
+        self._pending_digests = {}
+        self.hits = 0
+        self.misses = 0
+
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, "r", encoding="utf-8") as fh:
+                saved = json.load(fh)
+            if saved.get("version") == CACHE_VERSION:
+                self.manifest = saved["files"]
+
+    def _frame_path(self, digest: str) -> str:
+        return os.path.join(self.frames_dir, f"{digest}.pkl")
+
+    def fresh(self, source: str) -> bool:
+        """Whether a cached parse result for source is still valid."""
+        key = source_key(source)
+        entry = self.manifest.get(key)
+        size, mtime = source_stat(source)
+
+        if entry is None or entry["size"] != size or entry["mtime"] != mtime:
+            digest = source_digest(source)
+            if entry is None or entry["sha256"] != digest:
+                self._pending_digests[key] = digest
+                self.misses += 1
+                return False
+            # Touched but not changed
+            entry["size"] = size
+            entry["mtime"] = mtime
+
+        if not os.path.exists(self._frame_path(entry["sha256"])):
+            self._pending_digests[key] = entry["sha256"]
+            self.misses += 1
+            return False
+
+        self.hits += 1
+        return True
+
+    def load(self, source: str):
+        """Read the cached parse result of a source that fresh() accepted."""
+        entry = self.manifest[source_key(source)]
+        with open(self._frame_path(entry["sha256"]), "rb") as fh:
+            return pickle.load(fh)
+
+    def lookup(self, source: str):
+        """Return the cached parse result for source, or None if stale."""
+        return self.load(source) if self.fresh(source) else None
+
+    def store(self, source: str, result):
+        """Record a fresh parse result for source."""
+        key = source_key(source)
+        digest = self._pending_digests.pop(key, None) or source_digest(source)
+        size, mtime = source_stat(source)
+
+        os.makedirs(self.frames_dir, exist_ok=True)
+        with open(self._frame_path(digest), "wb") as fh:
+            pickle.dump(result, fh, protocol=pickle.HIGHEST_PROTOCOL)
+
+        self.manifest[key] = {
+            "size": size,
+            "mtime": mtime,
+            "sha256": digest,
+        }
+
+    def prune(self, sources):
+        """Forget sources that are no longer present and delete orphaned frames."""
+        keep = {source_key(path) for path in sources}
+        for key in list(self.manifest):
+            if key not in keep:
+                del self.manifest[key]
+
+        if os.path.isdir(self.frames_dir):
+            referenced = {f"{entry['sha256']}.pkl" for entry in self.manifest.values()}
+            for name in os.listdir(self.frames_dir):
+                if name not in referenced:
+                    os.remove(os.path.join(self.frames_dir, name))
+
+    def save(self):
+        """Write the manifest atomically."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            json.dump({"version": CACHE_VERSION, "files": self.manifest}, fh, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
@@ -0,0 +1,249 @@
+# immigration/partitions.py
+
+import json
+import os
+import shutil
+from urllib.parse import quote, unquote
+
+import pandas as pd
+
+from .schema import conform
+from .storage import filter_frame, filter_values
+
+# Columns a dataset directory is partitioned by, outermost first:
+# <dir>/Year=2010/Group=Occupation/part-0.parquet
+PARTITION_COLUMNS = ["Year", "Group"]
+PART_FILE = "part-0.parquet"
+
+# Per-partition statistics next to the partitions
+STATS_NAME = "_partitions.json"
+STATS_VERSION = 1
+
+
+def partition_dir(values) -> str:
+    """Relative directory of a partition, hive style with URI-encoded values."""
+    return "/".join(f"{col}={quote(str(value), safe=' ')}" for col, value in zip(PARTITION_COLUMNS, values))
+
+
+def parse_partition_dir(relative: str) -> dict:
+    """Column -> value of a partition directory; Year as an integer."""
+    values = {}
+    for part in relative.split("/"):
+        col, value = part.split("=", 1)
+        values[col] = int(unquote(value)) if col == "Year" else unquote(value)
+    return values
+
+
+def read_stats(path: str) -> dict:
+    """The statistics file of a partitioned dataset."""
+    stats_path = os.path.join(path, STATS_NAME)
+    if not os.path.exists(stats_path):
+        raise FileNotFoundError(f"{path} is not a partitioned dataset written by the merge (no {STATS_NAME})")
+    with open(stats_path, "r", encoding="utf-8") as fh:
+        stats = json.load(fh)
+    if stats.get("version") != STATS_VERSION:
+        raise ValueError(f"{stats_path} has version {stats.get('version')}, expected {STATS_VERSION}")
+    return stats
+
+
+def partition_stats(path: str) -> pd.DataFrame:
+    """One row per partition: its Year and Group, rows, bytes, distinct regions and subgroups, and Total."""
+    rows = []
+    for relative, entry in sorted(read_stats(path)["partitions"].items()):
+        rows.append({
+            **parse_partition_dir(relative),
+            "rows": entry["rows"],
+            "bytes": entry["bytes"],
+            "regions": len(entry["regions"]),
+            "subgroups": len(entry["subgroups"]),
+            "total_min": entry["total_min"],
+            "total_max": entry["total_max"],
+            "total_sum": entry["total_sum"],
+        })
+    return pd.DataFrame(rows)
+
+
+class PartitionedWriter:
+    """
+    Writer of a merged dataset as a directory of Parquet files, one per
+    (Year, Group) partition, with the same interface as DatasetWriter.
+
+    Every partition gets one ParquetWriter, so chunks are written as they
+    come and only the current one is in memory. Files are written under a
+    temporary name and swapped in by close(), which also writes the
+    per-partition statistics (rows, bytes, regions, subgroups and the
+    range and sum of Total) used to prune partitions on read. Partitions
+    not written are deleted, unless keep_partitions is set: then only the
+    partitions of this run (e.g. a new fiscal year) are replaced, with the
+    columns of the existing dataset. A `with` block that raises calls
+    abort() instead of close(), so a failed merge leaves the existing
+    partitions and statistics as they were.
+    """
+
+    def __init__(self, path: str, categories=None, keep_partitions: bool = False):
+        self.path = path
+        self.categories = categories
+        self.keep_partitions = keep_partitions
+        self.columns = None
+        self.rows = 0
+        self._schema = None
+        self._writers = {}
+        self._stats = {}
+        if keep_partitions and os.path.exists(os.path.join(path, STATS_NAME)):
+            self.columns = read_stats(path)["columns"] or None
+        os.makedirs(path, exist_ok=True)
+
+    def append(self, df: pd.DataFrame):
+        """Write one chunk, split by partition."""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if self.columns is None:
+            self.columns = list(df.columns)
+        df = conform(df.reindex(columns=self.columns), self.categories)
+        self.rows += len(df)
+
+        for values, part in df.groupby(PARTITION_COLUMNS, observed=True, sort=False):
+            relative = partition_dir(values)
+            table = pa.Table.from_pandas(part.drop(columns=PARTITION_COLUMNS), preserve_index=False)
+            if self._schema is None:
+                self._schema = table.schema
+            if relative not in self._writers:
+                part_dir = os.path.join(self.path, relative)
+                os.makedirs(part_dir, exist_ok=True)
+                tmp_path = os.path.join(part_dir, PART_FILE + ".tmp")
+                self._writers[relative] = (pq.ParquetWriter(tmp_path, self._schema), tmp_path)
+                self._stats[relative] = {"rows": 0, "regions": set(), "subgroups": set(),
+                                         "total_min": None, "total_max": None, "total_sum": 0.0}
+            self._writers[relative][0].write_table(table.cast(self._schema))
+            self._update_stats(self._stats[relative], part)
+
+    @staticmethod
+    def _update_stats(entry: dict, part: pd.DataFrame):
+        entry["rows"] += len(part)
+        entry["regions"].update(part["Region"].dropna().astype(str))
+        entry["subgroups"].update(part["Subgroup"].dropna().astype(str))
+        total = pd.to_numeric(part["Total"], errors="coerce").dropna()
+        if len(total):
+            low, high = float(total.min()), float(total.max())
+            entry["total_min"] = low if entry["total_min"] is None else min(entry["total_min"], low)
+            entry["total_max"] = high if entry["total_max"] is None else max(entry["total_max"], high)
+            entry["total_sum"] += float(total.astype("float64").sum())
+
+    def close(self):
+        """Swap the new partitions in and write the statistics; returns the path."""
+        if self._writers is None:
+            return self.path
+        previous = {}
+        if os.path.exists(os.path.join(self.path, STATS_NAME)):
+            previous = read_stats(self.path)["partitions"]
+        partitions = dict(previous) if self.keep_partitions else {}
+        if not self.keep_partitions:
+            for relative in previous:
+                if relative not in self._writers:
+                    shutil.rmtree(os.path.join(self.path, relative), ignore_errors=True)
+                    # The Year directory goes with its last Group
+                    try:
+                        os.rmdir(os.path.dirname(os.path.join(self.path, relative)))
+                    except OSError:
+                        pass
+
+        for relative, (writer, tmp_path) in self._writers.items():
+            writer.close()
+            file_path = os.path.join(self.path, relative, PART_FILE)
+            os.replace(tmp_path, file_path)
+            entry = self._stats[relative]
+            partitions[relative] = {
+                **entry,
+                "file": f"{relative}/{PART_FILE}",
+                "bytes": os.path.getsize(file_path),
+                "regions": sorted(entry["regions"]),
+                "subgroups": sorted(entry["subgroups"]),
+            }
+
+        stats = {"version": STATS_VERSION, "columns": self.columns or [],
+                 "partitions": dict(sorted(partitions.items()))}
+        tmp_path = os.path.join(self.path, STATS_NAME + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            json.dump(stats, fh, indent=1)
+        os.replace(tmp_path, os.path.join(self.path, STATS_NAME))
+        self._writers = None
+        return self.path
+
+    def abort(self):
+        """Delete the partitions written so far, keeping the previous dataset."""
+        if self._writers is None:
+            return
+        for relative, (writer, tmp_path) in self._writers.items():
+            writer.close()
+            os.remove(tmp_path)
+            # Directories of partitions that did not exist before go too
+            part_dir = os.path.join(self.path, relative)
+            for directory in (part_dir, os.path.dirname(part_dir)):
+                try:
+                    os.rmdir(directory)
+                except OSError:
+                    break
+        self._writers = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
+
+
+def _prune(entry: dict, values: dict, filters: dict) -> bool:
+    """Whether a partition cannot hold a row matching filters."""
+    for col, wanted in filters.items():
+        if wanted is None:
+            continue
+        if col in values:
+            present = [values[col]]
+        elif col == "Region":
+            present = entry["regions"]
+        elif col == "Subgroup":
+            present = entry["subgroups"]
+        else:
+            continue
+        if not filter_values(pd.Series(present), wanted).any():
+            return True
+    return False
+
+
+def read_partitioned(path: str, columns=None, filters=None) -> pd.DataFrame:
+    """
+    Read a partitioned dataset with the canonical dtypes. Partitions are
+    skipped from their directory (Year, Group) and their statistics
+    (Region, Subgroup) when they cannot match `filters` (see filter_frame),
+    and only the requested columns are read from the others.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    stats = read_stats(path)
+    filters = filters or {}
+    wanted_columns = list(columns) if columns is not None else stats["columns"]
+    needed = list(dict.fromkeys(wanted_columns + [col for col, wanted in filters.items() if wanted is not None]))
+    file_columns = [col for col in needed if col not in PARTITION_COLUMNS]
+
+    tables = []
+    for relative, entry in stats["partitions"].items():
+        values = parse_partition_dir(relative)
+        if _prune(entry, values, filters):
+            continue
+        table = pq.ParquetFile(os.path.join(path, entry["file"])).read(columns=file_columns)
+        if "Year" in needed:
+            table = table.append_column("Year", pa.array([values["Year"]] * table.num_rows, pa.int16()))
+        if "Group" in needed:
+            table = table.append_column("Group", pa.array([values["Group"]] * table.num_rows).dictionary_encode())
+        tables.append(table)
+
+    if not tables:
+        return conform(pd.DataFrame(columns=wanted_columns))
+    # Dictionaries of the partitions are unified into one set of categories
+    df = pa.concat_tables(tables, promote_options="permissive").to_pandas()
+    return conform(filter_frame(df, filters)[wanted_columns].reset_index(drop=True))
@@ -0,0 +1,190 @@
+# immigration/pipeline.py
+
+import os
+import tempfile
+from collections import Counter
+
+import pandas as pd
+
+from .impute import RunningImputer
+from .ingest import iter_ingested
+from .profiling import stage
+from .sections import SECTIONS, tag_sections
+from .schema import CATEGORY_COLUMNS
+from .storage import dataset_writer
+
+# Subgroup rows that are not a breakdown of the section
+DROP_SUBGROUPS = ["New arrivals", "Adjustments of status"]
+
+# Continent and total regions removed after imputation; their rows still
+# count towards the means used for 'D'
+FINAL_EXCLUDED_REGIONS = [
+    "Total",
+    "FY Africa",
+    "FY Asia",
+    "FY Caribbean",
+    "FY Central America",
+    "FY Europe",
+    "FY North America (Includes Caribbean and Central America)",
+    "FY Oceania",
+    "FY South America"
+]
+
+DEDUP_KEYS = ["Year", "Region", "Group", "Subgroup"]
+
+# Raw workbook rows per chunk; peak memory scales with this, not the corpus
+DEFAULT_CHUNK_ROWS = 50_000
+
+
+def iter_chunks(frames, chunk_rows: int = DEFAULT_CHUNK_ROWS):
+    """Concatenate consecutive tables into chunks of at least chunk_rows rows."""
+    buffer, rows = [], 0
+    for df in frames:
+        buffer.append(df)
+        rows += len(df)
+        if rows >= chunk_rows:
+            yield pd.concat(buffer, ignore_index=True)
+            buffer, rows = [], 0
+    if buffer:
+        yield pd.concat(buffer, ignore_index=True)
+
+
+def select_sections(df: pd.DataFrame, sections=SECTIONS, drop_subgroups=DROP_SUBGROUPS) -> pd.DataFrame:
+    """
+    Tag the sections of whole workbook tables and keep the rows of the
+    sections with a group (by default the Age, Occupation and Broad Class of
+    Admission breakdowns), less the subgroups matching drop_subgroups. A
+    chunk must hold complete files, since a section runs from its header to
+    the next one.
+    """
+    df = tag_sections(df.dropna(how="all"), sections)
+    df = df[df["Group"].notna()]
+    subgroup = df["Subgroup"]
+    dropped = pd.Series(False, index=df.index)
+    for label in drop_subgroups:
+        dropped |= subgroup.str.contains(label, case=False, na=False)
+    return df[~dropped & (subgroup != "Total")]
+
+
+def merge_workbooks(excel_files, output_path: str, workers: int = 1, cache=None,
+                    hierarchy="region-group", chunk_rows: int = DEFAULT_CHUNK_ROWS,
+                    verbose: bool = True, sections=SECTIONS, drop_subgroups=DROP_SUBGROUPS,
+                    impute: bool = True, executor=None, profiler=None, normalizer=None,
+                    keep_partitions: bool = False) -> dict:
+    """
+    Merge COB workbooks into one dataset with bounded memory.
+
+    The stages are generators: workbooks are parsed (see iter_ingested),
+    grouped into chunks of whole files, tagged and filtered, and their
+    count columns converted by a RunningImputer. Cleaned chunks are spooled
+    to a temporary directory next to the output while the imputer gathers
+    its running aggregates; a second pass fills the withheld cells of each
+    spooled chunk and appends it to output_path through a DatasetWriter (a
+    PartitionedWriter for a directory output, see storage.dataset_writer).
+    Only one chunk is in memory at a time (except for an .xlsx output).
+
+    sections and drop_subgroups select the rows kept (see select_sections).
+    Without impute, withheld cells stay NaN, still flagged in the Imputed
+    column. executor optionally replaces the process pool used to parse.
+    A RunProfiler, when given, times every stage and workbook. normalizer
+    standardizes region names (see iter_ingested). With keep_partitions, a
+    partitioned output only has the partitions of the merged years
+    replaced; the others are kept. It needs impute off: the imputed means
+    pool every year of a region, so the kept partitions would be stale.
+
+    Returns a summary dict with the number of files, rows, years and regions.
+    """
+    if keep_partitions and impute:
+        raise ValueError("keep_partitions needs impute=False: imputed means span the years of the kept partitions")
+    processed_combinations = {}
+    imputer = RunningImputer(hierarchy=hierarchy)
+    vocabularies = {col: set() for col in CATEGORY_COLUMNS}
+    excluded = Counter()
+    merged_rows = filtered_rows = duplicates = 0
+
+    out_dir = os.path.dirname(output_path)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+
+    with tempfile.TemporaryDirectory(prefix=".merge_spool_", dir=out_dir or None) as spool_dir:
+        spooled = []
+        tables = iter_ingested(excel_files, workers=workers, verbose=verbose, cache=cache,
+                               processed_combinations=processed_combinations, executor=executor,
+                               profiler=profiler, normalizer=normalizer)
+        for chunk in iter_chunks(tables, chunk_rows):
+            merged_rows += len(chunk)
+            with stage(profiler, "tagging") as counts:
+                chunk = select_sections(chunk, sections, drop_subgroups)
+                counts["rows"] = len(chunk)
+            filtered_rows += len(chunk)
+
+            # Drop rows with missing or invalid data, then flag the 'D' cells
+            with stage(profiler, "imputation") as counts:
+                chunk = chunk.dropna(subset=["Total", "Male", "Female"], how="all")
+                chunk = imputer.add(chunk)
+                chunk = chunk.drop(columns=["Characteristic"], errors="ignore")
+                counts["rows"] = len(chunk)
+
+            with stage(profiler, "dedup") as counts:
+                is_excluded = chunk["Region"].isin(FINAL_EXCLUDED_REGIONS)
+                excluded.update(chunk.loc[is_excluded, "Region"])
+                chunk = chunk[~is_excluded]
+
+                # Year and Region identify a file, so duplicates never span chunks
+                is_duplicate = chunk.duplicated(DEDUP_KEYS)
+                duplicates += int(is_duplicate.sum())
+                chunk = chunk[~is_duplicate]
+                counts["rows"] = len(chunk)
+
+            with stage(profiler, "spool") as counts:
+                for col in CATEGORY_COLUMNS:
+                    vocabularies[col].update(chunk[col].dropna().unique())
+                spool_path = os.path.join(spool_dir, f"chunk_{len(spooled):05d}.pkl")
+                chunk.to_pickle(spool_path)
+                spooled.append(spool_path)
+                counts["rows"] = len(chunk)
+
+        if not spooled:
+            print("No data was successfully processed. Check the file paths and file format.")
+            return {"files": 0, "rows": 0, "years": 0, "regions": 0}
+
+        if verbose:
+            print(f"Merged {len(processed_combinations)} files with {merged_rows} rows in {len(spooled)} chunks")
+            print(f"Filtered dataframe has {filtered_rows} rows after removing unwanted sections and rows")
+        if impute:
+            with stage(profiler, "imputation"):
+                imputer.finish(verbose=verbose)
+
+        if excluded and verbose:
+            print("\nExcluding the following continent and total regions:")
+            for region, count in sorted(excluded.items()):
+                print(f"  - {region}: {count} rows")
+        if duplicates:
+            print(f"WARNING: Removed {duplicates} duplicate entries from the final dataset.")
+        elif verbose:
+            print("No duplicates found in the final dataset.")
+
+        categories = {col: sorted(labels) for col, labels in vocabularies.items()}
+        years = set()
+        with dataset_writer(output_path, categories=categories, keep_partitions=keep_partitions) as writer:
+            for spool_path in spooled:
+                with stage(profiler, "spool"):
+                    chunk = pd.read_pickle(spool_path)
+                if impute:
+                    with stage(profiler, "imputation"):
+                        chunk = imputer.fill(chunk)
+                with stage(profiler, "write") as counts:
+                    years.update(chunk["Year"].unique())
+                    writer.append(chunk)
+                    os.remove(spool_path)
+                    counts["rows"] = len(chunk)
+            # Finishing the file (or writing the whole .xlsx) is part of the write
+            with stage(profiler, "write"):
+                writer.close()
+
+    return {
+        "files": len(processed_combinations),
+        "rows": writer.rows,
+        "years": len(years),
+        "regions": len(vocabularies["Region"]),
+    }
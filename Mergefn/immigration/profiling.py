@@ -0,0 +1,220 @@
+# immigration/profiling.py
+
+import csv
+import json
+import os
+import statistics
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Stages of a merge and of a forecast run, in report order
+STAGES = [
+    "discovery", "catalog", "metadata read", "table read", "footer trim", "tagging",
+    "imputation", "dedup", "spool", "write", "load", "fit", "backtest", "render",
+]
+
+# Code profilers run_profiler can wrap a run in
+PROFILERS = ["cprofile", "pyinstrument"]
+
+# A workbook is slow when its parse takes SLOW_FACTOR times the median parse
+# time and at least SLOW_MIN_SECONDS
+SLOW_FACTOR = 10.0
+SLOW_MIN_SECONDS = 0.05
+
+
+def peak_rss_mb(children: bool = False):
+    """Peak resident set size of this process (or of its finished children) in MB."""
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF)
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return usage.ru_maxrss * scale / 2**20
+
+
+class RunProfiler:
+    """
+    Wall time, CPU time, rows and peak RSS per pipeline stage, plus the
+    parse time of every workbook.
+
+    Stages timed in this process use stage(); stages that run inside the
+    parse workers are reported by add() with the worker's own timings, so
+    their wall and CPU times are totals over all workers. Peak RSS is the
+    high-water mark of this process when a stage last ended.
+    """
+
+    def __init__(self, slow_factor: float = SLOW_FACTOR, slow_min_seconds: float = SLOW_MIN_SECONDS):
+        self.slow_factor = slow_factor
+        self.slow_min_seconds = slow_min_seconds
+        self.started = datetime.now()
+        self.stages = {}
+        self.files = []
+
+    def _record(self, name: str) -> dict:
+        record = self.stages.get(name)
+        if record is None:
+            record = self.stages[name] = {"calls": 0, "wall_s": 0.0, "cpu_s": 0.0, "rows": 0,
+                                          "peak_rss_mb": None, "in_workers": False}
+        return record
+
+    @contextmanager
+    def stage(self, name: str):
+        """
+        Time a block as one call of stage `name`. The yielded dict takes the
+        rows the block produced: record["rows"] = len(df).
+        """
+        counts = {"rows": 0}
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield counts
+        finally:
+            self.add(name, time.perf_counter() - wall, time.process_time() - cpu, counts["rows"])
+            self.stages[name]["peak_rss_mb"] = peak_rss_mb()
+
+    def add(self, name: str, wall_s: float, cpu_s: float, rows: int = 0, in_workers: bool = False):
+        """Add one call of stage `name` measured elsewhere."""
+        record = self._record(name)
+        record["calls"] += 1
+        record["wall_s"] += wall_s
+        record["cpu_s"] += cpu_s
+        record["rows"] += rows
+        record["in_workers"] = record["in_workers"] or in_workers
+
+    def add_file(self, source: str, timings=None, rows: int = 0, status: str = "parsed"):
+        """
+        Record one workbook. timings maps stage name -> (wall, cpu, rows)
+        as measured by the parse worker; None when the file was not parsed
+        (status "cached", "failed", ...). rows is the size of its table.
+        """
+        timings = timings or {}
+        for name, (wall_s, cpu_s, stage_rows) in timings.items():
+            self.add(name, wall_s, cpu_s, stage_rows, in_workers=True)
+        self.files.append({
+            "source": source,
+            "status": status,
+            "wall_s": sum(wall for wall, _, _ in timings.values()),
+            "cpu_s": sum(cpu for _, cpu, _ in timings.values()),
+            "rows": rows,
+        })
+
+    def slow_files(self) -> list:
+        """Parsed workbooks that took far longer than the median one."""
+        parsed = [record for record in self.files if record["wall_s"] > 0]
+        if not parsed:
+            return []
+        threshold = max(self.slow_factor * statistics.median(r["wall_s"] for r in parsed),
+                        self.slow_min_seconds)
+        return sorted((record for record in parsed if record["wall_s"] >= threshold),
+                      key=lambda record: record["wall_s"], reverse=True)
+
+    def report(self) -> dict:
+        """The run report: stages in STAGES order, files, slow files and totals."""
+        order = {name: i for i, name in enumerate(STAGES)}
+        stages = [{"stage": name, **record} for name, record in
+                  sorted(self.stages.items(), key=lambda item: order.get(item[0], len(order)))]
+        slow = {record["source"] for record in self.slow_files()}
+        return {
+            "started": self.started.isoformat(timespec="seconds"),
+            "wall_s": (datetime.now() - self.started).total_seconds(),
+            "peak_rss_mb": peak_rss_mb(),
+            "peak_rss_children_mb": peak_rss_mb(children=True),
+            "stages": stages,
+            "files": [{**record, "slow": record["source"] in slow} for record in self.files],
+            "slow_files": sorted(slow),
+        }
+
+    def write(self, path: str) -> dict:
+        """
+        Write the report to path: .json holds everything; .csv holds the
+        stage table, with the per-file table in <name>_files.csv.
+        """
+        report = self.report()
+        out_dir = os.path.dirname(path)
+        if out_dir:
+            os.makedirs(out_dir, exist_ok=True)
+
+        if path.lower().endswith(".csv"):
+            _write_csv(path, report["stages"])
+            _write_csv(os.path.splitext(path)[0] + "_files.csv", report["files"])
+        else:
+            with open(path, "w", encoding="utf-8") as fh:
+                json.dump(report, fh, indent=2)
+        return report
+
+    def summary(self) -> str:
+        """Stage table and slow workbooks as printable text."""
+        report = self.report()
+        lines = [f"{'stage':<16}{'calls':>8}{'wall s':>10}{'cpu s':>10}{'rows':>10}{'peak MB':>10}"]
+        for record in report["stages"]:
+            rss = f"{record['peak_rss_mb']:.1f}" if record["peak_rss_mb"] is not None else "-"
+            name = record["stage"] + (" *" if record["in_workers"] else "")
+            lines.append(f"{name:<16}{record['calls']:>8}{record['wall_s']:>10.3f}"
+                         f"{record['cpu_s']:>10.3f}{record['rows']:>10}{rss:>10}")
+        if any(record["in_workers"] for record in report["stages"]):
+            lines.append("* summed over the parse workers")
+        for record in self.slow_files():
+            lines.append(f"Slow workbook: {record['source']} ({record['wall_s']:.3f} s)")
+        return "\n".join(lines)
+
+
+def _write_csv(path: str, rows: list):
+    with open(path, "w", newline="", encoding="utf-8") as fh:
+        if not rows:
+            return
+        writer = csv.DictWriter(fh, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+@contextmanager
+def stage(profiler, name: str):
+    """profiler.stage(name), or a no-op block when profiler is None."""
+    if profiler is None:
+        yield {"rows": 0}
+    else:
+        with profiler.stage(name) as counts:
+            yield counts
+
+
+@contextmanager
+def run_profiler(kind, output_path: str):
+    """
+    Run the block under a code profiler and write its output: cProfile
+    stats (read them with pstats or snakeviz) or a pyinstrument HTML page.
+    kind None profiles nothing.
+    """
+    if kind is None:
+        yield
+        return
+    if kind == "cprofile":
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            profiler.dump_stats(output_path)
+    elif kind == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            raise ImportError("The pyinstrument profiler needs the pyinstrument package: pip install pyinstrument")
+        profiler = Profiler()
+        profiler.start()
+        try:
+            yield
+        finally:
+            profiler.stop()
+            with open(output_path, "w", encoding="utf-8") as fh:
+                fh.write(profiler.output_html())
+    else:
+        raise ValueError(f"Unknown profiler {kind!r}; expected one of {PROFILERS}")
+    print(f"{kind} profile saved to {output_path}")
@@ -0,0 +1,164 @@
+# immigration/regions.py
+
+import csv
+import difflib
+import json
+import os
+import re
+from collections import Counter
+
+import pandas as pd
+
+from .schema import vocabulary
+
+# Variant -> standardized country name. Edit this file to teach the merge a
+# new spelling; canonical names (the Region vocabulary) need no entry.
+ALIASES_PATH = os.path.join(os.path.dirname(__file__), "region_aliases.json")
+
+# Continents and totals, published as their own workbooks
+ROLLUP_REGIONS = [
+    "Total",
+    "Africa",
+    "Asia",
+    "Caribbean",
+    "Central America",
+    "Europe",
+    "North America (Includes Caribbean and Central America)",
+    "Oceania",
+    "South America"
+]
+
+# Unknown names closer than this to a known one (difflib ratio of their
+# sorted tokens) are resolved to it, and reported
+FUZZY_CUTOFF = 0.9
+
+# Words that never tell two countries apart
+_STOPWORDS = {"the", "of", "and"}
+_FORMER = re.compile(r"\((?:former|formerly)\b[^)]*\)", re.IGNORECASE)
+_FORMER_NAME = re.compile(r"\(formerly\s+([^)]+)\)", re.IGNORECASE)
+_NON_WORD = re.compile(r"[^\w]+")
+
+
+def name_tokens(name: str) -> tuple:
+    """
+    Sorted lower-case words of a region name, without punctuation,
+    stopwords or a "(former...)" note: "Gambia, The" -> ("gambia",).
+    """
+    name = _FORMER.sub(" ", str(name)).casefold().replace("&", " and ")
+    return tuple(sorted(word for word in _NON_WORD.split(name) if word and word not in _STOPWORDS))
+
+
+class RegionNormalizer:
+    """
+    Maps the country names of the workbooks to one standardized spelling.
+
+    The index is built once: every canonical name (the Region vocabulary,
+    the rollups and the alias targets) and every alias of the alias file,
+    by exact spelling and by name_tokens. An unknown name is resolved, in
+    order, by its tokens; by the old name of a "New (formerly Old)" name,
+    so its series continues; then by the closest known name above
+    FUZZY_CUTOFF. Results are cached per name, and every name outside the
+    alias index is counted for report().
+    """
+
+    def __init__(self, aliases_path: str = ALIASES_PATH, fuzzy_cutoff: float = FUZZY_CUTOFF):
+        with open(aliases_path, "r", encoding="utf-8") as fh:
+            self.aliases = json.load(fh)
+        self.fuzzy_cutoff = fuzzy_cutoff
+
+        canonical = set(vocabulary().get("Region", [])) | set(ROLLUP_REGIONS) | set(self.aliases.values())
+        self.exact = {name: name for name in canonical}
+        self.exact.update(self.aliases)
+
+        # Token keys shared by names of different countries are ambiguous
+        by_tokens = {}
+        for name, target in self.exact.items():
+            by_tokens.setdefault(name_tokens(name), set()).add(target)
+        self.by_tokens = {tokens: targets.pop() for tokens, targets in by_tokens.items() if len(targets) == 1}
+        self._fuzzy_keys = {" ".join(tokens): target for tokens, target in self.by_tokens.items()}
+
+        self._resolved = {}
+        self.matches = {}
+        self.counts = Counter()
+
+    def resolve(self, name):
+        """Standardized spelling of one name; an unmatched name is kept as it is."""
+        if not isinstance(name, str):
+            return name
+        target = self.exact.get(name)
+        if target is not None:
+            return target
+
+        self.counts[name] += 1
+        if name not in self._resolved:
+            self._resolved[name] = self._match(name)
+        return self._resolved[name]
+
+    def _match(self, name: str) -> str:
+        tokens = name_tokens(name)
+        target = self.by_tokens.get(tokens)
+        if target is not None:
+            self.matches[name] = (target, "tokens", 1.0)
+            return target
+
+        former = _FORMER_NAME.search(name)
+        if former is not None:
+            target = self.exact.get(former.group(1).strip()) or self.by_tokens.get(name_tokens(former.group(1)))
+            if target is not None:
+                self.matches[name] = (target, "former name", 1.0)
+                return target
+
+        key = " ".join(tokens)
+        close = difflib.get_close_matches(key, self._fuzzy_keys, n=1, cutoff=self.fuzzy_cutoff)
+        if close:
+            target = self._fuzzy_keys[close[0]]
+            score = difflib.SequenceMatcher(None, key, close[0]).ratio()
+            self.matches[name] = (target, "fuzzy", score)
+            return target
+
+        self.matches[name] = (name, "unmatched", 0.0)
+        return name
+
+    def normalize(self, regions: pd.Series) -> pd.Series:
+        """Standardize a Region column, resolving each distinct name once."""
+        names = regions.astype(object)
+        mapping = {name: self.resolve(name) for name in pd.unique(names)}
+        return names.map(mapping)
+
+    def unmatched(self) -> list:
+        """Names that were not in the alias index, as report rows."""
+        return [
+            {"name": name, "resolved": target, "method": method, "score": round(score, 3),
+             "occurrences": self.counts[name]}
+            for name, (target, method, score) in sorted(self.matches.items())
+        ]
+
+    def report(self, path: str) -> list:
+        """
+        Write the names resolved by tokens or fuzzily, or left unmatched, to
+        a CSV file to review; add the right ones to the alias file.
+        """
+        rows = self.unmatched()
+        with open(path, "w", newline="", encoding="utf-8") as fh:
+            writer = csv.DictWriter(fh, fieldnames=["name", "resolved", "method", "score", "occurrences"])
+            writer.writeheader()
+            writer.writerows(rows)
+        return rows
+
+
+_default = None
+
+
+def default_normalizer() -> RegionNormalizer:
+    """The normalizer of ALIASES_PATH, built once per process."""
+    global _default
+    if _default is None:
+        _default = RegionNormalizer()
+    return _default
+
+
+def standardize_region_name(region):
+    """
+    Standardize region names to handle inconsistencies across different years
+    """
+    return default_normalizer().resolve(region)
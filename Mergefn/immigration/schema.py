@@ -0,0 +1,112 @@
+# immigration/schema.py
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+COUNT_COLUMNS = ["Total", "Male", "Female", "Unknown"]
+CATEGORY_COLUMNS = ["Region", "Group", "Subgroup"]
+
+# Bit i is set when COUNT_COLUMNS[i] was withheld ('D') and holds an imputed mean
+# (NaN in a merge run without imputation)
+IMPUTED_COLUMN = "Imputed"
+
+# Canonical dtypes of the merged dataset. Counts are float32: imputed means
+# are fractional, and float32 holds every published count exactly.
+SCHEMA = {
+    **{col: "float32" for col in COUNT_COLUMNS},
+    "Year": "int16",
+    **{col: "category" for col in CATEGORY_COLUMNS},
+    IMPUTED_COLUMN: "uint8",
+}
+
+# Known labels of every category column, sorted. Labels missing from the
+# file are added to a dataset's categories rather than dropped.
+VOCABULARY_PATH = os.path.join(os.path.dirname(__file__), "vocabulary.json")
+
+_vocabulary = None
+
+
+def vocabulary() -> dict:
+    """Category column -> its known labels, read once from VOCABULARY_PATH."""
+    global _vocabulary
+    if _vocabulary is None:
+        with open(VOCABULARY_PATH, "r", encoding="utf-8") as fh:
+            _vocabulary = json.load(fh)
+    return _vocabulary
+
+
+def category_dtype(column: str, labels=()) -> pd.CategoricalDtype:
+    """Categorical dtype of a category column: its vocabulary plus `labels`."""
+    known = set(vocabulary().get(column, []))
+    extra = {label for label in labels if pd.notna(label)}
+    return pd.CategoricalDtype(sorted(known | extra))
+
+
+def imputed_flag(column: str) -> int:
+    """Bit of IMPUTED_COLUMN for a count column."""
+    return 1 << COUNT_COLUMNS.index(column)
+
+
+def conform(df: pd.DataFrame, categories=None) -> pd.DataFrame:
+    """
+    Cast a merged dataset to the canonical schema: int16 Year, Region,
+    Group and Subgroup categorical over their fixed vocabularies, float32
+    counts and a uint8 IMPUTED_COLUMN. Columns outside the schema are kept.
+
+    categories optionally maps a category column to the labels to use
+    instead of those found in df, so chunks of one dataset share the same
+    categories. Count columns that still hold 'D' or '-' markers (unimputed
+    merges) stay strings.
+    """
+    df = df.copy()
+    categories = categories or {}
+    for col in df.columns:
+        if col == "Year":
+            df[col] = pd.to_numeric(df[col]).astype(SCHEMA[col])
+        elif col in CATEGORY_COLUMNS:
+            labels = categories[col] if col in categories else df[col].dropna().unique()
+            df[col] = df[col].astype(object).astype(category_dtype(col, labels))
+        elif col in COUNT_COLUMNS and pd.api.types.is_numeric_dtype(df[col]):
+            df[col] = df[col].astype(SCHEMA[col])
+        elif col == IMPUTED_COLUMN:
+            df[col] = df[col].fillna(0).astype(SCHEMA[col])
+        elif df[col].dtype == object:
+            df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+    return df
+
+
+def legacy_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    The same data with the dtypes the merge used to produce: Year as the
+    digit string of the title row, object strings and float64 counts.
+    """
+    df = df.copy()
+    for col in df.columns:
+        if col == "Year":
+            df[col] = df[col].astype(str).astype(object)
+        elif col in CATEGORY_COLUMNS:
+            df[col] = df[col].astype(object)
+        elif col in COUNT_COLUMNS and pd.api.types.is_numeric_dtype(df[col]):
+            df[col] = df[col].astype(np.float64)
+    return df.drop(columns=[IMPUTED_COLUMN], errors="ignore")
+
+
+def memory_report(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Bytes per column (deep) with the legacy dtypes and with the canonical
+    schema, plus their ratio; the last row is the whole frame.
+    """
+    legacy, canonical = legacy_dtypes(df), conform(df)
+    report = pd.DataFrame({
+        "legacy_dtype": legacy.dtypes.astype(str),
+        "legacy_bytes": legacy.memory_usage(deep=True, index=False),
+        "canonical_dtype": canonical.dtypes.astype(str),
+        "canonical_bytes": canonical.memory_usage(deep=True, index=False),
+    }).reindex(canonical.columns)
+    report = report.fillna({"legacy_dtype": "", "legacy_bytes": 0})
+    report.loc["total"] = ["", report["legacy_bytes"].sum(), "", report["canonical_bytes"].sum()]
+    report["ratio"] = report["legacy_bytes"] / report["canonical_bytes"]
+    return report
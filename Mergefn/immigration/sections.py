@@ -0,0 +1,82 @@
+# immigration/sections.py
+
+import numpy as np
+import pandas as pd
+
+# Section headers of a COB profile table. The header of a section is the
+# first row in a file whose Characteristic equals `match` (exact) or
+# contains it (case-insensitive regex). Every header ends the section before
+# it; only sections with a `group` are kept, under that Group name.
+SECTION_LIBRARY = {
+    "Total": {"name": "Total", "match": "Total", "exact": True, "group": "Total"},
+    "Age": {"name": "Age", "match": "Age", "exact": True, "group": "Age"},
+    "Marital": {"name": "Marital", "match": "Marital", "exact": False, "group": "Marital Status"},
+    "Occupation": {"name": "Occupation", "match": "Occupation", "exact": True, "group": "Occupation"},
+    "Admission": {"name": "Admission", "match": "class of admission", "exact": False, "group": "Broad Class of Admission"},
+    "States": {"name": "States", "match": "states of permanent residence|Leading states|Top 20 states", "exact": False, "group": "Leading States"},
+}
+
+
+def section_definitions(names, library=SECTION_LIBRARY) -> list:
+    """
+    Section list for tag_sections that keeps the sections in `names`.
+    Every other section of the library is still located, with group None,
+    so it ends the kept section before it.
+    """
+    unknown = set(names) - set(library)
+    if unknown:
+        raise ValueError(f"Unknown sections {sorted(unknown)}; expected some of {list(library)}")
+    return [section if section["name"] in names else {**section, "group": None}
+            for section in library.values()]
+
+
+# The breakdowns kept in the merged dataset
+SECTIONS = section_definitions(["Age", "Occupation", "Admission"])
+
+
+def _header_mask(characteristic: pd.Series, section: dict) -> np.ndarray:
+    """Rows whose Characteristic marks the start of `section`."""
+    if section["exact"]:
+        return (characteristic == section["match"]).to_numpy()
+    try:
+        return characteristic.str.contains(section["match"], case=False, na=False, regex=True).to_numpy()
+    except AttributeError:
+        # No string values at all
+        return np.zeros(len(characteristic), dtype=bool)
+
+
+def tag_sections(df: pd.DataFrame, sections=SECTIONS, file_keys=("Year", "Region")) -> pd.DataFrame:
+    """
+    Assign Group and Subgroup to every row in one vectorized pass.
+
+    Rows are split into source files by `file_keys`. Within each file the
+    first header row of every section is located, the section label is
+    forward-filled down to the next header, and rows of kept sections get
+    Group = the section's group and Subgroup = their Characteristic. Header
+    rows and rows outside a kept section get None.
+    """
+    df = df.copy()
+    characteristic = df["Characteristic"]
+    file_id = df.groupby(list(file_keys), sort=False, dropna=False).ngroup().to_numpy()
+
+    # Label each header row with the index of its section. Earlier entries
+    # in `sections` win when one row matches several headers.
+    header = np.full(len(df), -1, dtype=np.int64)
+    for code in reversed(range(len(sections))):
+        mask = _header_mask(characteristic, sections[code])
+        # Only the first matching row of each file is a header
+        seen = pd.Series(mask).groupby(file_id).cumsum().to_numpy()
+        header[mask & (seen == 1)] = code
+
+    # Carry the most recent header down its section, without crossing files
+    labels = pd.Series(np.where(header >= 0, header, np.nan))
+    section_code = labels.groupby(file_id).ffill().to_numpy()
+    section_code[header >= 0] = np.nan
+
+    groups = np.array([section["group"] for section in sections] + [None], dtype=object)
+    codes = np.where(np.isnan(section_code), len(sections), section_code).astype(np.int64)
+    group = groups[codes]
+
+    df["Group"] = group
+    df["Subgroup"] = characteristic.where(pd.notna(group), None).astype(object)
+    return df
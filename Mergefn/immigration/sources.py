@@ -0,0 +1,122 @@
+# immigration/sources.py
+
+import os
+import glob
+import fnmatch
+import hashlib
+import zipfile
+from datetime import datetime
+
+# A workbook inside an archive is addressed as "<archive path>::<member name>"
+MEMBER_SEPARATOR = "::"
+
+# Profile workbooks only; this skips the COBList index sheet in each archive
+MEMBER_PATTERN = "*cobbook*.xls"
+
+
+def member_source(archive_path: str, member: str) -> str:
+    """Build the source id of a workbook inside a zip archive."""
+    return f"{archive_path}{MEMBER_SEPARATOR}{member}"
+
+
+def split_source(source: str):
+    """Return (archive, member) for a zip member, or (path, None) for a file."""
+    if MEMBER_SEPARATOR in source:
+        archive_path, member = source.split(MEMBER_SEPARATOR, 1)
+        return archive_path, member
+    return source, None
+
+
+def source_name(source: str) -> str:
+    """Short provenance label: the file name, or 'archive.zip:member.xls'."""
+    path, member = split_source(source)
+    if member is None:
+        return os.path.basename(path)
+    return f"{os.path.basename(path)}:{os.path.basename(member)}"
+
+
+# Open archives per process id: a handle inherited through fork shares its
+# file offset with the parent, so worker processes must open their own
+_ARCHIVES = {}
+
+
+def _open_archive(archive_path: str) -> zipfile.ZipFile:
+    key = (os.getpid(), archive_path)
+    archive = _ARCHIVES.get(key)
+    if archive is None:
+        archive = _ARCHIVES[key] = zipfile.ZipFile(archive_path)
+    return archive
+
+
+def list_archive_members(archive_path: str) -> list:
+    """Return the source ids of the profile workbooks in a zip archive."""
+    with zipfile.ZipFile(archive_path) as archive:
+        members = [
+            info.filename for info in archive.infolist()
+            if not info.is_dir()
+            and fnmatch.fnmatch(os.path.basename(info.filename).lower(), MEMBER_PATTERN)
+        ]
+    return [member_source(archive_path, member) for member in members]
+
+
+def find_sources(paths) -> list:
+    """
+    Expand folders, .xls files and .zip archives into workbook sources.
+
+    A folder contributes its *.xls files in glob order followed by the
+    members of its *.zip archives. Sources listed twice are kept once.
+    """
+    if isinstance(paths, str):
+        paths = [paths]
+
+    sources = []
+    for path in paths:
+        if os.path.isdir(path):
+            sources.extend(glob.glob(os.path.join(path, "*.xls")))
+            for archive_path in glob.glob(os.path.join(path, "*.zip")):
+                sources.extend(list_archive_members(archive_path))
+        # is_zipfile alone can mistake an .xls for an archive
+        elif path.lower().endswith(".zip") and zipfile.is_zipfile(path):
+            sources.extend(list_archive_members(path))
+        else:
+            sources.append(path)
+
+    return list(dict.fromkeys(sources))
+
+
+def read_source_bytes(source: str) -> bytes:
+    """Return the raw bytes of a workbook, read from memory for zip members."""
+    path, member = split_source(source)
+    if member is None:
+        with open(path, "rb") as fh:
+            return fh.read()
+    return _open_archive(path).read(member)
+
+
+def source_key(source: str) -> str:
+    """Stable manifest key for a source."""
+    path, member = split_source(source)
+    path = os.path.abspath(path)
+    return path if member is None else member_source(path, member)
+
+
+def source_stat(source: str):
+    """Return (size, mtime) of a file or of a zip member."""
+    path, member = split_source(source)
+    if member is None:
+        stat = os.stat(path)
+        return stat.st_size, stat.st_mtime
+
+    info = _open_archive(path).getinfo(member)
+    return info.file_size, datetime(*info.date_time).timestamp()
+
+
+def source_digest(source: str, chunk_size: int = 1 << 20) -> str:
+    """Return the SHA-256 hex digest of a source's contents."""
+    path, member = split_source(source)
+    digest = hashlib.sha256()
+    opener = open(path, "rb") if member is None else _open_archive(path).open(member)
+    with opener as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
@@ -0,0 +1,267 @@
+# immigration/storage.py
+
+import os
+
+import pandas as pd
+
+from .schema import conform
+
+# File extension -> format name
+FORMATS = {
+    ".parquet": "parquet",
+    ".feather": "feather",
+    ".arrow": "feather",
+    ".xlsx": "excel",
+    ".xls": "excel",
+    ".csv": "csv",
+    ".sqlite": "sqlite",
+    ".db": "sqlite",
+    ".duckdb": "duckdb",
+}
+
+# Extensions that can be read but not written: pandas has no .xls writer
+READ_ONLY = (".xls",)
+
+# Formats written to an indexed table of an embedded database (immigration.database)
+DATABASE_FORMATS = ("sqlite", "duckdb")
+
+# A path without an extension is a directory of Parquet files partitioned by
+# Year and Group (immigration.partitions)
+PARTITIONED = "partitioned"
+
+# Filter of read_dataset -> query_dataset argument, for databases
+DATABASE_FILTERS = {"Region": "regions", "Group": "groups", "Subgroup": "subgroups", "Year": "years"}
+
+
+def storage_format(path: str, write: bool = False) -> str:
+    """
+    Return the format name for a dataset path from its extension. With
+    write, extensions that can only be read (READ_ONLY) are refused too.
+    """
+    ext = os.path.splitext(path.rstrip("/\\"))[1].lower()
+    if not ext:
+        return PARTITIONED
+    if ext not in FORMATS:
+        raise ValueError(f"Unsupported dataset format '{ext}', expected one of {sorted(FORMATS)}")
+    if write and ext in READ_ONLY:
+        raise ValueError(f"Cannot write '{ext}' datasets, only read them; use .xlsx for Excel output")
+    return FORMATS[ext]
+
+
+def filter_values(values: pd.Series, wanted) -> pd.Series:
+    """
+    Mask of the values matching a filter: a range of years matches between
+    its bounds, a list or set any of its items, anything else by equality.
+    """
+    if isinstance(wanted, range) and wanted.step == 1:
+        return values.between(wanted.start, wanted.stop - 1)
+    if isinstance(wanted, (str, int)) or not hasattr(wanted, "__iter__"):
+        wanted = [wanted]
+    return values.isin(list(wanted))
+
+
+def filter_frame(df: pd.DataFrame, filters) -> pd.DataFrame:
+    """Rows of df matching every filter of `filters` (column -> filter, None matches all)."""
+    mask = pd.Series(True, index=df.index)
+    for col, wanted in (filters or {}).items():
+        if wanted is not None:
+            mask &= filter_values(df[col], wanted).to_numpy()
+    return df if mask.all() else df[mask]
+
+
+def write_dataset(df: pd.DataFrame, path: str) -> str:
+    """
+    Write the merged dataset, choosing the format from the file extension.
+    Parquet and Feather files keep the canonical dtypes (see schema.conform);
+    .sqlite/.db and .duckdb files hold an indexed table (immigration.database)
+    and a path without an extension becomes a partitioned directory
+    (immigration.partitions).
+    """
+    fmt = storage_format(path, write=True)
+    if fmt == PARTITIONED:
+        with dataset_writer(path) as writer:
+            writer.append(df)
+        return path
+    out_dir = os.path.dirname(path)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+
+    if fmt == "parquet":
+        conform(df).to_parquet(path, index=False)
+    elif fmt == "feather":
+        conform(df).reset_index(drop=True).to_feather(path)
+    elif fmt in DATABASE_FORMATS:
+        from .database import DatabaseWriter
+
+        writer = DatabaseWriter(path, fmt)
+        writer.append(conform(df))
+        writer.close()
+    elif fmt == "excel":
+        df.to_excel(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+    return path
+
+
+def dataset_writer(path: str, categories=None, keep_partitions: bool = False):
+    """
+    Writer for a dataset path: a PartitionedWriter for a partitioned
+    directory (keep_partitions keeps the partitions it does not write),
+    otherwise a DatasetWriter.
+    """
+    if storage_format(path, write=True) == PARTITIONED:
+        from .partitions import PartitionedWriter
+
+        return PartitionedWriter(path, categories=categories, keep_partitions=keep_partitions)
+    return DatasetWriter(path, categories=categories)
+
+
+class DatasetWriter:
+    """
+    Append-only writer of a merged dataset, one chunk at a time.
+
+    Parquet chunks become row groups and Feather chunks record batches, so
+    only the current chunk is held in memory. CSV chunks are appended to the
+    file and database chunks to its table, which is indexed on close();
+    Excel cannot be appended to and is written on close(). The first chunk
+    fixes the columns. Columnar and database chunks are conformed to the
+    canonical schema; pass `categories` (see schema.conform) so every chunk
+    has the same categories.
+
+    Files are written under a temporary name and swapped in by close(). A
+    `with` block that raises calls abort() instead, so a failed merge
+    leaves the previous dataset as it was.
+    """
+
+    def __init__(self, path: str, categories=None):
+        self.path = path
+        self.format = storage_format(path, write=True)
+        self.categories = categories
+        self.columns = None
+        self.rows = 0
+        self._schema = None
+        self._writer = None
+        self._sink = None
+        self._pending = []
+        self._tmp_path = path + ".tmp"
+
+        out_dir = os.path.dirname(path)
+        if out_dir:
+            os.makedirs(out_dir, exist_ok=True)
+
+    def append(self, df: pd.DataFrame):
+        """Write one chunk."""
+        first = self.columns is None
+        if first:
+            self.columns = list(df.columns)
+        df = df.reindex(columns=self.columns)
+        self.rows += len(df)
+
+        if self.format in ("parquet", "feather"):
+            import pyarrow as pa
+
+            table = pa.Table.from_pandas(conform(df, self.categories), preserve_index=False)
+            if first:
+                self._open_arrow_writer(table.schema)
+            self._writer.write_table(table.cast(self._schema))
+        elif self.format in DATABASE_FORMATS:
+            if first:
+                from .database import DatabaseWriter
+
+                self._writer = DatabaseWriter(self.path, self.format)
+            self._writer.append(conform(df, self.categories))
+        elif self.format == "excel":
+            self._pending.append(df)
+        else:
+            df.to_csv(self._tmp_path, mode="w" if first else "a", header=first, index=False)
+
+    def _open_arrow_writer(self, schema):
+        self._schema = schema
+        if self.format == "parquet":
+            import pyarrow.parquet as pq
+
+            self._writer = pq.ParquetWriter(self._tmp_path, schema)
+        else:
+            import pyarrow as pa
+
+            self._sink = pa.OSFile(self._tmp_path, "wb")
+            self._writer = pa.ipc.new_file(self._sink, schema)
+
+    def _close_writer(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self._sink is not None:
+            self._sink.close()
+            self._sink = None
+
+    def close(self):
+        """Finish the file and swap it in; returns its path."""
+        self._close_writer()
+        if self._pending:
+            pd.concat(self._pending, ignore_index=True).to_excel(self.path, index=False)
+            self._pending = []
+        if os.path.exists(self._tmp_path):
+            os.replace(self._tmp_path, self.path)
+        return self.path
+
+    def abort(self):
+        """Drop what was written, leaving any previous dataset at path untouched."""
+        if self.format in DATABASE_FORMATS and self._writer is not None:
+            self._writer.abort()
+            self._writer = None
+        self._close_writer()
+        self._pending = []
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
+
+
+def read_dataset(path: str, columns=None, filters=None) -> pd.DataFrame:
+    """
+    Read a merged dataset written by write_dataset (or an older .xlsx/.csv)
+    with the canonical dtypes. Columnar formats, databases and partitioned
+    directories only read the requested columns.
+
+    filters maps columns to the values to keep (see filter_values), e.g.
+    {"Group": "Occupation", "Year": range(2010, 2023)}. Partitioned
+    directories skip the partitions that cannot match and databases query
+    the matching rows only; other formats are filtered after reading.
+    """
+    fmt = storage_format(path)
+    filters = {col: wanted for col, wanted in (filters or {}).items() if wanted is not None}
+    read_columns = columns
+    if columns is not None:
+        read_columns = list(dict.fromkeys(list(columns) + list(filters)))
+
+    if fmt == PARTITIONED:
+        from .partitions import read_partitioned
+
+        return read_partitioned(path, columns=columns, filters=filters)
+    if fmt in DATABASE_FORMATS:
+        from .database import query_dataset
+
+        pushed = {DATABASE_FILTERS[col]: wanted for col, wanted in filters.items() if col in DATABASE_FILTERS}
+        df = query_dataset(path, columns=read_columns, engine=fmt, **pushed)
+        df = filter_frame(df, {col: wanted for col, wanted in filters.items() if col not in DATABASE_FILTERS})
+    else:
+        if fmt == "parquet":
+            df = pd.read_parquet(path, columns=read_columns)
+        elif fmt == "feather":
+            df = pd.read_feather(path, columns=read_columns)
+        elif fmt == "excel":
+            df = pd.read_excel(path, usecols=read_columns)
+        else:
+            df = pd.read_csv(path, usecols=read_columns)
+        df = filter_frame(conform(df), filters)
+    if filters:
+        df = df.reset_index(drop=True)
+    return df if columns is None else df[list(columns)]
@@ -0,0 +1,105 @@
+# immigration/workbook.py
+
+import math
+from datetime import time
+
+import numpy as np
+import pandas as pd
+import xlrd
+from pandas.io.parsers import TextParser
+
+from .footer import sheet_footer_row
+from .sources import read_source_bytes, split_source
+
+# Row layout of a DHS COB profile sheet
+TITLE_ROW = 0
+REGION_ROW = 3
+HEADER_ROW = 5
+
+
+def open_sheet(file_path: str, contents: bytes = None):
+    """
+    Open a workbook once and return its first sheet. Members of zip
+    archives ("archive.zip::member.xls") are decoded from memory, as are
+    the workbook's bytes when the caller has already read them.
+    """
+    archive_path, member = split_source(file_path)
+    if contents is None and member is not None:
+        contents = read_source_bytes(file_path)
+    if contents is None:
+        book = xlrd.open_workbook(file_path, on_demand=True)
+    else:
+        book = xlrd.open_workbook(file_contents=contents, on_demand=True)
+    return book.sheet_by_index(0)
+
+
+def parse_year(title_text) -> str:
+    """Join the digits of the title row, e.g. '... Fiscal Year 2006' -> '2006'."""
+    return "".join(filter(str.isdigit, str(title_text)))
+
+
+def parse_region(region_text) -> str:
+    """Take the name after the colon of the 'Region/Country: X' row."""
+    return region_text.split(":")[-1].strip()
+
+
+def read_header(sheet):
+    """Return the (year, region) pair from the title and region cells."""
+    year = parse_year(sheet.cell_value(TITLE_ROW, 0))
+    region = parse_region(sheet.cell_value(REGION_ROW, 0))
+    return year, region
+
+
+def _cell_value(value, typ, datemode):
+    """Convert an xlrd cell the same way pandas' xlrd reader does."""
+    if typ == xlrd.XL_CELL_NUMBER:
+        if math.isfinite(value):
+            as_int = int(value)
+            if as_int == value:
+                return as_int
+    elif typ == xlrd.XL_CELL_DATE:
+        try:
+            value = xlrd.xldate.xldate_as_datetime(value, datemode)
+        except OverflowError:
+            return value
+        # Dates on the epoch are times only
+        epoch = (1904, 1, 1) if datemode else (1899, 12, 31)
+        if value.timetuple()[0:3] == epoch:
+            value = time(value.hour, value.minute, value.second, value.microsecond)
+    elif typ == xlrd.XL_CELL_ERROR:
+        return np.nan
+    elif typ == xlrd.XL_CELL_BOOLEAN:
+        return bool(value)
+    return value
+
+
+def read_sheet_table(sheet, header_row: int = HEADER_ROW, end_row: int = None) -> pd.DataFrame:
+    """
+    Build the data table from an already open sheet.
+
+    Equivalent to pd.read_excel(path, skiprows=header_row, engine="xlrd"),
+    but works on the cells already decoded by open_sheet. Rows from end_row
+    on (e.g. the footer, see sheet_footer_row) are never converted.
+    """
+    datemode = sheet.book.datemode
+    end_row = sheet.nrows if end_row is None else min(end_row, sheet.nrows)
+    rows = [
+        [_cell_value(value, typ, datemode)
+         for value, typ in zip(sheet.row_values(i), sheet.row_types(i))]
+        for i in range(header_row, end_row)
+    ]
+    return TextParser(rows, header=0).read()
+
+
+def read_workbook(file_path: str, trim: bool = False):
+    """
+    Read a COB workbook in a single pass.
+
+    Returns (year, region, df): the year and the raw region name from the
+    header cells, and the data table below them, stopped at its footer
+    notes when trim is set.
+    """
+    sheet = open_sheet(file_path)
+    year, region = read_header(sheet)
+    end_row = sheet_footer_row(sheet, HEADER_ROW + 1) if trim else None
+    return year, region, read_sheet_table(sheet, end_row=end_row)
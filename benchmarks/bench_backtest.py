@@ -0,0 +1,92 @@
+# benchmarks/bench_backtest.py
+#
+# Regression check and timing for the rolling-origin backtest. On the
+# merged dataset, backtest_batch (batched solves per group of series
+# observed in the same years) must give the MAE and MAPE of refitting every
+# series at every origin with numpy.polyfit, and the same table with a
+# process pool. Exits with status 1 on a mismatch. Run from the repository
+# root:
+#
+#   python -m benchmarks.bench_backtest --workers 4
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from Forecast_Occupation import BACKTEST_DEGREES, MIN_TRAIN_YEARS, backtest_batch, load_data, series_matrix
+
+
+def best_time(func, repeat):
+    """Best wall time of `repeat` calls and the result of the last one."""
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def backtest_loop(matrix, degrees, horizon, min_train):
+    """One polyfit per series, degree and origin: the loop backtest_batch replaces."""
+    rows = []
+    for series in matrix.columns:
+        observed = matrix[series].dropna()
+        years, values = observed.index.to_numpy(dtype=float), observed.to_numpy(dtype=float)
+        if len(years) <= min_train:
+            continue
+        for degree in degrees:
+            errors, pct_errors = [], []
+            for end in range(max(min_train, degree + 1), len(years)):
+                train_years = years[:end]
+                center, scale = train_years.mean(), max(train_years.std(), 1.0)
+                coefs = np.polyfit((train_years - center) / scale, values[:end], degree)
+                targets = (years > train_years[-1]) & (years <= train_years[-1] + horizon)
+                predicted = np.clip(np.polyval(coefs, (years[targets] - center) / scale), 0, None)
+                for forecast, actual in zip(predicted, values[targets]):
+                    errors.append(abs(forecast - actual))
+                    if actual != 0:
+                        pct_errors.append(abs(forecast - actual) / abs(actual))
+            if errors:
+                rows.append((*series, degree, np.mean(errors), 100 * np.mean(pct_errors) if pct_errors else np.nan))
+    keys = list(matrix.columns.names)
+    table = pd.DataFrame(rows, columns=[*keys, 'Degree', 'MAE', 'MAPE'])
+    return table.sort_values(keys + ['Degree'], kind='stable').reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Check and time the rolling-origin backtest')
+    parser.add_argument('--data', default=os.path.join("output merged file", "allconfinal.xlsx"), help='Merged dataset')
+    parser.add_argument('--horizon', type=int, default=5, help='Years ahead scored at each origin (default: 5)')
+    parser.add_argument('--workers', type=int, default=2, help='Processes of the pooled run (default: 2)')
+    parser.add_argument('--repeat', type=int, default=3, help='Repetitions, best time is reported (default: 3)')
+    args = parser.parse_args()
+
+    df = load_data(args.data)
+    matrix = series_matrix(df)
+    print(f"{matrix.shape[1]} country x occupation series, {matrix.shape[0]} years, degrees {BACKTEST_DEGREES}")
+
+    loop_s, expected = best_time(lambda: backtest_loop(matrix, BACKTEST_DEGREES, args.horizon, MIN_TRAIN_YEARS), 1)
+    batch_s, actual = best_time(lambda: backtest_batch(df, horizon=args.horizon), args.repeat)
+    pool_s, pooled = best_time(lambda: backtest_batch(df, horizon=args.horizon, workers=args.workers), args.repeat)
+
+    failures = []
+    try:
+        pd.testing.assert_frame_equal(expected, actual[expected.columns], check_dtype=False, rtol=1e-6)
+    except AssertionError as e:
+        failures.append(f"batched backtest differs from the polyfit loop: {e}")
+    try:
+        pd.testing.assert_frame_equal(actual, pooled)
+    except AssertionError as e:
+        failures.append(f"pooled backtest differs: {e}")
+
+    print(f"  polyfit loop       : {loop_s:8.3f} s")
+    print(f"  batched            : {batch_s:8.3f} s  ({loop_s / batch_s:.1f}x)")
+    print(f"  batched, {args.workers} workers: {pool_s:8.3f} s  ({loop_s / pool_s:.1f}x, pool start included)")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,68 @@
+# benchmarks/bench_catalog.py
+#
+# Regression check and timing for the workbook catalog. The files the
+# catalog keeps must be exactly those the merge's first-file-wins dedup
+# takes (ingest_files), in the same order; the header-only scan, the
+# refresh of an unchanged catalog and a plan query are then timed against
+# parsing every workbook. Exits with status 1 on a mismatch. Run from the
+# repository root:
+#
+#   python -m benchmarks.bench_catalog --workers 4
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from Mergefn.immigration.catalog import Catalog
+from Mergefn.immigration.ingest import ingest_files
+from Mergefn.immigration.sources import find_sources, source_name
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Check and time the workbook catalog')
+    parser.add_argument('--input', nargs='+', default=[os.path.join("input dataset", "all cont"),
+                                                     os.path.join("input dataset", "Zip files")],
+                        help='Folders, workbooks or zip archives to catalog')
+    parser.add_argument('--workers', type=int, default=1, help='Processes reading headers and parsing (default: 1)')
+    args = parser.parse_args()
+
+    sources = find_sources(args.input)
+    if not sources:
+        raise SystemExit(f"No workbooks found in {args.input}")
+
+    start = time.perf_counter()
+    _, processed = ingest_files(sources, workers=args.workers, verbose=False)
+    parse_s = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        with Catalog(os.path.join(tmp_dir, "catalog.sqlite")) as catalog:
+            start = time.perf_counter()
+            kept = catalog.refresh(sources, workers=args.workers)
+            scan_s = time.perf_counter() - start
+
+            start = time.perf_counter()
+            catalog.refresh(sources, workers=args.workers)
+            refresh_s = time.perf_counter() - start
+
+            start = time.perf_counter()
+            planned = catalog.plan()
+            plan_s = time.perf_counter() - start
+            counts = catalog.counts()
+
+    failures = []
+    if [source_name(source) for source in kept] != list(processed.values()):
+        failures.append("the catalog keeps other files than the merge's dedup")
+    if planned != kept:
+        failures.append("plan() differs from the files refresh() kept")
+    print(f"{len(sources)} workbooks: " + ", ".join(f"{n} {status}" for status, n in sorted(counts.items())))
+
+    print(f"  parse every workbook   : {parse_s:8.3f} s")
+    print(f"  catalog, header scan   : {scan_s:8.3f} s  ({parse_s / scan_s:.1f}x)")
+    print(f"  catalog, unchanged     : {refresh_s:8.3f} s")
+    print(f"  plan query             : {plan_s * 1000:8.3f} ms")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,154 @@
+# benchmarks/bench_correlation.py
+#
+# Regression check and timing for the batch demographic correlations. The
+# pooled whole-span panels of immigration.correlation must equal the EDA
+# notebook's age x occupation, age x admission and occupation x admission
+# heatmaps, and every per-country window panel must equal the same pandas
+# pivot, merge and corr() run one country and window at a time, which is
+# then timed against the batch. Exits with status 1 on a mismatch. Run from
+# the repository root:
+#
+#   python -m benchmarks.bench_correlation --data "output merged file/allconfinal.xlsx" --window 5
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from Mergefn.immigration.correlation import (ADMISSION, AGE, ALL_REGIONS, MIN_ROWS, PAIRS, age_group,
+                                             correlation_matrix, correlation_panels, read_correlations,
+                                             write_correlations)
+from Mergefn.immigration.coverage import Coverage
+from Mergefn.immigration.storage import read_dataset
+
+
+def legacy_grouped(df, group):
+    """(Year, Region) x category table of one group, as the notebook pivots it."""
+    group_df = df[df['Group'] == group].copy()
+    if group == AGE:
+        group_df['Category'] = group_df['Subgroup'].apply(age_group)
+    else:
+        group_df['Category'] = group_df['Subgroup'].str.strip()
+    return group_df.groupby(['Year', 'Region', 'Category'])['Total'].sum().unstack().fillna(0)
+
+
+def legacy_merged(df, group1, group2):
+    grouped1, grouped2 = legacy_grouped(df, group1), legacy_grouped(df, group2)
+    merged = grouped1.merge(grouped2, on=['Year', 'Region'], how='inner', suffixes=('_1', '_2'))
+    return merged, list(grouped1.columns), list(grouped2.columns)
+
+
+def legacy_panel(merged, columns1, columns2):
+    """merged.corr() restricted to the pair, as in the notebook's heatmap cells."""
+    corr = merged.corr()
+    return corr.loc[columns1, columns2]
+
+
+def legacy_windows(df, window, min_rows):
+    """Every per-country window panel with pandas, one country and window at a time."""
+    panels = {}
+    for group1, group2 in PAIRS:
+        merged, columns1, columns2 = legacy_merged(df, group1, group2)
+        years = merged.index.get_level_values('Year')
+        regions = merged.index.get_level_values('Region')
+        for start in range(years.min(), years.max() - window + 2):
+            in_window = (years >= start) & (years <= start + window - 1)
+            for region in regions.unique():
+                rows = merged[in_window & (regions == region)]
+                if len(rows) >= min_rows:
+                    panels[region, start, group1, group2] = legacy_panel(rows, columns1, columns2)
+    return panels
+
+
+def max_difference(expected, actual):
+    """Largest absolute difference, or inf when the NaN cells differ."""
+    expected, actual = expected.to_numpy(dtype=float), actual.to_numpy(dtype=float)
+    if expected.shape != actual.shape or not np.array_equal(np.isnan(expected), np.isnan(actual)):
+        return float("inf")
+    return float(np.nanmax(np.abs(expected - actual), initial=0.0))
+
+
+def best_time(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Check and time the batch demographic correlations')
+    parser.add_argument('--data', default=os.path.join("output merged file", "allconfinal.xlsx"), help='Merged dataset')
+    parser.add_argument('--window', type=int, default=5, help='Years per window of the per-country panels (default: 5)')
+    parser.add_argument('--workers', type=int, default=2, help='Processes of the fanned-out run (default: 2)')
+    parser.add_argument('--repeat', type=int, default=3, help='Repetitions, best time is reported (default: 3)')
+    parser.add_argument('--tolerance', type=float, default=1e-6, help='Largest accepted correlation difference (default: 1e-6)')
+    args = parser.parse_args()
+
+    # The notebook's df_common: string labels, years after 2005, common countries
+    df = read_dataset(args.data)
+    df = df.astype({'Region': str, 'Group': str, 'Subgroup': str, 'Total': float})
+    df = df[df['Year'].astype(int) > 2005]
+    df = df[df['Region'].isin(Coverage.from_frame(df).common_countries())]
+    print(f"{len(df)} rows from {args.data}, best of {args.repeat}")
+
+    failures = []
+    pooled = correlation_panels(df)
+    for group1, group2 in PAIRS:
+        expected = legacy_panel(*legacy_merged(df, group1, group2))
+        # The notebook reorders the age brackets only for display
+        actual = correlation_matrix(pooled, group1, group2).loc[expected.index, expected.columns]
+        difference = max_difference(expected, actual)
+        if difference > args.tolerance:
+            failures.append(f"pooled {group1} x {group2} differs from the notebook by {difference:.2e}")
+
+    start = time.perf_counter()
+    expected = legacy_windows(df, args.window, MIN_ROWS)
+    legacy_s = time.perf_counter() - start
+    batch_s = best_time(lambda: correlation_panels(df, window=args.window), args.repeat)
+    panels = correlation_panels(df, window=args.window)
+    fanned_s = best_time(lambda: correlation_panels(df, window=args.window, workers=args.workers), args.repeat)
+    fanned = correlation_panels(df, window=args.window, workers=args.workers)
+    if not fanned.equals(panels):
+        failures.append(f"workers={args.workers} differs from the serial run")
+
+    country_panels = panels[panels['Region'] != ALL_REGIONS]
+    keys = country_panels[['Region', 'Start', 'Group1', 'Group2']].drop_duplicates()
+    if len(keys) != len(expected):
+        failures.append(f"{len(keys)} per-country panels, expected {len(expected)}")
+    worst = 0.0
+    for (region, start, group1, group2), panel in country_panels.groupby(
+            ['Region', 'Start', 'Group1', 'Group2'], observed=True):
+        key = (region, start, group1, group2)
+        if key not in expected:
+            failures.append(f"unexpected panel {key}")
+            continue
+        table = panel.pivot(index='Category1', columns='Category2', values='Correlation')
+        worst = max(worst, max_difference(expected[key], table.loc[expected[key].index, expected[key].columns]))
+    if worst > args.tolerance:
+        failures.append(f"per-country panels differ from pandas by up to {worst:.2e}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_correlations(panels, os.path.join(tmp, "correlations.parquet"))
+        size = os.path.getsize(path)
+        if not read_correlations(path).equals(panels):
+            failures.append("panels read back differ")
+        india = read_correlations(path, regions="India", groups=[AGE, ADMISSION])
+        if set(india['Region']) - {"India"} or set(india['Group2']) != {ADMISSION}:
+            failures.append("filtered read returned other panels")
+
+    n_panels = len(keys) + len(panels[panels['Region'] == ALL_REGIONS][['Start', 'Group1', 'Group2']].drop_duplicates())
+    print(f"  {n_panels} panels of {args.window}-year windows, {len(panels)} cells, {size / 1e6:.1f} MB Parquet")
+    print(f"  pandas, one panel at a time : {legacy_s:8.3f} s")
+    print(f"  batched                     : {batch_s:8.3f} s  ({legacy_s / batch_s:.0f}x)")
+    print(f"  batched, {args.workers} workers          : {fanned_s:8.3f} s")
+    print(f"  largest difference from pandas: {worst:.1e}")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
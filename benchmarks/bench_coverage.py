@@ -0,0 +1,134 @@
+# benchmarks/bench_coverage.py
+#
+# Regression check and timing for the year x region coverage of the merged
+# dataset. The availability table, missing years, common countries and
+# country lookups of immigration.coverage must equal those of the EDA
+# notebook's grid merge, per-year Counter loop and str.contains scan; both
+# are then timed. Exits with status 1 on a mismatch. Run from the
+# repository root:
+#
+#   python -m benchmarks.bench_coverage --data "output merged file/allconfinal.xlsx"
+
+import argparse
+import os
+import sys
+import time
+from collections import Counter
+
+import pandas as pd
+
+from Mergefn.immigration.coverage import Coverage
+from Mergefn.immigration.storage import read_dataset
+
+# Lookups of the notebook's search_country_years
+SEARCH_TERMS = ["Cambodia", "india", "Congo", "Guinea", "Sudan", "Republic", "Saint", "Atlantis"]
+
+
+def legacy_coverage(df):
+    """Availability table, missing years and common countries as EDA.ipynb computes them."""
+    all_years = sorted(df['Year'].unique(), key=int)
+    all_continents = sorted(df['Region'].unique())
+    continent_year_counts = df.groupby(['Year', 'Region']).size().reset_index(name='Count')
+    complete_grid = pd.DataFrame(
+        [(year, continent) for year in all_years for continent in all_continents],
+        columns=['Year', 'Region']
+    )
+    result = pd.merge(complete_grid, continent_year_counts, on=['Year', 'Region'], how='left')
+    result['Count'] = result['Count'].fillna(0)
+    result['Has_Data'] = (result['Count'] > 0).astype(int)
+    availability_table = result.pivot(index='Region', columns='Year', values='Has_Data').fillna(0).astype(int)
+
+    missing = result[result['Has_Data'] == 0][['Year', 'Region']]
+    missing_by_region = {}
+    for region in all_continents:
+        region_missing = missing[missing['Region'] == region]
+        if not region_missing.empty:
+            missing_by_region[region] = sorted(region_missing['Year'].tolist())
+
+    years = sorted(df['Year'].unique())
+    num_years = len(years)
+    countries_by_year = {}
+    for year in years:
+        countries_by_year[year] = set(df[df['Year'] == year]['Region'].unique())
+    country_year_counts = Counter()
+    for year_set in countries_by_year.values():
+        for country in year_set:
+            country_year_counts[country] += 1
+    common_countries = [country for country, count in country_year_counts.items() if count >= num_years - 2]
+    return availability_table, missing_by_region, sorted(common_countries)
+
+
+def legacy_search(df, search_term):
+    """Years found by the notebook's search_country_years."""
+    matched = df[df['Region'].str.contains(search_term, case=False, na=False)]
+    return sorted(matched['Year'].unique())
+
+
+def coverage_results(df):
+    coverage = Coverage.from_frame(df)
+    return coverage.availability(), coverage.missing_years(), coverage.common_countries()
+
+
+def best_time(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Check and time the coverage of the merged dataset')
+    parser.add_argument('--data', default=os.path.join("output merged file", "allconfinal.xlsx"), help='Merged dataset')
+    parser.add_argument('--repeat', type=int, default=3, help='Repetitions, best time is reported (default: 3)')
+    args = parser.parse_args()
+
+    # As loaded by the notebook: string labels, years after 2005
+    df = read_dataset(args.data)
+    df = df.astype({'Region': str, 'Group': str, 'Subgroup': str})
+    df = df[df['Year'].astype(int) > 2005]
+    print(f"{len(df)} rows from {args.data}, best of {args.repeat}")
+
+    failures = []
+    expected = legacy_coverage(df)
+    actual = coverage_results(df)
+    availability = expected[0].copy()
+    availability.columns = availability.columns.astype(int)
+    if not availability.equals(actual[0].rename_axis(index="Region", columns="Year")):
+        failures.append("availability table differs")
+    if {region: [int(year) for year in years] for region, years in expected[1].items()} != actual[1]:
+        failures.append("missing years differ")
+    if expected[2] != actual[2]:
+        failures.append(f"common countries differ: {len(expected[2])} expected, {len(actual[2])}")
+
+    coverage = Coverage.from_frame(df)
+    for term in SEARCH_TERMS:
+        wanted = [int(year) for year in legacy_search(df, term)]
+        found = coverage.years_of(coverage.search(term))
+        if wanted != found:
+            failures.append(f"search {term!r}: {found}, expected {wanted}")
+
+    # A new fiscal year folded into the coverage of the others
+    last = df['Year'].max()
+    incremental = Coverage.from_frame(df[df['Year'] != last]).update(df[df['Year'] == last])
+    if not incremental.availability().equals(actual[0]):
+        failures.append("update() differs from a full rebuild")
+
+    grid_s = best_time(lambda: legacy_coverage(df), args.repeat)
+    bitmap_s = best_time(lambda: coverage_results(df), args.repeat)
+    scan_s = best_time(lambda: [legacy_search(df, term) for term in SEARCH_TERMS], args.repeat)
+    index_s = best_time(lambda: [coverage.years_of(coverage.search(term)) for term in SEARCH_TERMS], args.repeat)
+    update_s = best_time(lambda: Coverage.from_frame(df[df['Year'] != last]).update(df[df['Year'] == last]),
+                         args.repeat)
+
+    print(f"  {len(actual[2])} common countries, {sum(map(len, actual[1].values()))} missing region-years")
+    print(f"  grid, merge and Counter loop : {grid_s:8.4f} s")
+    print(f"  bitmap                       : {bitmap_s:8.4f} s  ({grid_s / bitmap_s:.1f}x)")
+    print(f"  str.contains, {len(SEARCH_TERMS)} lookups      : {scan_s:8.4f} s")
+    print(f"  distinct names, {len(SEARCH_TERMS)} lookups    : {index_s:8.4f} s  ({scan_s / index_s:.0f}x)")
+    print(f"  {last} folded into the rest    : {update_s:8.4f} s")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
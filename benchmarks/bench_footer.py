@@ -0,0 +1,99 @@
+# benchmarks/bench_footer.py
+#
+# Regression check and timing for footer detection. On real COB workbooks,
+# stopping the read at the footer (immigration.footer) must give the table
+# the old read-then-scan-four-times path gave; the footer variants are
+# covered by tests/test_footer.py. Exits with status 1 on a mismatch. Run
+# from the repository root:
+#
+#   python -m benchmarks.bench_footer --files 500
+
+import argparse
+import os
+import random
+import sys
+import time
+
+import pandas as pd
+
+from Mergefn.immigration.footer import sheet_footer_row, trim_footer
+from Mergefn.immigration.sources import find_sources
+from Mergefn.immigration.workbook import HEADER_ROW, open_sheet, read_sheet_table
+
+LEGACY_INDICATORS = ["Represents zero", "Data withheld", "Note:", "- Represents"]
+
+
+def legacy_trim_footer(df):
+    """trim_footer as the merge did it before: one regex scan per indicator."""
+    footer_idx = None
+    for indicator in LEGACY_INDICATORS:
+        try:
+            idx = df[df.iloc[:, 0].str.contains(indicator, case=False, na=False, regex=True)].index.min()
+            if pd.notna(idx):
+                if footer_idx is None or idx < footer_idx:
+                    footer_idx = idx
+        except (AttributeError, TypeError):
+            continue
+
+    if pd.notna(footer_idx):
+        df = df.iloc[:footer_idx]
+
+    return df
+
+
+def read_then_scan(sheet):
+    return legacy_trim_footer(read_sheet_table(sheet))
+
+
+def stop_at_footer(sheet):
+    return read_sheet_table(sheet, end_row=sheet_footer_row(sheet, HEADER_ROW + 1))
+
+
+def time_reader(reader, sheets, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for sheet in sheets:
+            reader(sheet)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Check and time footer detection')
+    parser.add_argument('--input', nargs='+', default=[os.path.join("input dataset", "all cont"),
+                                                     os.path.join("input dataset", "Zip files")],
+                        help='Folders, workbooks or zip archives to sample')
+    parser.add_argument('--files', type=int, default=500, help='Number of workbooks to sample, 0 for all (default: 500)')
+    parser.add_argument('--seed', type=int, default=0, help='Sampling seed (default: 0)')
+    parser.add_argument('--repeat', type=int, default=3, help='Repetitions, best time is reported (default: 3)')
+    args = parser.parse_args()
+
+    failures = []
+    sources = find_sources(args.input)
+    if args.files:
+        sources = random.Random(args.seed).sample(sources, min(args.files, len(sources)))
+    if not sources:
+        raise SystemExit(f"No workbooks found in {args.input}")
+    sheets = [open_sheet(source) for source in sources]
+
+    # Both paths must produce the same table before timing means anything
+    for source, sheet in zip(sources, sheets):
+        expected, actual = read_then_scan(sheet), stop_at_footer(sheet)
+        try:
+            pd.testing.assert_frame_equal(expected, actual)
+            pd.testing.assert_frame_equal(legacy_trim_footer(expected), trim_footer(expected))
+        except AssertionError as e:
+            failures.append(f"{source}: {e}")
+    print(f"{len(sheets)} workbooks: stopping at the footer matches reading then scanning")
+
+    old = time_reader(read_then_scan, sheets, args.repeat)
+    new = time_reader(stop_at_footer, sheets, args.repeat)
+    print(f"best of {args.repeat}")
+    print(f"  read, then 4 scans    : {old:8.3f} s  ({old / len(sheets) * 1000:.2f} ms/file)")
+    print(f"  stop at footer        : {new:8.3f} s  ({new / len(sheets) * 1000:.2f} ms/file)")
+    print(f"  speedup               : {old / new:8.2f}x")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,64 @@
+# benchmarks/bench_forecast_startup.py
+#
+# Startup cost of Forecast_Occupation.py, measured with `python -X importtime`.
+# Fails (exit status 1) when importing the module pulls in a heavy dependency
+# or `--help` takes longer than the budget. Run from the repository root:
+#
+#   python -m benchmarks.bench_forecast_startup
+
+import argparse
+import subprocess
+import sys
+import time
+
+SCRIPT = "Forecast_Occupation.py"
+
+# Modules only the forecasting and plotting code paths may load
+HEAVY_MODULES = ["pandas", "numpy", "scipy", "matplotlib", "seaborn", "sklearn", "statsmodels"]
+
+
+def import_times(code):
+    """Modules imported by `code` and their cumulative import time in seconds."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        name = name.strip()
+        if cumulative.strip().isdigit():
+            times[name] = int(cumulative) / 1e6
+    return times
+
+
+def best_time(command, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, capture_output=True, check=True)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark Forecast_Occupation.py startup time')
+    parser.add_argument('--repeat', type=int, default=5, help='Repetitions, best time is reported (default: 5)')
+    parser.add_argument('--budget', type=float, default=0.5, help='Maximum seconds allowed for --help (default: 0.5)')
+    args = parser.parse_args()
+
+    times = import_times("import Forecast_Occupation")
+    print(f"import Forecast_Occupation: {times.get('Forecast_Occupation', float('nan')):.3f} s")
+    slowest = sorted(times.items(), key=lambda item: item[1], reverse=True)[:5]
+    for name, seconds in slowest:
+        print(f"  {name:<30}{seconds:>8.3f} s")
+
+    help_s = best_time([sys.executable, SCRIPT, "--help"], args.repeat)
+    print(f"{SCRIPT} --help: {help_s:.3f} s (best of {args.repeat}, budget {args.budget:.3f} s)")
+
+    failures = [f"imports {name} at module load" for name in HEAVY_MODULES if name in times]
+    if help_s > args.budget:
+        failures.append(f"--help took {help_s:.3f} s")
+    for failure in failures:
+        print(f"FAIL: {SCRIPT} {failure}")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,44 @@
+# benchmarks/bench_schema_memory.py
+#
+# Memory and groupby time of the merged dataset with the legacy dtypes
+# (string Year, object labels, float64 counts) and with the canonical schema
+# of Mergefn/immigration/schema.py. Run from the repository root:
+#
+#   python -m benchmarks.bench_schema_memory --data "output merged file/allconfinal.parquet"
+
+import argparse
+import os
+import time
+
+from Mergefn.immigration.schema import conform, legacy_dtypes, memory_report
+from Mergefn.immigration.storage import read_dataset
+
+GROUP_KEYS = ["Year", "Region", "Group", "Subgroup"]
+
+
+def best_time(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Compare the legacy and canonical dtypes of the merged dataset')
+    parser.add_argument('--data', default=os.path.join("output merged file", "allconfinal.parquet"), help='Merged dataset to load')
+    parser.add_argument('--repeat', type=int, default=5, help='Repetitions, best time is reported (default: 5)')
+    args = parser.parse_args()
+
+    df = read_dataset(args.data)
+    print(f"{len(df)} rows x {len(df.columns)} columns from {args.data}\n")
+    report = memory_report(df)
+    report[["legacy_bytes", "canonical_bytes"]] = report[["legacy_bytes", "canonical_bytes"]] / 1e6
+    print(report.rename(columns={"legacy_bytes": "legacy MB", "canonical_bytes": "canonical MB"}).round(3).to_string())
+
+    legacy, canonical = legacy_dtypes(df), conform(df)
+    print(f"\ngroupby({GROUP_KEYS}).Total.sum(), best of {args.repeat}")
+    for name, frame in [("legacy", legacy), ("canonical", canonical)]:
+        seconds = best_time(lambda: frame.groupby(GROUP_KEYS, observed=True)["Total"].sum(), args.repeat)
+        print(f"  {name:<10}{seconds:>8.4f} s")
@@ -0,0 +1,165 @@
+# benchmarks/bench_section_tagging.py
+#
+# Regression check and timing for the vectorized section tagging. A sample
+# of real COB workbooks is tagged by the original per-(Year, Region) loop
+# and by immigration.sections.tag_sections; the outputs must be identical.
+# Run from the repository root:
+#
+#   python -m benchmarks.bench_section_tagging --files 300
+
+import argparse
+import glob
+import os
+import random
+import time
+
+import pandas as pd
+
+from Mergefn.immigration.ingest import ingest_files
+from Mergefn.immigration.sections import tag_sections
+
+
+def legacy_tag_sections(merged_df):
+    """Group/Subgroup assignment as Mergercode.py did it before tag_sections."""
+    merged_df = merged_df.copy()
+
+    # Initialize columns for Group and Subgroup
+    merged_df["Group"] = None
+    merged_df["Subgroup"] = None
+
+    # Process each year-region combination separately
+    unique_combinations = merged_df[['Year', 'Region']].drop_duplicates().values
+
+    for year, region in unique_combinations:
+        subset = merged_df[(merged_df['Year'] == year) & (merged_df['Region'] == region)]
+
+        # Find section indices within this subset
+        try:
+            age_rows = subset[subset["Characteristic"] == "Age"].index
+            if len(age_rows) > 0:
+                age_idx = age_rows[0]
+                age_start = age_idx + 1
+            else:
+                age_idx = None
+                age_start = None
+        except:
+            age_idx = None
+            age_start = None
+
+        try:
+            occupation_rows = subset[subset["Characteristic"] == "Occupation"].index
+            if len(occupation_rows) > 0:
+                occupation_idx = occupation_rows[0]
+                occupation_start = occupation_idx + 1
+            else:
+                occupation_idx = None
+                occupation_start = None
+        except:
+            occupation_idx = None
+            occupation_start = None
+
+        try:
+            # Look for either "Broad class of admission" or "Major class of admission"
+            admission_rows = subset[
+                subset["Characteristic"].str.contains("class of admission", case=False, na=False)
+            ].index
+            if len(admission_rows) > 0:
+                admission_idx = admission_rows[0]
+                admission_start = admission_idx + 1
+            else:
+                admission_idx = None
+                admission_start = None
+        except:
+            admission_idx = None
+            admission_start = None
+
+        # Also identify the sections we want to explicitly exclude
+        try:
+            marital_rows = subset[
+                subset["Characteristic"].str.contains("Marital", case=False, na=False)
+            ].index
+            if len(marital_rows) > 0:
+                marital_idx = marital_rows[0]
+                marital_start = marital_idx + 1
+            else:
+                marital_idx = None
+                marital_start = None
+        except:
+            marital_idx = None
+            marital_start = None
+
+        try:
+            states_rows = subset[
+                subset["Characteristic"].str.contains("states of permanent residence", case=False, na=False) |
+                subset["Characteristic"].str.contains("Leading states", case=False, na=False) |
+                subset["Characteristic"].str.contains("Top 20 states", case=False, na=False)
+            ].index
+            if len(states_rows) > 0:
+                states_idx = states_rows[0]
+                states_start = states_idx + 1
+            else:
+                states_idx = None
+                states_start = None
+        except:
+            states_idx = None
+            states_start = None
+
+        # Find the next section after each section to determine the end
+        all_section_indices = sorted(
+            [i for i in [age_idx, occupation_idx, admission_idx, marital_idx, states_idx] if i is not None])
+
+        # Assign Age group
+        if age_idx is not None:
+            # Find the next section after Age
+            next_idx = min([i for i in all_section_indices if i > age_idx] + [subset.index.max() + 1])
+            merged_df.loc[age_start:next_idx-1, "Group"] = "Age"
+            merged_df.loc[age_start:next_idx-1, "Subgroup"] = merged_df.loc[age_start:next_idx-1, "Characteristic"]
+
+        # Assign Occupation group
+        if occupation_idx is not None:
+            # Find the next section after Occupation
+            next_idx = min([i for i in all_section_indices if i > occupation_idx] + [subset.index.max() + 1])
+            merged_df.loc[occupation_start:next_idx-1, "Group"] = "Occupation"
+            merged_df.loc[occupation_start:next_idx-1, "Subgroup"] = merged_df.loc[occupation_start:next_idx-1, "Characteristic"]
+
+        # Assign Broad Class of Admission group
+        if admission_idx is not None:
+            # Find the next section after Admission
+            next_idx = min([i for i in all_section_indices if i > admission_idx] + [subset.index.max() + 1])
+            merged_df.loc[admission_start:next_idx-1, "Group"] = "Broad Class of Admission"
+            merged_df.loc[admission_start:next_idx-1, "Subgroup"] = merged_df.loc[admission_start:next_idx-1, "Characteristic"]
+
+    return merged_df
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Check and time section tagging')
+    parser.add_argument('--input', default=os.path.join("input dataset", "all cont"), help='Folder of .xls workbooks')
+    parser.add_argument('--files', type=int, default=300, help='Number of workbooks to sample, 0 for all (default: 300)')
+    parser.add_argument('--seed', type=int, default=0, help='Sampling seed (default: 0)')
+    args = parser.parse_args()
+
+    files = sorted(glob.glob(os.path.join(args.input, "*.xls")))
+    if args.files:
+        files = random.Random(args.seed).sample(files, min(args.files, len(files)))
+    all_dataframes, _ = ingest_files(files, verbose=False)
+    merged_df = pd.concat(all_dataframes, ignore_index=True).dropna(how='all')
+    print(f"{len(all_dataframes)} workbooks, {len(merged_df)} rows")
+
+    start = time.perf_counter()
+    expected = legacy_tag_sections(merged_df)
+    legacy_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    actual = tag_sections(merged_df)
+    vectorized_s = time.perf_counter() - start
+
+    # Compare the columns the rest of the pipeline reads
+    for col in ["Group", "Subgroup"]:
+        pd.testing.assert_series_equal(
+            expected[col].astype(object).where(expected[col].notna(), None),
+            actual[col].astype(object).where(actual[col].notna(), None),
+        )
+    print("  tagging matches the per-(Year, Region) loop")
+    print(f"  per-(Year, Region) loop : {legacy_s:8.3f} s")
+    print(f"  vectorized              : {vectorized_s:8.3f} s  ({legacy_s / vectorized_s:.1f}x)")
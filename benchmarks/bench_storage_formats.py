@@ -0,0 +1,78 @@
+# benchmarks/bench_storage_formats.py
+#
+# Write/read times of the merged dataset in each supported format ("" is
+# the directory partitioned by Year and Group), and the time of one filtered
+# read from the SQLite table and the partitioned directory compared with
+# reading the Parquet file and filtering it. Run from the repository root:
+#
+#   python -m benchmarks.bench_storage_formats --data "output merged file/allconfinal.xlsx"
+
+import argparse
+import os
+import tempfile
+import time
+
+from Mergefn.immigration.database import query_dataset
+from Mergefn.immigration.storage import read_dataset, write_dataset
+
+FORMATS = [".parquet", ".feather", ".csv", ".xlsx", ".sqlite", ""]
+
+# "Management occupations for India 2010-2022"
+QUERY = dict(regions="India", groups="Occupation",
+             subgroups="Management, professional, and related occupations", years=range(2010, 2023))
+
+# The columns Forecast_Occupation.py loads
+FORECAST_COLUMNS = ['Year', 'Region', 'Group', 'Subgroup', 'Total']
+
+
+def size_on_disk(path):
+    if not os.path.isdir(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+def best_time(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark merged dataset formats')
+    parser.add_argument('--data', default=os.path.join("output merged file", "allconfinal.xlsx"), help='Merged dataset to convert')
+    parser.add_argument('--repeat', type=int, default=3, help='Repetitions, best time is reported (default: 3)')
+    args = parser.parse_args()
+
+    df = read_dataset(args.data)
+    print(f"{len(df)} rows x {len(df.columns)} columns from {args.data}, best of {args.repeat}")
+    print(f"  {'format':<10}{'write s':>10}{'read s':>10}{'read cols s':>13}{'size MB':>10}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for ext in FORMATS:
+            path = os.path.join(tmp, "allconfinal" + ext)
+            # Excel is slow enough that one round is representative
+            repeat = 1 if ext == ".xlsx" else args.repeat
+            write_s = best_time(lambda: write_dataset(df, path), repeat)
+            read_s = best_time(lambda: read_dataset(path), repeat)
+            cols_s = best_time(lambda: read_dataset(path, columns=FORECAST_COLUMNS), repeat)
+            size_mb = size_on_disk(path) / 1e6
+            print(f"  {ext or 'dir':<10}{write_s:>10.3f}{read_s:>10.3f}{cols_s:>13.3f}{size_mb:>10.2f}")
+
+        def read_and_filter():
+            data = read_dataset(os.path.join(tmp, "allconfinal.parquet"))
+            return data[data["Region"].isin([QUERY["regions"]]) & (data["Group"] == QUERY["groups"])
+                        & (data["Subgroup"] == QUERY["subgroups"]) & data["Year"].isin(QUERY["years"])]
+
+        filter_s = best_time(read_and_filter, args.repeat)
+        query_s = best_time(lambda: query_dataset(os.path.join(tmp, "allconfinal.sqlite"), **QUERY), args.repeat)
+        filters = {"Region": QUERY["regions"], "Group": QUERY["groups"], "Subgroup": QUERY["subgroups"],
+                   "Year": QUERY["years"]}
+        pruned_s = best_time(lambda: read_dataset(os.path.join(tmp, "allconfinal"), columns=FORECAST_COLUMNS,
+                                                  filters=filters), args.repeat)
+        print("  India management 2010-2022:")
+        print(f"    read .parquet and filter   {filter_s:8.3f} s")
+        print(f"    indexed .sqlite query      {query_s:8.3f} s  ({filter_s / query_s:.1f}x)")
+        print(f"    partitioned dir, filtered  {pruned_s:8.3f} s  ({filter_s / pruned_s:.1f}x)")
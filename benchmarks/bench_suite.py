@@ -0,0 +1,160 @@
+# benchmarks/bench_suite.py
+#
+# End-to-end benchmark of the merge and forecast paths on a synthetic corpus
+# (benchmarks/synthetic.py), so it runs offline and at any scale. Times
+# workbook ingestion, the full merge, imputation, aggregation and the batch
+# forecast, and records checksums of their results so a run on another
+# commit can be compared like for like. Run from the repository root:
+#
+#   python -m benchmarks.bench_suite --files 1000 --save results.json
+#   python -m benchmarks.bench_suite --files 1000 --compare results.json
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+# Loaded up front so the first forecast does not time the import
+import scipy.stats  # noqa: F401
+
+from Forecast_Occupation import forecast_batch
+from Mergefn.immigration.cube import CountCube
+from Mergefn.immigration.impute import RunningImputer
+from Mergefn.immigration.ingest import iter_ingested
+from Mergefn.immigration.pipeline import iter_chunks, merge_workbooks, select_sections
+from Mergefn.immigration.storage import read_dataset
+
+from .synthetic import generate_corpus
+
+
+def best_time(func, repeat):
+    """Best wall time of `repeat` calls and the result of the last one."""
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def git_commit():
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+        return result.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def ingest(files, workers):
+    """Parse every workbook; returns the number of rows read."""
+    return sum(len(df) for df in iter_ingested(files, workers=workers, verbose=False))
+
+
+def merge(files, workers, tmp_dir):
+    output_path = os.path.join(tmp_dir, "merged.parquet")
+    merge_workbooks(files, output_path, workers=workers, verbose=False)
+    return output_path
+
+
+def impute(tagged):
+    """Both passes of the running imputation over the tagged rows in one chunk."""
+    imputer = RunningImputer()
+    chunk = imputer.add(tagged)
+    imputer.finish(verbose=False)
+    return imputer.fill(chunk)
+
+
+def aggregate(df):
+    """Cube of Total, plus the two pivots the forecasts and the notebook use."""
+    cube = CountCube.from_frame(df)
+    cube.pivot("Occupation", by_region=True)
+    cube.pivot("Age", by_region=False)
+    return cube
+
+
+def run_suite(files, workers, repeat):
+    results = {}
+
+    def record(name, seconds, rows, checksum=None):
+        results[name] = {"seconds": seconds, "rows": int(rows), "checksum": checksum}
+        print(f"  {name:<16}{seconds:>10.3f} s  {rows:>10} rows")
+
+    seconds, rows = best_time(lambda: ingest(files, workers), repeat)
+    record("ingestion", seconds, rows)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        seconds, output_path = best_time(lambda: merge(files, workers, tmp_dir), repeat)
+        merged = read_dataset(output_path)
+    record("merge", seconds, len(merged), float(merged["Total"].astype(np.float64).sum()))
+
+    # Tagged rows as the merge hands them to the imputer
+    tables = iter_ingested(files, workers=workers, verbose=False)
+    tagged = pd.concat([select_sections(chunk) for chunk in iter_chunks(tables)], ignore_index=True)
+    tagged = tagged.dropna(subset=["Total", "Male", "Female"], how="all")
+    seconds, imputed = best_time(lambda: impute(tagged), repeat)
+    record("imputation", seconds, len(imputed), float(imputed["Total"].sum()))
+
+    seconds, cube = best_time(lambda: aggregate(merged), repeat)
+    record("aggregation", seconds, int(np.isfinite(cube.values).sum()), float(np.nansum(cube.values)))
+
+    seconds, forecast = best_time(lambda: forecast_batch(cube, by_country=True), repeat)
+    record("batch forecast", seconds, len(forecast), float(forecast["Forecast"].sum()))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark the merge and forecast paths on a synthetic corpus')
+    parser.add_argument('--files', type=int, default=1000, help='Synthetic workbooks, 100 to 50000 (default: 1000)')
+    parser.add_argument('--seed', type=int, default=0, help='Corpus seed (default: 0)')
+    parser.add_argument('--corpus-dir', help='Where the corpus is written and reused (default: benchmarks/.synthetic/<files>_<seed>)')
+    parser.add_argument('--workers', type=int, default=1, help='Parse workers (default: 1)')
+    parser.add_argument('--repeat', type=int, default=3, help='Repetitions, best time is reported (default: 3)')
+    parser.add_argument('--save', help='Write the results as JSON')
+    parser.add_argument('--compare', help='Results JSON of an earlier run to compare against')
+    args = parser.parse_args()
+    if args.files < 1:
+        parser.error("--files must be at least 1")
+
+    corpus_dir = args.corpus_dir or os.path.join("benchmarks", ".synthetic", f"{args.files}_{args.seed}")
+    start = time.perf_counter()
+    files = generate_corpus(corpus_dir, args.files, args.seed)
+    print(f"{len(files)} synthetic workbooks in {corpus_dir} ({time.perf_counter() - start:.1f} s to prepare)")
+    print(f"best of {args.repeat}, {args.workers} worker(s)")
+
+    results = {
+        "commit": git_commit(),
+        "files": args.files,
+        "seed": args.seed,
+        "workers": args.workers,
+        "repeat": args.repeat,
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "benchmarks": run_suite(files, args.workers, args.repeat),
+    }
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+        print(f"Results saved to {args.save}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as fh:
+            baseline = json.load(fh)
+        if (baseline["files"], baseline["seed"]) != (args.files, args.seed):
+            print("WARNING: the baseline ran on a different corpus")
+        print(f"\ncompared with {args.compare} (commit {baseline.get('commit')})")
+        for name, current in results["benchmarks"].items():
+            before = baseline["benchmarks"].get(name)
+            if before is None:
+                continue
+            same = before["rows"] == current["rows"] and (
+                before["checksum"] is None or np.isclose(before["checksum"], current["checksum"]))
+            print(f"  {name:<16}{before['seconds']:>10.3f} s -> {current['seconds']:>8.3f} s"
+                  f"  ({before['seconds'] / current['seconds']:.2f}x)"
+                  f"{'' if same else '  RESULTS DIFFER'}")
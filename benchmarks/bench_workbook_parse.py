@@ -0,0 +1,61 @@
+# benchmarks/bench_workbook_parse.py
+#
+# Compare the old double pd.read_excel path against the single-pass xlrd
+# parser on real COB workbooks. Run from the repository root:
+#
+#   python -m benchmarks.bench_workbook_parse --files 500
+
+import argparse
+import glob
+import os
+import time
+
+import pandas as pd
+
+from Mergefn.immigration.workbook import read_workbook
+
+
+def double_read(file_path):
+    """The header-then-table path the merge scripts used before."""
+    metadata = pd.read_excel(file_path, nrows=5, header=None, engine="xlrd")
+    year = "".join(filter(str.isdigit, str(metadata.iloc[0, 0])))
+    region = metadata.iloc[3, 0].split(":")[-1].strip()
+    df = pd.read_excel(file_path, skiprows=5, engine="xlrd")
+    return year, region, df
+
+
+def time_reader(reader, files, repeat):
+    """Best-of-`repeat` wall time for reading every file once."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for file_path in files:
+            reader(file_path)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark COB workbook parsing')
+    parser.add_argument('--input', default=os.path.join("input dataset", "all cont"), help='Folder of .xls workbooks')
+    parser.add_argument('--files', type=int, default=200, help='Number of workbooks to read (default: 200)')
+    parser.add_argument('--repeat', type=int, default=3, help='Repetitions, best time is reported (default: 3)')
+    args = parser.parse_args()
+
+    files = sorted(glob.glob(os.path.join(args.input, "*.xls")))[:args.files]
+    if not files:
+        raise SystemExit(f"No .xls files found in {args.input}")
+
+    # Both paths must produce the same frame before timing means anything
+    for file_path in files:
+        expected, actual = double_read(file_path), read_workbook(file_path)
+        assert expected[:2] == actual[:2], file_path
+        pd.testing.assert_frame_equal(expected[2], actual[2])
+
+    double = time_reader(double_read, files, args.repeat)
+    single = time_reader(read_workbook, files, args.repeat)
+
+    print(f"{len(files)} workbooks, best of {args.repeat}")
+    print(f"  double read_excel : {double:8.3f} s  ({double / len(files) * 1000:.2f} ms/file)")
+    print(f"  single-pass xlrd  : {single:8.3f} s  ({single / len(files) * 1000:.2f} ms/file)")
+    print(f"  speedup           : {double / single:8.2f}x")
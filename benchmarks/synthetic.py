@@ -0,0 +1,171 @@
+# benchmarks/synthetic.py
+#
+# Generator of synthetic workbooks in the DHS COB profile layout, so the
+# benchmarks can run at any scale without the real corpus. A corpus is fully
+# determined by its size and seed: the same arguments write the same files,
+# which keeps timings comparable across commits. Writing .xls needs xlwt
+# (pip install xlwt). Run from the repository root:
+#
+#   python -m benchmarks.synthetic --files 1000 --output "benchmarks/.synthetic/1000"
+
+import argparse
+import json
+import os
+import random
+
+TITLE = "Persons Obtaining Lawful Permanent Resident Status During Fiscal Year {year}"
+SUBTITLE = "by Region/Country of Birth and Selected Characteristics"
+
+# (section header, rows) of a profile table, in sheet order. The states
+# header changed wording over the years, as in the published files.
+SECTIONS = [
+    ("Total", None),
+    (None, ["New arrivals", "Adjustments of status"]),
+    ("Age", ["Under 18 years", "18 to 24 years", "25 to 34 years", "35 to 44 years",
+             "45 to 54 years", "55 to 64 years", "65 years and over", "Unknown"]),
+    ("Marital status", ["Married", "Single", "Other", "Unknown"]),
+    ("Occupation", ["Management, professional, and related occupations", "Service occupations",
+                    "Sales and office occupations", "Farming, fishing, and forestry occupations",
+                    "Construction, extraction, maintenance and repair occupations",
+                    "Production, transportation, and material moving occupations", "Military",
+                    "No occupation/not working outside home", "Homemakers", "Students or children",
+                    "Retirees", "Unemployed", "Unknown"]),
+    ("Broad class of admission", ["Immediate relatives of U.S. citizens", "Family-sponsored preferences",
+                                  "Employment-based preferences", "Diversity", "Refugees and asylees", "Other"]),
+    ("Leading states of residence", ["Arizona", "California", "Colorado", "Connecticut", "Florida",
+                                     "Georgia", "Illinois", "Maryland", "Massachusetts", "Michigan",
+                                     "Nevada", "New Jersey", "New York", "North Carolina", "Ohio",
+                                     "Pennsylvania", "Texas", "Virginia", "Washington", "Other"]),
+]
+
+FOOTER = [
+    "D Data withheld to limit disclosure.",
+    "- Represents zero.",
+    "Source: U.S. Department of Homeland Security.",
+]
+
+YEARS = list(range(2005, 2023))
+
+# Continent rollups are published as workbooks too; the merge skips them
+CONTINENTS = ["Africa", "Asia", "Europe", "Oceania", "South America"]
+
+DEFAULTS = {
+    "withheld_rate": 0.08,   # share of count cells published as 'D'
+    "zero_rate": 0.10,       # share of count cells published as '-'
+    "continent_rate": 0.01,  # share of files that are continent rollups
+    "duplicate_rate": 0.01,  # share of files repeating an earlier year-region
+}
+
+
+def region_names(count: int) -> list:
+    """The known country names, then numbered synthetic ones as needed."""
+    vocabulary = os.path.join(os.path.dirname(__file__), "..", "Mergefn", "immigration", "vocabulary.json")
+    with open(vocabulary, "r", encoding="utf-8") as fh:
+        names = [name for name in json.load(fh)["Region"]
+                 if name != "Total" and not name.startswith("FY ")]
+    names += [f"Synthetic Country {i:05d}" for i in range(max(0, count - len(names)))]
+    return names[:count]
+
+
+def table_rows(year: int, rng: random.Random, withheld_rate: float, zero_rate: float) -> list:
+    """Rows (Characteristic, Total, first sex, second sex, Unknown) below the header."""
+    scale = rng.lognormvariate(6, 1.5)
+
+    def cell():
+        draw = rng.random()
+        if draw < withheld_rate:
+            return "D"
+        if draw < withheld_rate + zero_rate:
+            return "-"
+        return float(max(1, round(rng.expovariate(1 / scale))))
+
+    rows = []
+    for header, labels in SECTIONS:
+        if rows:
+            rows.append(None)
+        if header is not None:
+            # The Total header carries the file's totals, the others are blank
+            rows.append((header, cell(), cell(), cell(), "-") if header == "Total" else (header,))
+        for label in labels or []:
+            rows.append((label, cell(), cell(), cell(), "-" if rng.random() < 0.9 else cell()))
+    return rows
+
+
+def write_workbook(path: str, year: int, region: str, rows: list):
+    """Write one COB profile workbook: title, region row 3, header row 5, table, footer."""
+    try:
+        import xlwt
+    except ImportError:
+        raise ImportError("Writing synthetic .xls workbooks needs xlwt: pip install xlwt")
+
+    book = xlwt.Workbook()
+    sheet = book.add_sheet("Sheet1")
+    sheet.write(0, 0, TITLE.format(year=year))
+    sheet.write(1, 0, SUBTITLE)
+    sheet.write(3, 0, f"Region/Country: {region}")
+    # Later years list Female before Male
+    sexes = ["Female", "Male"] if year >= 2017 else ["Male", "Female"]
+    for col, label in enumerate(["Characteristic", "Total", *sexes, "Unknown"]):
+        sheet.write(5, col, label)
+
+    r = 6
+    for row in rows:
+        if row is not None:
+            for col, value in enumerate(row):
+                sheet.write(r, col, value)
+        r += 1
+    for note in FOOTER:
+        sheet.write(r, 0, note)
+        r += 1
+    book.save(path)
+
+
+def generate_corpus(output_dir: str, files: int, seed: int = 0, **rates) -> list:
+    """
+    Write `files` workbooks to output_dir, or reuse them when a corpus of
+    the same size, seed and rates is already there. Returns their paths.
+    """
+    settings = {**DEFAULTS, **rates}
+    spec = {"files": files, "seed": seed, **settings}
+    spec_path = os.path.join(output_dir, "corpus.json")
+    paths = [os.path.join(output_dir, f"COBBook{i}_{seed}.xls") for i in range(files)]
+
+    if os.path.exists(spec_path):
+        with open(spec_path, "r", encoding="utf-8") as fh:
+            if json.load(fh) == spec and all(os.path.exists(path) for path in paths):
+                return paths
+
+    os.makedirs(output_dir, exist_ok=True)
+    rng = random.Random(seed)
+    regions = region_names(-(-files // len(YEARS)))
+    written = []
+    for i, path in enumerate(paths):
+        draw = rng.random()
+        if draw < settings["continent_rate"]:
+            year, region = rng.choice(YEARS), rng.choice(CONTINENTS)
+        elif draw < settings["continent_rate"] + settings["duplicate_rate"] and written:
+            year, region = rng.choice(written)
+        else:
+            # Every region in turn, year by year
+            year, region = YEARS[i % len(YEARS)], regions[i // len(YEARS)]
+            written.append((year, region))
+        write_workbook(path, year, region, table_rows(year, rng, settings["withheld_rate"], settings["zero_rate"]))
+
+    with open(spec_path, "w", encoding="utf-8") as fh:
+        json.dump(spec, fh, indent=2)
+    return paths
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Write a synthetic corpus of COB profile workbooks')
+    parser.add_argument('--files', type=int, default=1000, help='Number of workbooks, 100 to 50000 (default: 1000)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed; the same seed writes the same corpus (default: 0)')
+    parser.add_argument('--output', help='Folder to write to (default: benchmarks/.synthetic/<files>_<seed>)')
+    parser.add_argument('--withheld-rate', type=float, default=DEFAULTS["withheld_rate"], help="Share of count cells published as 'D'")
+    parser.add_argument('--zero-rate', type=float, default=DEFAULTS["zero_rate"], help="Share of count cells published as '-'")
+    args = parser.parse_args()
+
+    output_dir = args.output or os.path.join("benchmarks", ".synthetic", f"{args.files}_{args.seed}")
+    paths = generate_corpus(output_dir, args.files, args.seed,
+                            withheld_rate=args.withheld_rate, zero_rate=args.zero_rate)
+    print(f"{len(paths)} workbooks in {output_dir}")
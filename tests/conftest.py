@@ -0,0 +1,69 @@
+# tests/conftest.py
+#
+# Shared fixtures of the test suite. Run from the repository root:
+#
+#   python -m pytest -q
+
+import os
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+WORKBOOK_DIR = os.path.join(REPO_ROOT, "input dataset", "all cont")
+
+# Real COB workbooks checked in under "input dataset/all cont": one country
+# from each era of the layout (FY2005, FY2006-2014, FY2015-2022)
+COUNTRY_WORKBOOKS = [
+    "COBBook4_9.xls",        # FY2005 Albania
+    "COBBook100_8.xls",      # FY2006 Cabo Verde
+    "cobbook100_5.xls",      # FY2009 Italy
+    "cobbook100_1.xls",      # FY2013 Japan
+    "fy2016cobbook100.xls",  # FY2016 Jamaica
+    "fy2019cobbook100.xls",  # FY2019 Kazakhstan
+    "fy2022cobbook10.xls",   # FY2022 Afghanistan
+]
+
+# A continent rollup, which the merge skips
+ROLLUP_WORKBOOKS = ["fy2019cobbook4.xls"]  # FY2019 Asia
+
+SAMPLE_WORKBOOKS = COUNTRY_WORKBOOKS + ROLLUP_WORKBOOKS
+
+
+# Sections of a COB profile table: header row and the Characteristic cells
+# under it, as published FY2005-FY2022
+TABLE_SECTIONS = [
+    ("Total", None),
+    (None, ["New arrivals", "Adjustments of status"]),
+    ("Age", ["Under 18 years", "18 to 24 years", "25 to 34 years", "35 to 44 years",
+             "45 to 54 years", "55 to 64 years", "65 years and over", "Unknown"]),
+    ("Marital status", ["Married", "Single", "Other", "Unknown"]),
+    ("Occupation", ["Management, professional, and related occupations", "Service occupations",
+                    "Sales and office occupations", "Farming, fishing, and forestry occupations",
+                    "Construction, extraction, maintenance and repair occupations",
+                    "Production, transportation, and material moving occupations", "Military",
+                    "No occupation/not working outside home", "Homemakers", "Students or children",
+                    "Retirees", "Unemployed", "Unknown"]),
+    ("Broad class of admission", ["Immediate relatives of U.S. citizens", "Family-sponsored preferences",
+                                  "Employment-based preferences", "Diversity", "Refugees and asylees", "Other"]),
+    ("Leading states of residence", ["Arizona", "California", "Colorado", "Connecticut", "Florida",
+                                     "Georgia", "Illinois", "Maryland", "Massachusetts", "Michigan",
+                                     "Nevada", "New Jersey", "New York", "North Carolina", "Ohio",
+                                     "Pennsylvania", "Texas", "Virginia", "Washington", "Other"]),
+]
+
+
+def workbook_path(name):
+    """Path of a checked-in sample workbook."""
+    path = os.path.join(WORKBOOK_DIR, name)
+    assert os.path.exists(path), f"sample workbook missing: {path}"
+    return path
+
+
+@pytest.fixture(scope="session")
+def sample_workbooks():
+    """Paths of SAMPLE_WORKBOOKS."""
+    return [workbook_path(name) for name in SAMPLE_WORKBOOKS]
@@ -0,0 +1,147 @@
+# tests/legacy.py
+#
+# Reference implementations for the regression tests: the code the merge
+# ran before it was rewritten, kept verbatim so the tests do not depend on
+# the benchmark scripts.
+
+import pandas as pd
+
+from Mergefn.immigration.workbook import read_sheet_table
+
+LEGACY_INDICATORS = ["Represents zero", "Data withheld", "Note:", "- Represents"]
+
+
+def legacy_tag_sections(merged_df):
+    """Group/Subgroup assignment as Mergercode.py did it before tag_sections."""
+    merged_df = merged_df.copy()
+
+    # Initialize columns for Group and Subgroup
+    merged_df["Group"] = None
+    merged_df["Subgroup"] = None
+
+    # Process each year-region combination separately
+    unique_combinations = merged_df[['Year', 'Region']].drop_duplicates().values
+
+    for year, region in unique_combinations:
+        subset = merged_df[(merged_df['Year'] == year) & (merged_df['Region'] == region)]
+
+        # Find section indices within this subset
+        try:
+            age_rows = subset[subset["Characteristic"] == "Age"].index
+            if len(age_rows) > 0:
+                age_idx = age_rows[0]
+                age_start = age_idx + 1
+            else:
+                age_idx = None
+                age_start = None
+        except:
+            age_idx = None
+            age_start = None
+
+        try:
+            occupation_rows = subset[subset["Characteristic"] == "Occupation"].index
+            if len(occupation_rows) > 0:
+                occupation_idx = occupation_rows[0]
+                occupation_start = occupation_idx + 1
+            else:
+                occupation_idx = None
+                occupation_start = None
+        except:
+            occupation_idx = None
+            occupation_start = None
+
+        try:
+            # Look for either "Broad class of admission" or "Major class of admission"
+            admission_rows = subset[
+                subset["Characteristic"].str.contains("class of admission", case=False, na=False)
+            ].index
+            if len(admission_rows) > 0:
+                admission_idx = admission_rows[0]
+                admission_start = admission_idx + 1
+            else:
+                admission_idx = None
+                admission_start = None
+        except:
+            admission_idx = None
+            admission_start = None
+
+        # Also identify the sections we want to explicitly exclude
+        try:
+            marital_rows = subset[
+                subset["Characteristic"].str.contains("Marital", case=False, na=False)
+            ].index
+            if len(marital_rows) > 0:
+                marital_idx = marital_rows[0]
+                marital_start = marital_idx + 1
+            else:
+                marital_idx = None
+                marital_start = None
+        except:
+            marital_idx = None
+            marital_start = None
+
+        try:
+            states_rows = subset[
+                subset["Characteristic"].str.contains("states of permanent residence", case=False, na=False) |
+                subset["Characteristic"].str.contains("Leading states", case=False, na=False) |
+                subset["Characteristic"].str.contains("Top 20 states", case=False, na=False)
+            ].index
+            if len(states_rows) > 0:
+                states_idx = states_rows[0]
+                states_start = states_idx + 1
+            else:
+                states_idx = None
+                states_start = None
+        except:
+            states_idx = None
+            states_start = None
+
+        # Find the next section after each section to determine the end
+        all_section_indices = sorted(
+            [i for i in [age_idx, occupation_idx, admission_idx, marital_idx, states_idx] if i is not None])
+
+        # Assign Age group
+        if age_idx is not None:
+            # Find the next section after Age
+            next_idx = min([i for i in all_section_indices if i > age_idx] + [subset.index.max() + 1])
+            merged_df.loc[age_start:next_idx-1, "Group"] = "Age"
+            merged_df.loc[age_start:next_idx-1, "Subgroup"] = merged_df.loc[age_start:next_idx-1, "Characteristic"]
+
+        # Assign Occupation group
+        if occupation_idx is not None:
+            # Find the next section after Occupation
+            next_idx = min([i for i in all_section_indices if i > occupation_idx] + [subset.index.max() + 1])
+            merged_df.loc[occupation_start:next_idx-1, "Group"] = "Occupation"
+            merged_df.loc[occupation_start:next_idx-1, "Subgroup"] = merged_df.loc[occupation_start:next_idx-1, "Characteristic"]
+
+        # Assign Broad Class of Admission group
+        if admission_idx is not None:
+            # Find the next section after Admission
+            next_idx = min([i for i in all_section_indices if i > admission_idx] + [subset.index.max() + 1])
+            merged_df.loc[admission_start:next_idx-1, "Group"] = "Broad Class of Admission"
+            merged_df.loc[admission_start:next_idx-1, "Subgroup"] = merged_df.loc[admission_start:next_idx-1, "Characteristic"]
+
+    return merged_df
+
+
+def legacy_trim_footer(df):
+    """trim_footer as the merge did it before: one regex scan per indicator."""
+    footer_idx = None
+    for indicator in LEGACY_INDICATORS:
+        try:
+            idx = df[df.iloc[:, 0].str.contains(indicator, case=False, na=False, regex=True)].index.min()
+            if pd.notna(idx):
+                if footer_idx is None or idx < footer_idx:
+                    footer_idx = idx
+        except (AttributeError, TypeError):
+            continue
+
+    if pd.notna(footer_idx):
+        df = df.iloc[:footer_idx]
+
+    return df
+
+
+def read_then_scan(sheet):
+    """The table of a sheet read in full, then cut at the footer the old way."""
+    return legacy_trim_footer(read_sheet_table(sheet))
@@ -0,0 +1,105 @@
+# tests/test_catalog.py
+
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+from Mergefn.immigration.catalog import DUPLICATE, EXCLUDED, FAILED, KEPT, Catalog, build_catalog
+from Mergefn.immigration.engine import run
+from Mergefn.immigration.ingest import ingest_files
+from Mergefn.immigration.storage import read_dataset
+
+from .conftest import COUNTRY_WORKBOOKS, workbook_path
+
+# FY2019 Asia and FY2013 Total, published as workbooks of their own
+ROLLUPS = ["fy2019cobbook4.xls", "cobbook2_1.xls"]
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    """
+    The country workbooks, two rollups, a later copy of the FY2013 Japan
+    workbook under another name and a file that is not a workbook.
+    """
+    folder = tmp_path / "corpus"
+    folder.mkdir()
+    sources = []
+    for name in COUNTRY_WORKBOOKS[:4] + ROLLUPS + COUNTRY_WORKBOOKS[4:]:
+        sources.append(shutil.copy(workbook_path(name), folder / name))
+    sources.append(shutil.copy(workbook_path("cobbook100_1.xls"), folder / "japan_again.xls"))
+    (folder / "broken.xls").write_bytes(b"not a workbook")
+    sources.append(str(folder / "broken.xls"))
+    return [str(source) for source in sources]
+
+
+def _kept_pairs(files):
+    """The "year-region" keys of the kept rows, as processed_combinations has them."""
+    kept = files[files["status"] == KEPT]
+    return {f"{int(year)}-{region}" for year, region in zip(kept["year"], kept["region"])}
+
+
+def test_classifies_like_iter_ingested(corpus, tmp_path):
+    with Catalog(str(tmp_path / "catalog.sqlite")) as catalog:
+        kept = catalog.refresh(corpus)
+        files = catalog.frame().set_index("name")
+
+    _, processed = ingest_files(corpus, verbose=False)
+    assert [os.path.basename(source) for source in kept] == list(processed.values())
+    assert _kept_pairs(files) == set(processed)
+
+    assert files.loc[ROLLUPS, "status"].tolist() == [EXCLUDED, EXCLUDED]
+    assert files.loc[ROLLUPS, "region"].tolist() == ["Asia", "Total"]
+    assert files.loc["japan_again.xls", ["status", "duplicate_of", "same_content"]].tolist() == [
+        DUPLICATE, "cobbook100_1.xls", 1]
+    assert files.loc["broken.xls", "status"] == FAILED
+    assert files.loc["broken.xls", "error"]
+    assert (files.loc[COUNTRY_WORKBOOKS, "status"] == KEPT).all()
+    assert files["position"].tolist() == list(range(len(corpus)))
+
+
+def test_first_listed_copy_is_kept(corpus, tmp_path):
+    reordered = [corpus[-2]] + corpus[:-2] + [corpus[-1]]
+    with Catalog(str(tmp_path / "catalog.sqlite")) as catalog:
+        kept = catalog.refresh(reordered)
+        duplicate = catalog.frame(DUPLICATE)
+    assert os.path.basename(kept[0]) == "japan_again.xls"
+    assert duplicate["name"].tolist() == ["cobbook100_1.xls"]
+    assert duplicate["duplicate_of"].tolist() == ["japan_again.xls"]
+
+
+def test_refresh_rescans_only_changed_files(corpus, tmp_path):
+    path = str(tmp_path / "catalog.sqlite")
+    with Catalog(path) as catalog:
+        first = catalog.refresh(corpus)
+        assert (catalog.scanned, catalog.reused) == (len(corpus), 0)
+
+    with Catalog(path) as catalog:
+        # Failed files are retried on every refresh
+        assert catalog.refresh(corpus) == first
+        assert (catalog.scanned, catalog.reused) == (1, len(corpus) - 1)
+
+        stat = os.stat(corpus[0])
+        os.utime(corpus[0], (stat.st_atime, stat.st_mtime + 10))
+        catalog.refresh(corpus)
+        assert catalog.scanned == 2
+
+        # Unlisted files are forgotten, and the copy takes over their pair
+        catalog.refresh([source for source in corpus if not source.endswith("cobbook100_1.xls")])
+        assert catalog.frame(KEPT)["name"].tolist()[-1] == "japan_again.xls"
+        assert "cobbook100_1.xls" not in catalog.frame()["name"].tolist()
+
+
+def test_build_catalog_counts(corpus, tmp_path):
+    counts = build_catalog(corpus, str(tmp_path / "catalog.sqlite"))
+    assert counts == {KEPT: len(COUNTRY_WORKBOOKS), DUPLICATE: 1, EXCLUDED: 2, FAILED: 1,
+                      "scanned": len(corpus), "reused": 0}
+
+
+def test_merge_with_catalog_matches_merge_without(corpus, tmp_path):
+    run(corpus, str(tmp_path / "plain.parquet"), executor="serial", verbose=False)
+    run(corpus, str(tmp_path / "planned.parquet"), executor="serial", verbose=False,
+        catalog=str(tmp_path / "catalog.sqlite"))
+    pd.testing.assert_frame_equal(read_dataset(str(tmp_path / "planned.parquet")),
+                                  read_dataset(str(tmp_path / "plain.parquet")))
@@ -0,0 +1,117 @@
+# tests/test_correlation.py
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from Mergefn.immigration.correlation import (ADMISSION, AGE, ALL_REGIONS, MIN_ROWS, OCCUPATION, PAIRS, age_group,
+                                             correlation_matrix, correlation_panels, read_correlations,
+                                             write_correlations, year_windows)
+
+REGIONS = ["Italy", "Japan", "Kazakhstan", "Peru"]
+YEARS = list(range(2010, 2020))
+SUBGROUPS = {
+    # Labels of both spellings, summed into one bracket
+    AGE: ["Under 18 years", "18 to 24 years", "18-24 years", "25 to 34 years", "35 to 44 years",
+          "65 years and over", "Unknown"],
+    OCCUPATION: ["Service occupations", "Military", "Homemakers"],
+    ADMISSION: ["Diversity", "Refugees and asylees", "Other"],
+}
+
+
+@pytest.fixture(scope="module")
+def merged():
+    """
+    Random counts with the gaps the notebook's pivots have to handle: Japan
+    has no occupation rows in 2012-2013, Peru lacks Homemakers in 2015 and
+    Military is always zero in Kazakhstan.
+    """
+    rng = np.random.default_rng(2)
+    rows = []
+    for region in REGIONS:
+        for year in YEARS:
+            for group, subgroups in SUBGROUPS.items():
+                if region == "Japan" and group == OCCUPATION and year in (2012, 2013):
+                    continue
+                for subgroup in subgroups:
+                    if (region, year, subgroup) == ("Peru", 2015, "Homemakers"):
+                        continue
+                    total = 0.0 if (region, subgroup) == ("Kazakhstan", "Military") else float(rng.integers(0, 1000))
+                    rows.append((str(year), region, group, subgroup, total))
+    return pd.DataFrame(rows, columns=["Year", "Region", "Group", "Subgroup", "Total"])
+
+
+def _notebook_matrix(merged, group1, group2, region, start, end):
+    """The notebook's way: pivot each group per (Region, Year), inner-merge them and call DataFrame.corr."""
+    years = merged["Year"].astype(int)
+    rows = merged[(years >= start) & (years <= end)]
+    if region != ALL_REGIONS:
+        rows = rows[rows["Region"] == region]
+
+    def pivot(group):
+        frame = rows[rows["Group"] == group]
+        categories = frame["Subgroup"].map(age_group) if group == AGE else frame["Subgroup"]
+        frame = frame.assign(Category=categories).dropna(subset=["Category"])
+        return frame.pivot_table(index=["Region", "Year"], columns="Category", values="Total", aggfunc="sum").fillna(0)
+
+    left, right = pivot(group1), pivot(group2)
+    both = left.join(right, how="inner", lsuffix="_1", rsuffix="_2")
+    return both.corr().loc[left.columns, right.columns], len(both)
+
+
+def _assert_same_matrix(matrix, expected):
+    """Same categories (age brackets come in AGE_GROUPS order) and correlations up to float32."""
+    assert sorted(matrix.index) == sorted(expected.index)
+    assert sorted(matrix.columns) == sorted(expected.columns)
+    expected = expected.loc[matrix.index, matrix.columns]
+    np.testing.assert_allclose(matrix.to_numpy(dtype=float), expected.to_numpy(), atol=1e-5)
+
+
+@pytest.mark.parametrize("group1, group2", PAIRS)
+@pytest.mark.parametrize("region", REGIONS + [ALL_REGIONS])
+def test_whole_span_matches_dataframe_corr(merged, group1, group2, region):
+    panels = correlation_panels(merged)
+    matrix = correlation_matrix(panels, group1, group2, region)
+    expected, rows = _notebook_matrix(merged, group1, group2, region, YEARS[0], YEARS[-1])
+
+    _assert_same_matrix(matrix, expected)
+    panel = panels[(panels["Region"] == region) & (panels["Group1"] == group1) & (panels["Group2"] == group2)]
+    assert set(panel["Rows"]) == {rows}
+
+
+def test_windows_match_dataframe_corr(merged):
+    panels = correlation_panels(merged, window=4, step=3)
+    assert sorted(set(zip(panels["Start"], panels["End"]))) == [(2010, 2013), (2013, 2016), (2016, 2019)]
+    for region in ["Japan", ALL_REGIONS]:
+        for start, end in year_windows(YEARS, 4, 3):
+            matrix = correlation_matrix(panels, AGE, OCCUPATION, region, start, end)
+            expected, rows = _notebook_matrix(merged, AGE, OCCUPATION, region, start, end)
+            if rows < MIN_ROWS:
+                assert matrix.empty
+            else:
+                _assert_same_matrix(matrix, expected)
+
+
+def test_constant_category_has_no_correlation(merged):
+    matrix = correlation_matrix(correlation_panels(merged), OCCUPATION, ADMISSION, "Kazakhstan")
+    assert matrix.loc["Military"].isna().all()
+    assert matrix.drop(index="Military").notna().all().all()
+
+
+def test_min_rows_drops_short_panels(merged):
+    # Japan has two occupation-less years in 2010-2013
+    panels = correlation_panels(merged, pairs=[(AGE, OCCUPATION)], window=4, step=3, min_rows=3, pooled=False)
+    windows = panels[panels["Region"] == "Japan"][["Start", "End"]].drop_duplicates()
+    assert list(map(tuple, windows.to_numpy())) == [(2013, 2016), (2016, 2019)]
+    assert ALL_REGIONS not in set(panels["Region"])
+
+
+def test_workers_and_round_trip(merged, tmp_path):
+    serial = correlation_panels(merged, window=5)
+    pd.testing.assert_frame_equal(correlation_panels(merged, window=5, workers=2), serial)
+
+    path = write_correlations(serial, str(tmp_path / "panels.parquet"))
+    pd.testing.assert_frame_equal(read_correlations(path), serial)
+    japan = read_correlations(path, regions="Japan", groups=[AGE, OCCUPATION])
+    expected = serial[(serial["Region"] == "Japan") & (serial["Group1"] == AGE) & (serial["Group2"] == OCCUPATION)]
+    pd.testing.assert_frame_equal(japan.astype(object), expected.reset_index(drop=True).astype(object))
@@ -0,0 +1,115 @@
+# tests/test_coverage.py
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from Mergefn.immigration.coverage import Coverage
+from Mergefn.immigration.cube import CountCube
+
+REGIONS = ["Dominica", "Dominican Republic", "Equatorial Guinea", "Guinea", "Guinea-Bissau", "Japan",
+           "Niger", "Nigeria", "Papua New Guinea", "South Sudan", "Sudan"]
+
+
+# Region -> years with rows in the merged fixture below
+YEARS_OF = {
+    "Japan": list(range(2010, 2020)),
+    "Italy": [2010, 2011, 2013, 2014, 2015, 2016, 2017, 2019],
+    "Kazakhstan": [2012, 2013, 2014],
+    "South Sudan": [2016, 2017, 2018, 2019],
+}
+
+
+@pytest.fixture
+def merged():
+    """A few rows per (year, region) of YEARS_OF, with integer-like string years."""
+    rows = [(str(year), region, group) for region, years in YEARS_OF.items() for year in years
+            for group in ["Age", "Occupation"]]
+    return pd.DataFrame(rows, columns=["Year", "Region", "Group"]).assign(Subgroup="Unknown", Total=1.0)
+
+
+def _availability(df):
+    """The notebook's Region x Year table: 1 where the region has a row that year."""
+    df = df.assign(Year=df["Year"].astype(int))
+    return pd.crosstab(df["Region"], df["Year"]).clip(upper=1)
+
+
+@pytest.fixture
+def coverage():
+    return Coverage.from_frame(pd.DataFrame({"Year": [2020] * len(REGIONS), "Region": REGIONS}))
+
+
+@pytest.mark.parametrize("term, expected", [
+    ("Guinea", ["Equatorial Guinea", "Guinea", "Guinea-Bissau", "Papua New Guinea"]),
+    ("sudan", ["South Sudan", "Sudan"]),
+    ("Niger", ["Niger", "Nigeria"]),
+    ("Dominica", ["Dominica", "Dominican Republic"]),
+])
+def test_search_exact_name_keeps_substring_matches(coverage, term, expected):
+    assert coverage.search(term) == expected
+
+
+@pytest.mark.parametrize("term, expected", [
+    ("Japan", ["Japan"]),
+    ("JAPAN", ["Japan"]),
+    ("bissau", ["Guinea-Bissau"]),
+    ("Atlantis", []),
+])
+def test_search_matches_like_str_contains(coverage, term, expected):
+    regions = pd.Series(REGIONS)
+    assert coverage.search(term) == expected
+    assert expected == sorted(regions[regions.str.contains(term, case=False)])
+
+
+def test_from_frame_matches_crosstab(merged):
+    coverage = Coverage.from_frame(merged)
+    pd.testing.assert_frame_equal(coverage.availability(), _availability(merged), check_names=False,
+                                  check_dtype=False)
+    assert coverage.year_counts().to_dict() == {region: len(years) for region, years in YEARS_OF.items()}
+    assert len(coverage.missing()) == 4 * 10 - sum(map(len, YEARS_OF.values()))
+
+
+def test_missing_years_and_common_countries_match_per_year_loops(merged):
+    coverage = Coverage.from_frame(merged)
+    all_years = sorted(merged["Year"].astype(int).unique())
+    expected = {}
+    for region in sorted(merged["Region"].unique()):
+        region_years = set(merged.loc[merged["Region"] == region, "Year"].astype(int))
+        gaps = [year for year in all_years if year not in region_years]
+        if gaps:
+            expected[region] = gaps
+    assert coverage.missing_years() == expected
+
+    for max_missing in range(0, 8):
+        common = sorted(region for region, years in YEARS_OF.items() if len(all_years) - len(years) <= max_missing)
+        assert coverage.common_countries(max_missing) == common
+
+
+def test_years_of(merged):
+    coverage = Coverage.from_frame(merged)
+    assert coverage.years_of("Italy") == YEARS_OF["Italy"]
+    assert coverage.years_of(["Kazakhstan", "South Sudan", "Atlantis"]) == [2012, 2013, 2014, 2016, 2017, 2018, 2019]
+    assert coverage.years_of("Atlantis") == []
+
+
+def test_from_cube_matches_from_frame(merged):
+    coverage = Coverage.from_cube(CountCube.from_frame(merged))
+    pd.testing.assert_frame_equal(coverage.availability(), Coverage.from_frame(merged).availability())
+
+
+def test_update_matches_rebuild(merged):
+    years = merged["Year"].astype(int)
+    coverage = Coverage.from_frame(merged[years < 2018])
+
+    # 2018 is new; 2017 is re-merged without Italy; a new region appears
+    new_rows = pd.concat([
+        merged[(years == 2018) | ((years == 2017) & (merged["Region"] != "Italy"))],
+        pd.DataFrame({"Year": ["2017"], "Region": ["Eswatini"], "Group": ["Age"]}),
+    ])
+    rebuilt = pd.concat([merged[years < 2017], merged[(years == 2017) & (merged["Region"] != "Italy")], new_rows])
+    coverage.update(new_rows)
+
+    pd.testing.assert_frame_equal(coverage.availability(), Coverage.from_frame(rebuilt).availability())
+    assert coverage.search("eswat") == ["Eswatini"]
+    assert coverage.years_of("Italy") == [2010, 2011, 2013, 2014, 2015, 2016]
+    assert np.array_equal(coverage.present, Coverage.from_frame(rebuilt).present)
@@ -0,0 +1,88 @@
+# tests/test_cube.py
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import Forecast_Occupation as fo
+from Mergefn.immigration.cube import CountCube
+
+REGIONS = ["Japan", "Italy", "Kazakhstan"]
+SUBGROUPS = ["Service occupations", "Military", "Students or children"]
+
+
+@pytest.fixture
+def merged():
+    """Long-format rows with repeated cells, a missing count, padded labels and a gap."""
+    rng = np.random.default_rng(1)
+    rows = []
+    for year in range(2010, 2016):
+        for region in REGIONS:
+            if region == "Kazakhstan" and year == 2012:
+                continue
+            for subgroup in SUBGROUPS:
+                rows.append((str(year), region, "Occupation", subgroup + " ", float(rng.integers(0, 500))))
+            rows.append((str(year), region, "Age", "18 to 24 years", float(rng.integers(0, 500))))
+    rows.append(("2011", "Japan", "Occupation", "Military", 7.0))
+    rows.append(("2013", "Italy", "Occupation", "Military", np.nan))
+    return pd.DataFrame(rows, columns=["Year", "Region", "Group", "Subgroup", "Total"])
+
+
+def _expected(merged):
+    """The rows as forecast code reads them: integer Year, stripped Subgroup."""
+    return merged.assign(Year=merged["Year"].astype(int), Subgroup=merged["Subgroup"].str.strip())
+
+
+def test_axes_are_sorted_labels(merged):
+    cube = CountCube.from_frame(merged)
+    assert cube.years == list(range(2010, 2016))
+    assert cube.regions == sorted(REGIONS)
+    assert cube.groups == ["Age", "Occupation"]
+    assert cube.subgroups == sorted(SUBGROUPS + ["18 to 24 years"])
+    assert cube.values.shape == (6, 3, 2, 4)
+
+
+@pytest.mark.parametrize("filters", [
+    {},
+    {"regions": "Japan"},
+    {"years": [2011, 2013], "groups": "Occupation"},
+    {"regions": ["Italy", "Atlantis"], "subgroups": ["Military"]},
+])
+def test_total_matches_groupby_sum(merged, filters):
+    expected = _expected(merged)
+    for column, argument in [("Year", "years"), ("Region", "regions"), ("Group", "groups"), ("Subgroup", "subgroups")]:
+        wanted = filters.get(argument)
+        if wanted is not None:
+            expected = expected[expected[column].isin([wanted] if isinstance(wanted, str) else wanted)]
+    assert CountCube.from_frame(merged).total(**filters) == pytest.approx(expected["Total"].sum())
+
+
+def test_total_without_data_is_nan(merged):
+    cube = CountCube.from_frame(merged)
+    assert np.isnan(cube.total(years=2012, regions="Kazakhstan"))
+    assert np.isnan(cube.total(regions="Atlantis"))
+
+
+@pytest.mark.parametrize("by_region", [True, False])
+@pytest.mark.parametrize("regions, subgroups", [(None, None), (["Japan", "Kazakhstan"], ["Military"])])
+def test_pivot_matches_pivot_table(merged, by_region, regions, subgroups):
+    expected = _expected(merged)
+    expected = expected[expected["Group"] == "Occupation"]
+    if regions is not None:
+        expected = expected[expected["Region"].isin(regions)]
+    if subgroups is not None:
+        expected = expected[expected["Subgroup"].isin(subgroups)]
+    columns = ["Region", "Subgroup"] if by_region else "Subgroup"
+    expected = expected.pivot_table(index="Year", columns=columns, values="Total", aggfunc="sum")
+
+    pivot = CountCube.from_frame(merged).pivot("Occupation", regions=regions, subgroups=subgroups,
+                                               by_region=by_region)
+    pd.testing.assert_frame_equal(pivot, expected, check_dtype=False, check_column_type=False,
+                                  check_index_type=False)
+
+
+def test_forecast_from_cube_matches_frame(merged):
+    cube = CountCube.from_frame(merged)
+    for by_region in [True, False]:
+        pd.testing.assert_frame_equal(fo.forecast_batch(cube, by_country=by_region),
+                                      fo.forecast_batch(merged, by_country=by_region))
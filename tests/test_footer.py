@@ -0,0 +1,80 @@
+# tests/test_footer.py
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from Mergefn.immigration.footer import footer_position, is_footer, sheet_footer_row, trim_footer
+from Mergefn.immigration.workbook import HEADER_ROW, open_sheet, read_sheet_table
+
+from .conftest import SAMPLE_WORKBOOKS, TABLE_SECTIONS, workbook_path
+from .legacy import read_then_scan
+
+# Footer lines as published, FY2005-FY2022, plus the "Note:" form
+FOOTER_VARIANTS = [
+    "D Data withheld to limit disclosure.",
+    "D  Data withheld to limit disclosure.",
+    "- Represents zero.",
+    "- Represents zero",
+    "Source: U.S. Department of Homeland Security.",
+    "Source: U.S. Department of Homeland Security",
+    "Source: DHS Office of Immigration Statistics.",
+    "Note: Data are for fiscal years.",
+    "d data WITHHELD to limit disclosure.",
+]
+
+# Characteristic cells of every section of a profile table
+TABLE_ROWS = [label for header, labels in TABLE_SECTIONS for label in [header, *(labels or [])] if label]
+
+# Empty rows left between the table and its notes
+BLANK_SEPARATORS = ["", "   ", None, np.nan]
+
+
+def _table(labels):
+    """A Characteristic column with made-up counts, as read_sheet_table returns it."""
+    return pd.DataFrame({"Characteristic": labels, "Total": range(len(labels))})
+
+
+@pytest.mark.parametrize("line", FOOTER_VARIANTS)
+def test_footer_variant_detected(line):
+    assert is_footer(line)
+
+
+@pytest.mark.parametrize("line", FOOTER_VARIANTS)
+def test_table_cut_at_footer_variant(line):
+    rows = TABLE_ROWS + [line] + TABLE_ROWS
+    assert footer_position(rows) == len(TABLE_ROWS)
+    assert trim_footer(_table(rows))["Characteristic"].tolist() == TABLE_ROWS
+
+
+@pytest.mark.parametrize("line", TABLE_ROWS)
+def test_table_row_not_footer(line):
+    assert not is_footer(line)
+
+
+@pytest.mark.parametrize("blank", BLANK_SEPARATORS)
+def test_blank_separator_kept_above_footer(blank):
+    rows = TABLE_ROWS + [blank, blank] + FOOTER_VARIANTS[:2]
+    assert not is_footer(blank)
+    assert footer_position(rows) == len(TABLE_ROWS) + 2
+    assert len(trim_footer(_table(rows))) == len(TABLE_ROWS) + 2
+
+
+@pytest.mark.parametrize("total", ["Total", "Total, all countries", "Other"])
+def test_trailing_total_kept(total):
+    # A closing totals row is the last table row, not the start of the notes
+    rows = TABLE_ROWS + [total] + FOOTER_VARIANTS[-2:]
+    assert trim_footer(_table(rows))["Characteristic"].tolist() == TABLE_ROWS + [total]
+
+
+def test_no_footer():
+    assert footer_position(TABLE_ROWS) == len(TABLE_ROWS)
+    assert len(trim_footer(_table(TABLE_ROWS))) == len(TABLE_ROWS)
+    assert trim_footer(pd.DataFrame()).empty
+
+
+@pytest.mark.parametrize("name", SAMPLE_WORKBOOKS)
+def test_stop_at_footer_matches_read_then_scan(name):
+    sheet = open_sheet(workbook_path(name))
+    stopped = read_sheet_table(sheet, end_row=sheet_footer_row(sheet, HEADER_ROW + 1))
+    pd.testing.assert_frame_equal(read_then_scan(sheet), stopped)
@@ -0,0 +1,259 @@
+# tests/test_forecast.py
+
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import Forecast_Occupation as fo
+from benchmarks.bench_forecast_startup import HEAVY_MODULES
+
+from .conftest import REPO_ROOT
+
+CATEGORIES = ["Service occupations", "Sales and office occupations"]
+COUNTRIES = ["Japan", "Italy"]
+YEARS = list(range(2005, 2017))
+
+
+@pytest.fixture
+def occupation_data():
+    """Occupation rows of two countries with noisy quadratic trends; Italy misses 2010."""
+    rng = np.random.default_rng(0)
+    rows = []
+    for i, region in enumerate(COUNTRIES):
+        for j, category in enumerate(CATEGORIES):
+            for year in YEARS:
+                if region == "Italy" and year == 2010:
+                    continue
+                t = year - YEARS[0]
+                total = 500 + 100 * i + 40 * j + 25 * t - 1.5 * t * t + rng.normal(0, 20)
+                rows.append((str(year), region, "Occupation", " " + category, total))
+            # Rows of other groups are ignored
+            rows.append(("2010", region, "Age", "18 to 24 years", 1e6))
+    return pd.DataFrame(rows, columns=["Year", "Region", "Group", "Subgroup", "Total"])
+
+
+def _per_series_fit(years, values, forecast_years, degree, alpha=0.05):
+    """Forecast and interval of one series with its own OLS fit, as the per-country loop did."""
+    sm = pytest.importorskip("statsmodels.api")
+    years = np.asarray(years, dtype=float)
+    grid = np.arange(int(years[0]), int(years[-1]) + forecast_years + 1)
+    design = np.vander(years - years.mean(), degree + 1, increasing=True)
+    design_future = np.vander(grid - years.mean(), degree + 1, increasing=True)
+    ci = sm.OLS(np.asarray(values, dtype=float), design).fit().get_prediction(design_future).conf_int(alpha=alpha)
+    forecast = np.polyval(np.polyfit(years, values, degree), grid)
+    return grid, np.clip(forecast, 0, None), np.clip(ci[:, 0], 0, None), np.clip(ci[:, 1], 0, None)
+
+
+@pytest.mark.parametrize("degree", [1, 2])
+def test_forecast_batch_matches_per_country_fit(occupation_data, degree):
+    table = fo.forecast_batch(occupation_data, forecast_years=3, degree=degree)
+    assert set(map(tuple, table[["Region", "Occupation_Category"]].drop_duplicates().to_numpy())) == {
+        (region, category) for region in COUNTRIES for category in CATEGORIES}
+
+    for (region, category), rows in table.groupby(["Region", "Occupation_Category"]):
+        series = occupation_data[(occupation_data["Region"] == region)
+                                 & (occupation_data["Subgroup"].str.strip() == category)]
+        years = series["Year"].astype(int).to_numpy()
+        grid, forecast, lower, upper = _per_series_fit(years, series["Total"], 3, degree)
+
+        np.testing.assert_array_equal(rows["Year"], grid)
+        np.testing.assert_allclose(rows["Forecast"], forecast, rtol=1e-8)
+        np.testing.assert_allclose(rows["Lower_CI"], lower, rtol=1e-8)
+        np.testing.assert_allclose(rows["Upper_CI"], upper, rtol=1e-8)
+        np.testing.assert_array_equal(rows["Is_Forecast"], grid > years[-1])
+        actual = pd.Series(series["Total"].to_numpy(), index=years).reindex(grid)
+        np.testing.assert_array_equal(rows["Actual"], actual)
+
+
+def test_forecast_batch_sums_countries_per_category(occupation_data):
+    table = fo.forecast_batch(occupation_data, forecast_years=2, by_country=False)
+    assert "Region" not in table.columns
+
+    for category, rows in table.groupby("Occupation_Category"):
+        series = occupation_data[occupation_data["Subgroup"].str.strip() == category]
+        totals = series.groupby(series["Year"].astype(int))["Total"].sum()
+        _, forecast, _, _ = _per_series_fit(totals.index, totals, 2, 2)
+        np.testing.assert_allclose(rows["Forecast"], forecast, rtol=1e-8)
+
+
+def test_forecast_batch_filters(occupation_data):
+    table = fo.forecast_batch(occupation_data, occupation_categories=CATEGORIES[:1], countries=["Japan"])
+    assert set(table["Region"]) == {"Japan"}
+    assert set(table["Occupation_Category"]) == set(CATEGORIES[:1])
+
+    with pytest.raises(ValueError, match="No data found"):
+        fo.forecast_batch(occupation_data, countries=["Atlantis"])
+
+
+def test_forecast_occupations_without_plot_matches_batch_table(occupation_data):
+    forecasts = fo.forecast_occupations(occupation_data, forecast_years=3, plot=False)
+    table = fo.forecast_batch(occupation_data, forecast_years=3, by_country=False)
+    assert list(forecasts) == CATEGORIES
+    for category, frame in forecasts.items():
+        rows = table[table["Occupation_Category"] == category].reset_index(drop=True)
+        pd.testing.assert_frame_equal(frame, rows[list(frame.columns)])
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_render_forecasts_writes_charts_off_screen(occupation_data, tmp_path, workers):
+    pytest.importorskip("matplotlib")
+    table = fo.forecast_batch(occupation_data, forecast_years=3, by_country=False)
+    written = fo.render_forecasts(table, str(tmp_path), workers=workers, dpi=20)
+
+    # Categories in the table's (sorted) order, then the combined chart
+    names = [fo.category_chart_name(category) for category in sorted(CATEGORIES)] + ["combined_forecast.png"]
+    assert written == [str(tmp_path / name) for name in names]
+    for path in written:
+        with open(path, "rb") as fh:
+            assert fh.read(8) == b"\x89PNG\r\n\x1a\n"
+
+
+def test_render_forecasts_skips_categories_without_rows(occupation_data, tmp_path):
+    pytest.importorskip("matplotlib")
+    table = fo.forecast_batch(occupation_data, forecast_years=3, by_country=False)
+    written = fo.render_forecasts(table, str(tmp_path), occupation_categories=["Military", CATEGORIES[0]],
+                                  show_combined=False, dpi=20)
+    assert written == [str(tmp_path / fo.category_chart_name(CATEGORIES[0]))]
+
+
+def _run_python(*args):
+    """Run the interpreter from the repository root and return the completed process."""
+    return subprocess.run([sys.executable, *args], cwd=REPO_ROOT, capture_output=True, text=True)
+
+
+def test_import_loads_no_heavy_module():
+    code = ("import sys, Forecast_Occupation; "
+            f"print(','.join(name for name in {HEAVY_MODULES!r} if name in sys.modules))")
+    result = _run_python("-c", code)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == ""
+
+
+@pytest.mark.parametrize("args, status, output", [
+    (["--help"], 0, "--headless"),
+    (["--data", "missing.parquet"], 2, "data file not found"),
+])
+def test_command_line_answers_without_loading_data(args, status, output):
+    result = _run_python("Forecast_Occupation.py", *args)
+    assert result.returncode == status
+    assert output in result.stdout + result.stderr
+
+
+def test_cache_hit_returns_the_fitted_table(occupation_data):
+    cache = fo.ForecastCache()
+    first = fo.forecast_batch(occupation_data, cache=cache)
+    assert (cache.hits, cache.misses) == (0, 4)
+
+    second = fo.forecast_batch(occupation_data, cache=cache)
+    assert (cache.hits, cache.misses) == (4, 4)
+    pd.testing.assert_frame_equal(second, first)
+
+    # A narrower filter reuses the series it keeps
+    japan = fo.forecast_batch(occupation_data, countries=["Japan"], cache=cache)
+    assert (cache.hits, cache.misses) == (6, 4)
+    pd.testing.assert_frame_equal(japan, first[first["Region"] == "Japan"].reset_index(drop=True))
+
+
+def test_cache_misses_when_data_or_parameters_change(occupation_data):
+    cache = fo.ForecastCache()
+    fo.forecast_batch(occupation_data, cache=cache)
+
+    fo.forecast_batch(occupation_data, degree=1, cache=cache)
+    fo.forecast_batch(occupation_data, forecast_years=3, cache=cache)
+    assert (cache.hits, cache.misses) == (0, 12)
+
+    # Only the edited series is refitted, and from the new values
+    changed = occupation_data.copy()
+    edited = (changed["Region"] == "Italy") & (changed["Subgroup"].str.strip() == CATEGORIES[0])
+    changed.loc[edited & (changed["Year"] == "2016"), "Total"] += 1000
+    table = fo.forecast_batch(changed, cache=cache)
+    assert (cache.hits, cache.misses) == (3, 13)
+    pd.testing.assert_frame_equal(table, fo.forecast_batch(changed))
+
+
+def test_cache_key_covers_values_and_parameters():
+    years, values = np.arange(2005, 2015), np.linspace(100, 200, 10)
+    key = fo.series_cache_key(("Japan", "Military"), years, values, 5, 2, 0.05)
+    assert key == fo.series_cache_key(("Japan", "Military"), years, values.copy(), 5, 2, 0.05)
+    assert len({
+        key,
+        fo.series_cache_key(("Italy", "Military"), years, values, 5, 2, 0.05),
+        fo.series_cache_key(("Japan", "Military"), years + 1, values, 5, 2, 0.05),
+        fo.series_cache_key(("Japan", "Military"), years, values + 1, 5, 2, 0.05),
+        fo.series_cache_key(("Japan", "Military"), years, values, 4, 2, 0.05),
+        fo.series_cache_key(("Japan", "Military"), years, values, 5, 3, 0.05),
+        fo.series_cache_key(("Japan", "Military"), years, values, 5, 2, 0.1),
+    }) == 7
+
+
+def test_disk_cache_survives_a_new_process_cache(occupation_data, tmp_path):
+    first = fo.forecast_batch(occupation_data, cache=fo.ForecastCache(str(tmp_path)))
+    assert len(list(tmp_path.glob("*.pkl"))) == 4
+
+    cache = fo.ForecastCache(str(tmp_path))
+    pd.testing.assert_frame_equal(fo.forecast_batch(occupation_data, cache=cache), first)
+    assert (cache.hits, cache.misses) == (4, 0)
+
+    # An unreadable entry is dropped and refitted
+    victim = next(tmp_path.glob("*.pkl"))
+    victim.write_bytes(b"not a pickle")
+    cache = fo.ForecastCache(str(tmp_path))
+    pd.testing.assert_frame_equal(fo.forecast_batch(occupation_data, cache=cache), first)
+    assert (cache.hits, cache.misses) == (3, 1)
+
+    cache.clear()
+    assert list(tmp_path.glob("*.pkl")) == []
+
+
+def test_cache_evicts_least_recently_used():
+    record = {"Forecast": np.zeros(100)}  # 800 bytes
+    cache = fo.ForecastCache(max_memory_bytes=2000)
+    for key in "abc":
+        cache.put(key, record)
+        cache.get("a")
+    assert cache.evictions == 1
+    assert cache.get("b") is None
+    assert cache.get("a") is record and cache.get("c") is record
+
+
+def _per_series_backtest(years, values, degree, horizon, min_train):
+    """MAE and MAPE of one series refitted with numpy.polyfit at every origin."""
+    errors, pct_errors = [], []
+    for end in range(max(min_train, degree + 1), len(years)):
+        origin = years[end - 1]
+        fit = np.polyfit(years[:end] - years[:end].mean(), values[:end], degree)
+        for year, actual in zip(years[end:], values[end:]):
+            if year <= origin + horizon:
+                predicted = max(np.polyval(fit, year - years[:end].mean()), 0)
+                errors.append(abs(predicted - actual))
+                if actual != 0:
+                    pct_errors.append(abs(predicted - actual) / abs(actual))
+    return np.mean(errors), 100 * np.mean(pct_errors), len(errors)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_backtest_batch_matches_per_series_refits(occupation_data, workers):
+    result = fo.backtest_batch(occupation_data, degrees=(1, 2, 3), horizon=2, min_train=5, workers=workers)
+    assert len(result) == len(COUNTRIES) * len(CATEGORIES) * 3
+
+    for (region, category, degree), row in result.set_index(["Region", "Occupation_Category", "Degree"]).iterrows():
+        series = occupation_data[(occupation_data["Region"] == region)
+                                 & (occupation_data["Subgroup"].str.strip() == category)]
+        years = series["Year"].astype(int).to_numpy()
+        mae, mape, forecasts = _per_series_backtest(years, series["Total"].to_numpy(), degree, 2, 5)
+        assert row["Forecasts"] == forecasts
+        assert row["MAE"] == pytest.approx(mae, rel=1e-8)
+        assert row["MAPE"] == pytest.approx(mape, rel=1e-8)
+
+    best = result[result["Best"]]
+    assert len(best) == len(COUNTRIES) * len(CATEGORIES)
+    lowest = result.loc[result.groupby(["Region", "Occupation_Category"])["MAE"].idxmin()]
+    pd.testing.assert_frame_equal(best, lowest)
+
+
+def test_backtest_batch_needs_enough_years(occupation_data):
+    with pytest.raises(ValueError, match="more than 20 observed years"):
+        fo.backtest_batch(occupation_data, min_train=20)
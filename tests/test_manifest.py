@@ -0,0 +1,54 @@
+# tests/test_manifest.py
+
+import os
+import shutil
+
+import pandas as pd
+
+from Mergefn.immigration.ingest import ingest_files
+from Mergefn.immigration.manifest import ParseCache
+
+from .conftest import workbook_path
+
+
+def _ingest(paths, cache_dir):
+    cache = ParseCache(str(cache_dir))
+    frames, _ = ingest_files(paths, verbose=False, cache=cache)
+    return frames, cache
+
+
+def _copy(name, path):
+    shutil.copyfile(workbook_path(name), path)
+    return str(path)
+
+
+def test_unchanged_workbooks_are_cache_hits(tmp_path):
+    paths = [_copy("cobbook100_1.xls", tmp_path / "a.xls"), _copy("fy2019cobbook100.xls", tmp_path / "b.xls")]
+    parsed, cache = _ingest(paths, tmp_path / "cache")
+    assert (cache.hits, cache.misses) == (0, 2)
+
+    # A new run reads the saved manifest; touching a file does not invalidate it
+    os.utime(paths[0], (0, 0))
+    cached, cache = _ingest(paths, tmp_path / "cache")
+    assert (cache.hits, cache.misses) == (2, 0)
+    for expected, actual in zip(parsed, cached):
+        pd.testing.assert_frame_equal(expected, actual)
+
+
+def test_changed_workbook_is_parsed_again(tmp_path):
+    path = _copy("cobbook100_1.xls", tmp_path / "a.xls")
+    _ingest([path], tmp_path / "cache")
+
+    _copy("fy2019cobbook100.xls", path)
+    frames, cache = _ingest([path], tmp_path / "cache")
+    assert (cache.hits, cache.misses) == (0, 1)
+    assert frames[0]["Year"].iloc[0] == "2019"
+    assert frames[0]["Region"].iloc[0] == "Kazakhstan"
+
+
+def test_removed_workbook_is_pruned(tmp_path):
+    paths = [_copy("cobbook100_1.xls", tmp_path / "a.xls"), _copy("fy2019cobbook100.xls", tmp_path / "b.xls")]
+    _ingest(paths, tmp_path / "cache")
+    _, cache = _ingest(paths[:1], tmp_path / "cache")
+    assert list(cache.manifest) == [os.path.abspath(paths[0])]
+    assert len(os.listdir(cache.frames_dir)) == 1
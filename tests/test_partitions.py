@@ -0,0 +1,68 @@
+# tests/test_partitions.py
+
+import pandas as pd
+import pytest
+
+from Mergefn.immigration.engine import run
+from Mergefn.immigration.partitions import PartitionedWriter
+from Mergefn.immigration.storage import read_dataset
+
+from .conftest import COUNTRY_WORKBOOKS, workbook_path
+
+# The newest fiscal year of the sample, appended to the others
+NEW_YEAR = ["fy2022cobbook10.xls"]
+EARLIER_YEARS = [name for name in COUNTRY_WORKBOOKS if name not in NEW_YEAR]
+
+
+def _merge(names, output, profile="all", append=False):
+    return run([workbook_path(name) for name in names], str(output), profile=profile,
+               executor="serial", verbose=False, append=append)
+
+
+def _rows(path):
+    """The dataset in a fixed row order, with plain string labels."""
+    df = read_dataset(str(path)).astype({"Region": str, "Group": str, "Subgroup": str})
+    return df.sort_values(["Year", "Region", "Group", "Subgroup"]).reset_index(drop=True)
+
+
+def test_append_matches_full_rebuild(tmp_path):
+    _merge(COUNTRY_WORKBOOKS, tmp_path / "rebuilt")
+    _merge(EARLIER_YEARS, tmp_path / "appended")
+    _merge(NEW_YEAR, tmp_path / "appended", append=True)
+    pd.testing.assert_frame_equal(_rows(tmp_path / "rebuilt"), _rows(tmp_path / "appended"))
+
+
+def test_append_replaces_remerged_year(tmp_path):
+    _merge(COUNTRY_WORKBOOKS, tmp_path / "rebuilt")
+    _merge(COUNTRY_WORKBOOKS, tmp_path / "appended")
+    _merge(NEW_YEAR, tmp_path / "appended", append=True)
+    pd.testing.assert_frame_equal(_rows(tmp_path / "rebuilt"), _rows(tmp_path / "appended"))
+
+
+def test_append_refused_with_imputation(tmp_path):
+    _merge(EARLIER_YEARS, tmp_path / "merged", profile="final")
+    with pytest.raises(ValueError, match="imput"):
+        _merge(NEW_YEAR, tmp_path / "merged", profile="final", append=True)
+
+
+def test_failed_merge_keeps_previous_partitions(tmp_path, monkeypatch):
+    _merge(COUNTRY_WORKBOOKS, tmp_path / "merged")
+    before = _rows(tmp_path / "merged")
+    stats = (tmp_path / "merged" / "_partitions.json").read_text()
+
+    # A rebuild that fails after its first chunk, one workbook per chunk
+    append = PartitionedWriter.append
+
+    def fail_after_first(writer, df):
+        if writer.rows:
+            raise RuntimeError("merge failed")
+        append(writer, df)
+
+    monkeypatch.setattr(PartitionedWriter, "append", fail_after_first)
+    with pytest.raises(RuntimeError, match="merge failed"):
+        run([workbook_path(name) for name in EARLIER_YEARS], str(tmp_path / "merged"), profile="all",
+            executor="serial", verbose=False, chunk_rows=1)
+
+    assert (tmp_path / "merged" / "_partitions.json").read_text() == stats
+    assert not list((tmp_path / "merged").rglob("*.tmp"))
+    pd.testing.assert_frame_equal(before, _rows(tmp_path / "merged"))
@@ -0,0 +1,96 @@
+# tests/test_profiling.py
+
+import csv
+import json
+import os
+import time
+
+import pytest
+
+from Mergefn.immigration.engine import run
+from Mergefn.immigration.profiling import STAGES, RunProfiler, stage
+
+from .conftest import COUNTRY_WORKBOOKS, ROLLUP_WORKBOOKS
+
+
+def test_stage_accumulates_calls_rows_and_time():
+    profiler = RunProfiler()
+    for rows in (3, 4):
+        with profiler.stage("fit") as counts:
+            time.sleep(0.01)
+            counts["rows"] = rows
+    record = profiler.stages["fit"]
+    assert (record["calls"], record["rows"], record["in_workers"]) == (2, 7, False)
+    assert record["wall_s"] >= 0.02
+
+
+def test_stage_is_recorded_when_the_block_raises():
+    profiler = RunProfiler()
+    with pytest.raises(RuntimeError):
+        with profiler.stage("load"):
+            raise RuntimeError("boom")
+    assert profiler.stages["load"]["calls"] == 1
+
+
+def test_stage_without_profiler_is_a_no_op():
+    with stage(None, "fit") as counts:
+        counts["rows"] = 5
+
+
+def test_report_orders_stages_and_flags_slow_files():
+    profiler = RunProfiler(slow_factor=10, slow_min_seconds=0.05)
+    with profiler.stage("write"):
+        pass
+    for i in range(4):
+        profiler.add_file(f"fast{i}.xls", {"table read": (0.01, 0.01, 10)}, rows=10)
+    profiler.add_file("slow.xls", {"table read": (0.5, 0.4, 10), "tagging": (0.1, 0.1, 10)}, rows=10)
+    profiler.add_file("cached.xls", status="cached")
+
+    report = profiler.report()
+    assert [record["stage"] for record in report["stages"]] == ["table read", "tagging", "write"]
+    table_read = report["stages"][0]
+    assert (table_read["calls"], table_read["rows"], table_read["in_workers"]) == (5, 50, True)
+    assert table_read["wall_s"] == pytest.approx(0.54)
+    assert report["slow_files"] == ["slow.xls"]
+    assert [(f["source"], f["wall_s"], f["slow"]) for f in report["files"]][-2:] == [
+        ("slow.xls", pytest.approx(0.6), True), ("cached.xls", 0, False)]
+    assert "Slow workbook: slow.xls" in profiler.summary()
+
+
+def test_write_json_and_csv(tmp_path):
+    profiler = RunProfiler()
+    with profiler.stage("load") as counts:
+        counts["rows"] = 12
+    profiler.add_file("a.xls", {"table read": (0.01, 0.01, 3)}, rows=3)
+
+    report = profiler.write(str(tmp_path / "out" / "report.json"))
+    with open(tmp_path / "out" / "report.json", encoding="utf-8") as fh:
+        assert json.load(fh)["stages"] == json.loads(json.dumps(report["stages"]))
+
+    profiler.write(str(tmp_path / "report.csv"))
+    with open(tmp_path / "report.csv", newline="", encoding="utf-8") as fh:
+        stages = list(csv.DictReader(fh))
+    with open(tmp_path / "report_files.csv", newline="", encoding="utf-8") as fh:
+        files = list(csv.DictReader(fh))
+    assert [(row["stage"], row["rows"]) for row in stages] == [("table read", "3"), ("load", "12")]
+    assert [(row["source"], row["rows"]) for row in files] == [("a.xls", "3")]
+
+
+def test_merge_reports_every_stage_and_workbook(sample_workbooks, tmp_path):
+    profiler = RunProfiler()
+    summary = run(sample_workbooks, str(tmp_path / "merged.parquet"), profile="final",
+                  executor="serial", verbose=False, profiler=profiler)
+    report = profiler.report()
+
+    stages = {record["stage"]: record for record in report["stages"]}
+    assert [name for name in STAGES if name in stages] == list(stages)
+    for name in ["discovery", "metadata read", "table read", "tagging", "imputation", "write"]:
+        assert stages[name]["calls"] > 0, name
+    assert stages["discovery"]["rows"] == len(sample_workbooks)
+    assert stages["metadata read"]["in_workers"] and not stages["write"]["in_workers"]
+    assert stages["dedup"]["rows"] == summary["rows"]
+
+    statuses = {record["source"]: record["status"] for record in report["files"]}
+    assert statuses == {**{name: "parsed" for name in COUNTRY_WORKBOOKS},
+                        **{name: "skipped" for name in ROLLUP_WORKBOOKS}}
+    assert os.path.exists(tmp_path / "merged.parquet")
@@ -0,0 +1,87 @@
+# tests/test_regions.py
+
+import csv
+import json
+
+import pandas as pd
+import pytest
+
+from Mergefn.immigration.regions import RegionNormalizer, name_tokens, standardize_region_name
+
+
+@pytest.fixture
+def normalizer():
+    return RegionNormalizer()
+
+
+@pytest.mark.parametrize("name, tokens", [
+    ("Gambia, The", ("gambia",)),
+    ("Saint Vincent & the Grenadines", ("grenadines", "saint", "vincent")),
+    ("Czechoslovakia (former)", ("czechoslovakia",)),
+    ("Eswatini (formerly Swaziland)", ("eswatini",)),
+])
+def test_name_tokens(name, tokens):
+    assert name_tokens(name) == tokens
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("Japan", "Japan"),
+    ("Asia", "Asia"),
+    ("Gambia, The", "Gambia"),
+    ("Cape Verde", "Cabo Verde"),
+    ("Swaziland", "Eswatini"),
+    ("Czechoslovakia (former)", "Czech Republic"),
+])
+def test_alias_file_and_canonical_names_resolve_without_report(normalizer, name, expected):
+    assert normalizer.resolve(name) == expected
+    assert normalizer.unmatched() == []
+
+
+@pytest.mark.parametrize("name, expected, method", [
+    ("JAPAN", "Japan", "tokens"),
+    ("The Gambia", "Gambia", "tokens"),
+    ("Saint Vincent and Grenadines", "Saint Vincent and the Grenadines", "tokens"),
+    ("Kingdom of Eswatini (formerly Swaziland)", "Eswatini", "former name"),
+    ("Kazakstan", "Kazakhstan", "fuzzy"),
+    ("Atlantis", "Atlantis", "unmatched"),
+])
+def test_unknown_names_resolve_by_tokens_former_name_or_fuzzily(normalizer, name, expected, method):
+    assert normalizer.resolve(name) == expected
+    assert normalizer.matches[name][:2] == (expected, method)
+
+
+def test_fuzzy_cutoff_bounds_the_match():
+    assert RegionNormalizer(fuzzy_cutoff=0.99).resolve("Kazakstan") == "Kazakstan"
+    assert RegionNormalizer(fuzzy_cutoff=0.9).resolve("Kazakstan") == "Kazakhstan"
+
+
+def test_alias_file_teaches_new_spellings(tmp_path):
+    path = tmp_path / "aliases.json"
+    path.write_text(json.dumps({"Nippon": "Japan", "Burma": "Myanmar"}), encoding="utf-8")
+    normalizer = RegionNormalizer(str(path))
+    assert [normalizer.resolve(name) for name in ["Nippon", "Burma", "nippon", "Cape Verde"]] == [
+        "Japan", "Myanmar", "Japan", "Cape Verde"]
+
+
+def test_normalize_counts_and_reports_names_outside_the_index(normalizer, tmp_path):
+    regions = pd.Series(["Japan", "JAPAN", "Kazakstan", "JAPAN", None, "Atlantis", "Swaziland"])
+    normalized = normalizer.normalize(regions)
+    assert normalized.tolist() == ["Japan", "Japan", "Kazakhstan", "Japan", None, "Atlantis", "Eswatini"]
+
+    # Each call resolves a distinct name once, so occurrences count the
+    # columns (workbooks) a spelling appears in
+    normalizer.normalize(pd.Series(["JAPAN"]))
+
+    rows = normalizer.report(str(tmp_path / "regions.csv"))
+    assert [(row["name"], row["resolved"], row["method"], row["occurrences"]) for row in rows] == [
+        ("Atlantis", "Atlantis", "unmatched", 1),
+        ("JAPAN", "Japan", "tokens", 2),
+        ("Kazakstan", "Kazakhstan", "fuzzy", 1),
+    ]
+    with open(tmp_path / "regions.csv", newline="", encoding="utf-8") as fh:
+        assert [row["name"] for row in csv.DictReader(fh)] == ["Atlantis", "JAPAN", "Kazakstan"]
+
+
+def test_standardize_region_name_uses_the_default_aliases():
+    assert standardize_region_name("Bahamas, The") == "Bahamas"
+    assert standardize_region_name(None) is None
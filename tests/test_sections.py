@@ -0,0 +1,39 @@
+# tests/test_sections.py
+
+import pandas as pd
+import pytest
+
+from Mergefn.immigration.ingest import ingest_files
+from Mergefn.immigration.sections import tag_sections
+
+from .conftest import COUNTRY_WORKBOOKS, workbook_path
+from .legacy import legacy_tag_sections
+
+
+def _merged(paths):
+    """The ingested tables of paths as Mergercode.py concatenated them."""
+    frames, _ = ingest_files(paths, verbose=False)
+    return pd.concat(frames, ignore_index=True).dropna(how="all")
+
+
+def _assert_same_tags(expected, actual):
+    for col in ["Group", "Subgroup"]:
+        pd.testing.assert_series_equal(
+            expected[col].astype(object).where(expected[col].notna(), None),
+            actual[col].astype(object).where(actual[col].notna(), None),
+        )
+
+
+@pytest.mark.parametrize("name", COUNTRY_WORKBOOKS)
+def test_tags_match_legacy_loop_per_workbook(name):
+    df = _merged([workbook_path(name)])
+    tagged = tag_sections(df)
+    _assert_same_tags(legacy_tag_sections(df), tagged)
+    assert set(tagged["Group"].dropna()) == {"Age", "Occupation", "Broad Class of Admission"}
+
+
+def test_tags_match_legacy_loop_across_workbooks(sample_workbooks):
+    # Sections must not run on from one file into the next; the rollup is skipped
+    df = _merged(sample_workbooks)
+    assert df["Year"].astype(str).str[:4].nunique() == len(COUNTRY_WORKBOOKS)
+    _assert_same_tags(legacy_tag_sections(df), tag_sections(df))
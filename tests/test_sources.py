@@ -0,0 +1,57 @@
+# tests/test_sources.py
+
+import hashlib
+import os
+import zipfile
+
+import pandas as pd
+import pytest
+
+from Mergefn.immigration.ingest import ingest_files
+from Mergefn.immigration.sources import (find_sources, read_source_bytes, source_digest, source_key,
+                                         source_name, split_source)
+
+from .conftest import workbook_path
+
+MEMBERS = {"LPR_COB/cobbook100_1.xls": "cobbook100_1.xls", "LPR_COB/fy2019cobbook100.xls": "fy2019cobbook100.xls"}
+
+
+@pytest.fixture
+def archive(tmp_path):
+    """A zip of two profile workbooks and the COBList index, which is not one."""
+    path = str(tmp_path / "a.zip")
+    with zipfile.ZipFile(path, "w") as zf:
+        for member, name in MEMBERS.items():
+            zf.write(workbook_path(name), member)
+        zf.writestr("LPR_COB/COBList.xls", b"index")
+    return path
+
+
+def test_members_listed_as_archive_sources(archive):
+    sources = find_sources([archive])
+    assert sources == [f"{archive}::{member}" for member in MEMBERS]
+    assert [split_source(source) for source in sources] == [(archive, member) for member in MEMBERS]
+    assert source_name(sources[0]) == "a.zip:cobbook100_1.xls"
+    assert source_key(sources[0]) == f"{os.path.abspath(archive)}::LPR_COB/cobbook100_1.xls"
+
+
+def test_member_reads_like_the_extracted_file(archive):
+    sources = find_sources([archive])
+    for source, name in zip(sources, MEMBERS.values()):
+        with open(workbook_path(name), "rb") as fh:
+            content = fh.read()
+        assert read_source_bytes(source) == content
+        assert source_digest(source) == hashlib.sha256(content).hexdigest()
+
+    from_zip, combinations = ingest_files(sources, verbose=False)
+    from_files, _ = ingest_files([workbook_path(name) for name in MEMBERS.values()], verbose=False)
+    for expected, actual in zip(from_files, from_zip):
+        pd.testing.assert_frame_equal(expected, actual)
+    assert sorted(combinations.values()) == ["a.zip:cobbook100_1.xls", "a.zip:fy2019cobbook100.xls"]
+
+
+def test_folder_lists_files_then_archives(tmp_path, archive):
+    loose = tmp_path / "b.xls"
+    loose.write_bytes(b"")
+    sources = find_sources([str(tmp_path), str(loose)])
+    assert sources == [str(loose)] + find_sources([archive])
@@ -0,0 +1,60 @@
+# tests/test_storage.py
+
+import pandas as pd
+import pytest
+
+from Mergefn.immigration.storage import dataset_writer, read_dataset, storage_format, write_dataset
+
+
+def _dataset(total):
+    """A few rows of the merged dataset, every Total set to `total`."""
+    return pd.DataFrame({
+        "Total": [total] * 3, "Male": [1.0, 2.0, 3.0], "Female": [4.0, 5.0, 6.0], "Unknown": [0.0] * 3,
+        "Year": ["2021", "2021", "2022"], "Region": ["India", "Japan", "India"],
+        "Group": ["Occupation"] * 3, "Subgroup": ["Retirees", "Students or children", "Retirees"],
+        "Imputed": [0, 1, 0],
+    })
+
+
+@pytest.mark.parametrize("name", ["merged.parquet", "merged.feather", "merged.csv", "merged.sqlite"])
+def test_writer_replaces_dataset_on_close(tmp_path, name):
+    path = str(tmp_path / name)
+    write_dataset(_dataset(1.0), path)
+    with dataset_writer(path) as writer:
+        writer.append(_dataset(2.0))
+    assert read_dataset(path)["Total"].tolist() == [2.0] * 3
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+@pytest.mark.parametrize("name", ["merged.parquet", "merged.feather", "merged.csv", "merged.sqlite"])
+def test_failed_write_keeps_previous_dataset(tmp_path, name):
+    path = str(tmp_path / name)
+    write_dataset(_dataset(1.0), path)
+    with pytest.raises(RuntimeError):
+        with dataset_writer(path) as writer:
+            writer.append(_dataset(2.0))
+            raise RuntimeError("merge failed")
+    assert read_dataset(path)["Total"].tolist() == [1.0] * 3
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_database_chunks_stored_with_canonical_types(tmp_path):
+    import sqlite3
+
+    written, appended = str(tmp_path / "written.sqlite"), str(tmp_path / "appended.sqlite")
+    write_dataset(_dataset(1.0), written)
+    with dataset_writer(appended) as writer:
+        writer.append(_dataset(1.0))
+    for path in [written, appended]:
+        with sqlite3.connect(path) as connection:
+            types = connection.execute('SELECT DISTINCT typeof("Year"), typeof("Total") FROM immigration').fetchall()
+        assert types == [("integer", "real")]
+
+
+def test_xls_read_only(tmp_path):
+    path = str(tmp_path / "merged.xls")
+    with pytest.raises(ValueError, match="xls"):
+        write_dataset(_dataset(1.0), path)
+    with pytest.raises(ValueError, match="xls"):
+        dataset_writer(path)
+    assert storage_format(path) == "excel"